@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Benchmarks de rendimiento sin interfaz (QT_QPA_PLATFORM=offscreen).
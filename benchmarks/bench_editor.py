@@ -0,0 +1,303 @@
+# benchmarks/bench_editor.py
+# Benchmarks del núcleo del editor, ejecutables sin pantalla.
+#
+# Uso:
+#   python -m benchmarks.bench_editor --output baseline.json
+#   python -m benchmarks.bench_editor --compare baseline.json [--threshold 0.2]
+#
+# Con --compare el proceso termina con código 1 si algún caso es más lento que
+# la línea base en más del umbral (mediana contra mediana) y en más de
+# --min-delta-ms milisegundos.
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication, QFileDialog
+from PyQt6.QtGui import QImage, QColor
+from PyQt6.QtCore import QPoint, QPointF, QRect, PYQT_VERSION_STR, QT_VERSION_STR
+
+from utils.constants import PRESET_SIZES
+
+EXTRA_SIZES = [(250, 250), (1000, 1000)]
+VIEWPORT_SIZE = (1280, 800)   # Tamaño del destino de paintEvent
+STROKE_CELLS = 2000           # Celdas por trazo de arrastre (como máximo)
+FRAGMENT_COLORS = ["#e63946", "#f1faee", "#a8dadc", "#457b9d", "#1d3557", "#ffb703"]
+RANDOM_SEED = 1234
+
+
+def bench_sizes() -> list[tuple[int, int]]:
+    """Tamaños de los presets (sin 'Custom') más los tamaños grandes extra."""
+    sizes = [size for name, size in PRESET_SIZES.items() if size[0] > 0 and size[1] > 0]
+    return sizes + [size for size in EXTRA_SIZES if size not in sizes]
+
+
+def _stats(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def _measure(fn, repeat: int, setup=None) -> dict:
+    """Ejecuta setup() (sin medir) y fn() (medido) 'repeat' veces."""
+    samples = []
+    for _ in range(repeat):
+        if setup: setup()
+        start = time.perf_counter(); fn(); samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+def _wait_for_jobs(window):
+    """Espera a que terminen los trabajos en segundo plano y entrega sus resultados."""
+    app = QApplication.instance()
+    while window.jobs.is_busy():
+        window.jobs.wait_for_done(50)
+        app.processEvents()
+
+
+@contextlib.contextmanager
+def _file_dialog_path(file_path: str):
+    """Hace que los diálogos de archivo devuelvan 'file_path' sin mostrarse."""
+    original_save, original_open = QFileDialog.getSaveFileName, QFileDialog.getOpenFileName
+    QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (file_path, ""))
+    QFileDialog.getOpenFileName = staticmethod(lambda *args, **kwargs: (file_path, ""))
+    try:
+        yield
+    finally:
+        QFileDialog.getSaveFileName, QFileDialog.getOpenFileName = original_save, original_open
+
+
+class EditorBench:
+    """Prepara una MainWindow a un tamaño de cuadrícula y mide cada caso."""
+
+    def __init__(self, window, width: int, height: int, repeat: int, work_dir: str):
+        self.window = window
+        self.canvas = window.grid_canvas
+        self.width, self.height = width, height
+        self.repeat = repeat
+        self.work_dir = work_dir
+        self.canvas.set_grid_type("Square")
+        self.canvas.zoom_factor = 1.0
+        self.canvas.set_grid_size(width, height)
+        self.entries = self._palette_entries()
+
+    def _palette_entries(self) -> list:
+        from models import BeadColorEntry
+        return [BeadColorEntry(QColor(hex_color), finish="Glossy" if i % 2 else "Opaque", name=hex_color)
+                for i, hex_color in enumerate(FRAGMENT_COLORS)]
+
+    # --- Estados de la cuadrícula ---
+    def _reset_empty(self):
+        self.canvas.clear_grid(); self.canvas._clear_history()
+
+    def _reset_fragmented(self):
+        """Ruido aleatorio (semilla fija): muchas regiones pequeñas, como un diseño real."""
+        grid = self.canvas.grid_data
+        lookup = np.array([0] + [grid.index_of(entry) for entry in self.entries], dtype=np.uint16)
+        rng = np.random.default_rng(RANDOM_SEED)
+        grid.load_indices(lookup[rng.integers(0, len(lookup), size=(self.height, self.width))])
+        self.canvas.row_runs.invalidate(); self.canvas._clear_history()
+        self.canvas.usage_changed.emit(); self.canvas.update()
+
+    def _cell_center(self, x: int, y: int) -> QPoint:
+        cell = self.canvas.cell_size
+        return QPoint(int(x * cell + cell / 2), int(y * cell + cell / 2))
+
+    def _stroke_points(self) -> list[QPoint]:
+        """Recorrido serpenteante por filas de hasta STROKE_CELLS centros de celda."""
+        points = []
+        for y in range(self.height):
+            row = range(self.width) if y % 2 == 0 else range(self.width - 1, -1, -1)
+            points.extend(self._cell_center(x, y) for x in row)
+            if len(points) >= STROKE_CELLS: break
+        return points[:STROKE_CELLS]
+
+    # --- Casos ---
+    def paint_event(self) -> dict:
+        self._reset_fragmented()
+        target = QImage(*VIEWPORT_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+        return _measure(lambda: self.canvas.render(target), self.repeat)
+
+    def drag_stroke(self) -> dict:
+        """Trazo serpenteante con el lápiz a través del motor de trazos (muestras agrupadas en un frame)."""
+        points = self._stroke_points()
+        canvas = self.canvas
+
+        def stroke():
+            canvas._stroke.begin(QPointF(points[0]))
+            for point in points[1:]: canvas._stroke.add(QPointF(point))
+            canvas._stroke.end()
+
+        canvas.set_current_entry(self.entries[0])
+        result = _measure(stroke, self.repeat, setup=self._reset_fragmented)
+        result["cells"] = len(points)
+        return result
+
+    def drag_stroke_frames(self) -> dict:
+        """
+        El mismo trazo con un frame por muestra (ratón lento): cada flush crea
+        un PaintCommand que se fusiona con el anterior en _execute_command.
+        """
+        points = self._stroke_points()
+        canvas = self.canvas
+
+        def stroke():
+            canvas._stroke.begin(QPointF(points[0]))
+            for point in points[1:]: canvas._stroke.add(QPointF(point)); canvas._stroke.flush()
+            canvas._stroke.end()
+
+        canvas.set_current_entry(self.entries[0])
+        result = _measure(stroke, self.repeat, setup=self._reset_fragmented)
+        if len(canvas.undo_stack) != 1: raise RuntimeError("per-frame stroke did not merge into a single command")
+        result["cells"] = len(points)
+        return result
+
+    def flood_fill_empty(self) -> dict:
+        self.canvas.set_current_entry(self.entries[0])
+        center = self._cell_center(self.width // 2, self.height // 2)
+        return _measure(lambda: self.canvas._flood_fill(center), self.repeat, setup=self._reset_empty)
+
+    def flood_fill_fragmented(self) -> dict:
+        self.canvas.set_current_entry(self.entries[0])
+        center = self._cell_center(self.width // 2, self.height // 2)
+        return _measure(lambda: self.canvas._flood_fill(center), self.repeat, setup=self._reset_fragmented)
+
+    def cut_paste(self) -> dict:
+        """Corta la mitad izquierda y la pega desplazada (dos SelectionCommand)."""
+        canvas = self.canvas
+        half = QRect(0, 0, max(1, self.width // 2), self.height)
+        target = QRect(self.width - half.width(), 0, 1, 1)
+
+        def cut_and_paste():
+            canvas.selection_rect = QRect(half); canvas.cut_selection()
+            canvas.selection_rect = QRect(target); canvas.paste_selection()
+
+        return _measure(cut_and_paste, self.repeat, setup=self._reset_fragmented)
+
+    def save_load_roundtrip(self) -> dict:
+        design_path = os.path.join(self.work_dir, f"bench_{self.width}x{self.height}.json")
+
+        def roundtrip():
+            with _file_dialog_path(design_path):
+                self.window.save_design(); _wait_for_jobs(self.window)
+                self.window.load_design(); _wait_for_jobs(self.window)
+
+        self._reset_fragmented()
+        expected = self.canvas.get_grid_data()
+        result = _measure(roundtrip, self.repeat)
+        if self.canvas.get_grid_data() != expected:
+            raise RuntimeError("save/load round-trip changed the design")
+        result["file_bytes"] = os.path.getsize(design_path)
+        return result
+
+    def export_png(self) -> dict:
+        png_path = os.path.join(self.work_dir, f"bench_{self.width}x{self.height}.png")
+
+        def export():
+            with _file_dialog_path(png_path):
+                self.window.export_as_png(); _wait_for_jobs(self.window)
+
+        self._reset_fragmented()
+        return _measure(export, self.repeat)
+
+    def run_all(self) -> dict:
+        cases = [
+            ("paint_event", self.paint_event),
+            ("drag_stroke", self.drag_stroke),
+            ("drag_stroke_frames", self.drag_stroke_frames),
+            ("flood_fill_empty", self.flood_fill_empty),
+            ("flood_fill_fragmented", self.flood_fill_fragmented),
+            ("cut_paste", self.cut_paste),
+            ("save_load_roundtrip", self.save_load_roundtrip),
+            ("export_png", self.export_png),
+        ]
+        results = {}
+        for name, case in cases:
+            results[name] = case()
+            print(f"  {name:<24} median {results[name]['median_ms']:>10.2f} ms", file=sys.stderr)
+        return results
+
+
+def run_benchmarks(sizes: list[tuple[int, int]], repeat: int) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from main_window import MainWindow
+    window = MainWindow()
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "qt": QT_VERSION_STR, "pyqt": PYQT_VERSION_STR,
+            "numpy": np.__version__, "platform": platform.platform(), "repeat": repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="beadwork_bench_") as work_dir:
+        for width, height in sizes:
+            label = f"{width}x{height}"
+            print(f"[{label}]", file=sys.stderr)
+            report["results"][label] = EditorBench(window, width, height, repeat, work_dir).run_all()
+    window.jobs.shutdown()
+    window.deleteLater(); app.processEvents()
+    return report
+
+
+def compare_reports(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Imprime la comparación caso a caso y devuelve las regresiones encontradas."""
+    regressions = []
+    print(f"{'size':<12}{'case':<24}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for label, cases in current["results"].items():
+        for name, result in cases.items():
+            base = baseline.get("results", {}).get(label, {}).get(name)
+            if not base: continue
+            ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] > 0 else 1.0
+            flag = ""
+            if ratio > 1.0 + threshold and result["median_ms"] - base["median_ms"] > min_delta_ms: # Ignora el ruido de casos muy rápidos
+                flag = "  REGRESSION"; regressions.append(f"{label} {name}: x{ratio:.2f}")
+            print(f"{label:<12}{name:<24}{base['median_ms']:>10.2f}ms{result['median_ms']:>10.2f}ms{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def _parse_size(text: str) -> tuple[int, int]:
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the Beadwork Designer editor core.")
+    parser.add_argument("--sizes", nargs="+", type=_parse_size, help="Grid sizes as WxH (default: presets + 250x250 + 1000x1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (default: 3)")
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a stored JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging a regression (default: 0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this many milliseconds (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes or bench_sizes(), max(1, args.repeat))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2); print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f: baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
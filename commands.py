@@ -1,6 +1,7 @@
 # commands.py (v9.1 - Soporte para BeadColorEntry)
 
 from abc import ABC, abstractmethod
+import numpy as np
 from PyQt6.QtGui import QColor
 from PyQt6.QtCore import QRect 
 
@@ -31,6 +32,10 @@ class Command(ABC):
         """Intenta fusionar este comando con el siguiente. Devuelve True si se fusiona."""
         return False
 
+    def cell_count(self) -> int:
+        """Número de celdas que toca el comando (para diagnóstico)."""
+        return 0
+
 
 class PaintCommand(Command):
     """
@@ -40,40 +45,34 @@ class PaintCommand(Command):
     # MODIFICADO: El diccionario changes ahora usa BeadColorEntry | None
     def __init__(self, grid_canvas, changes: dict[tuple[int, int], tuple[BeadColorEntry | None, BeadColorEntry | None]]):
         self._canvas = grid_canvas 
+        self._layer = grid_canvas.grid_data.active_layer # Capa editada (el deshacer vuelve a ella aunque cambie la activa)
         # Formato: {(x, y): (old_entry, new_entry)}
         self._changes = changes 
 
+    def _apply(self, use_new: bool):
+        """Escribe de golpe las entradas nuevas (o antiguas) de todas las celdas del cambio."""
+        grid = self._canvas.grid_data
+        coords = [c for c in self._changes if 0 <= c[0] < grid.width and 0 <= c[1] < grid.height]
+        if not coords:
+            return
+        pick = 1 if use_new else 0
+        xs = np.fromiter((c[0] for c in coords), dtype=np.intp, count=len(coords))
+        ys = np.fromiter((c[1] for c in coords), dtype=np.intp, count=len(coords))
+        values = np.fromiter((grid.index_of(self._changes[c][pick]) for c in coords), dtype=grid.indices.dtype, count=len(coords))
+        if grid.write_cells(xs, ys, values, layer=self._layer).any():
+            self._canvas.update()
+
     def execute(self):
         """Aplica las nuevas entradas de color a los datos de la cuadrícula del lienzo."""
-        needs_update = False
-        for (x, y), (old_entry, new_entry) in self._changes.items():
-            if 0 <= x < self._canvas.grid_width and 0 <= y < self._canvas.grid_height:
-                
-                # Comprobación de cambio: Compara la nueva entrada con la actual
-                if self._canvas.grid_data[y][x] != new_entry:
-                     self._canvas.grid_data[y][x] = new_entry
-                     needs_update = True
-                     
-        if needs_update:
-            self._canvas.update() 
+        self._apply(use_new=True)
 
     def undo(self):
         """Restaura las entradas antiguas a los datos de la cuadrícula del lienzo."""
-        needs_update = False
-        for (x, y), (old_entry, new_entry) in self._changes.items():
-             if 0 <= x < self._canvas.grid_width and 0 <= y < self._canvas.grid_height:
-                 
-                 # Comprobación de cambio: Restaura la entrada antigua
-                 if self._canvas.grid_data[y][x] != old_entry:
-                      self._canvas.grid_data[y][x] = old_entry
-                      needs_update = True
-                      
-        if needs_update:
-            self._canvas.update() 
+        self._apply(use_new=False)
                 
     def merge_with(self, next_command) -> bool:
         """Fusiona dos PaintCommands si son parte del mismo trazo de arrastre."""
-        if not isinstance(next_command, PaintCommand) or self._canvas != next_command._canvas:
+        if not isinstance(next_command, PaintCommand) or self._canvas != next_command._canvas or self._layer is not next_command._layer:
             return False
         
         # El valor antiguo se mantiene como el primer estado, y el nuevo se actualiza.
@@ -87,78 +86,257 @@ class PaintCommand(Command):
                  self._changes[coords] = (next_old, next_new)
         return True
 
+    def cell_count(self) -> int:
+        return len(self._changes)
+
 # --- Comando para Cortar, Pegar, Borrar Selección ---
 class SelectionCommand(Command):
     """
     Representa una operación en un área seleccionada (Cortar, Pegar, Borrar).
     Almacena los datos *antes* de la operación para deshacer.
     """
-    def __init__(self, grid_canvas, selection_rect: QRect, 
-                 # MODIFICADO: paste_data ahora es list[list[BeadColorEntry | None]]
-                 paste_data: list[list[BeadColorEntry | None]] | None = None):
+    def __init__(self, grid_canvas, selection_rect: QRect, paste_data: np.ndarray | None = None):
         """
         Args:
             ...
-            paste_data: Si es una operación de Pegar, esta es la data a pegar.
-                        Si es None (para Cortar/Borrar), se rellenará con None.
+            paste_data: Si es una operación de Pegar, el bloque de índices a pegar
+                        (el portapapeles). Si es None (para Cortar/Borrar), se vacía el área.
         """
         self._canvas = grid_canvas
+        self._layer = grid_canvas.grid_data.active_layer
         self._rect = selection_rect
         self._paste_data = paste_data
         
-        # Almacenará los datos que fueron sobrescritos (list[list[BeadColorEntry | None]])
-        self._undone_data: list[list[BeadColorEntry | None]] = [] 
-
-    # MODIFICADO: Extrae BeadColorEntry
-    def _get_data_from_rect(self, rect: QRect) -> list[list[BeadColorEntry | None]]:
-        """Extrae las entradas de color de un área del lienzo."""
-        data = []
-        for r in range(rect.height()):
-            row = []
-            y = rect.y() + r
-            if 0 <= y < self._canvas.grid_height:
-                for c in range(rect.width()):
-                    x = rect.x() + c
-                    if 0 <= x < self._canvas.grid_width:
-                        # Almacena la entrada completa (BeadColorEntry o None)
-                        row.append(self._canvas.grid_data[y][x])
-                    else:
-                        row.append(None) 
-            else:
-                row = [None] * rect.width() 
-            data.append(row)
-        return data
-
-    # MODIFICADO: Aplica BeadColorEntry
-    def _apply_data_to_rect(self, rect: QRect, data: list[list[BeadColorEntry | None]]):
-        """Aplica un bloque de entradas de color a un área del lienzo."""
-        for r, row_data in enumerate(data):
-            y = rect.y() + r
-            if 0 <= y < self._canvas.grid_height:
-                for c, entry in enumerate(row_data):
-                    x = rect.x() + c
-                    if 0 <= x < self._canvas.grid_width:
-                        # Aplica la entrada completa (BeadColorEntry o None)
-                        self._canvas.grid_data[y][x] = entry
+        # Almacenará el bloque de índices que fue sobrescrito
+        self._undone_data: np.ndarray | None = None 
 
     def execute(self):
         """Aplica la operación (Pegar, Cortar, Borrar)."""
-        self._undone_data = self._get_data_from_rect(self._rect)
+        grid = self._canvas.grid_data
+        rect = self._rect
+        self._undone_data = grid.read_block(rect.x(), rect.y(), rect.width(), rect.height(), layer=self._layer)
         
-        if self._paste_data:
-            self._apply_data_to_rect(self._rect, self._paste_data)
+        if self._paste_data is not None:
+            grid.write_block(rect.x(), rect.y(), self._paste_data, layer=self._layer)
         else:
-            # Crea una matriz de None (borrado)
-            empty_data = [[None for _ in range(self._rect.width())] for _ in range(self._rect.height())]
-            self._apply_data_to_rect(self._rect, empty_data)
+            # Bloque vacío (borrado)
+            grid.write_block(rect.x(), rect.y(), np.zeros_like(self._undone_data), layer=self._layer)
         
         self._canvas.update()
-        # NOTA: El retorno de execute ahora es _undone_data (list[list[BeadColorEntry | None]])
+        # NOTA: execute devuelve el bloque sobrescrito (np.ndarray de índices)
         return self._undone_data 
 
     def undo(self):
         """Restaura los datos que fueron sobrescritos."""
-        self._apply_data_to_rect(self._rect, self._undone_data)
+        self._canvas.grid_data.write_block(self._rect.x(), self._rect.y(), self._undone_data, layer=self._layer)
+        self._canvas.update()
+
+    def cell_count(self) -> int:
+        return self._rect.width() * self._rect.height()
+
+# --- Fin de la clase SelectionCommand ---
+
+
+class FloatCommand(Command):
+    """
+    Asienta una selección flotante: vacía el rectángulo de origen y escribe el
+    bloque transformado en su destino. Solo guarda los bloques implicados
+    (origen, destino anterior y bloque nuevo), no la cuadrícula.
+    """
+    def __init__(self, grid_canvas, source_rect: QRect, original: np.ndarray, target_rect: QRect, block: np.ndarray):
+        self._canvas = grid_canvas
+        self._layer = grid_canvas.grid_data.active_layer
+        self._source = QRect(source_rect); self._original = original
+        self._target = QRect(target_rect); self._block = np.ascontiguousarray(block)
+        self._target_before: np.ndarray | None = None
+
+    def execute(self):
+        grid = self._canvas.grid_data
+        source, target = self._source, self._target
+        if self._target_before is None:
+            self._target_before = grid.read_block(target.x(), target.y(), target.width(), target.height(), layer=self._layer)
+        grid.write_block(source.x(), source.y(), np.zeros_like(self._original), layer=self._layer)
+        grid.write_block(target.x(), target.y(), self._block, layer=self._layer)
+        self._canvas.update()
+
+    def undo(self):
+        grid = self._canvas.grid_data
+        grid.write_block(self._target.x(), self._target.y(), self._target_before, layer=self._layer)
+        grid.write_block(self._source.x(), self._source.y(), self._original, layer=self._layer)
+        self._canvas.update()
+
+    def cell_count(self) -> int:
+        return self._original.size + self._block.size
+
+class DiffCommand(Command):
+    """
+    Cambio disperso sobre la cuadrícula empaquetada: solo las celdas que
+    cambian (índice plano y * ancho + x) con su índice antiguo y nuevo. Para
+    ediciones masivas (mosaicos, reasignaciones...) ocupa 8 bytes por celda
+    cambiada en lugar de un dict de entradas por coordenada.
+    """
+    def __init__(self, grid_canvas, cells: np.ndarray, old_values: np.ndarray, new_values: np.ndarray):
+        self._canvas = grid_canvas
+        self._layer = grid_canvas.grid_data.active_layer
+        self._width = grid_canvas.grid_data.width
+        self._cells = np.asarray(cells, dtype=np.uint32)
+        self._old = np.asarray(old_values, dtype=np.uint16); self._new = np.asarray(new_values, dtype=np.uint16)
+
+    def _apply(self, values: np.ndarray):
+        cells = self._cells.astype(np.intp)
+        if self._canvas.grid_data.write_cells(cells % self._width, cells // self._width, values, layer=self._layer).any():
+            self._canvas.update()
+
+    def execute(self):
+        self._apply(self._new)
+
+    def undo(self):
+        self._apply(self._old)
+
+    def cell_count(self) -> int:
+        return int(self._cells.size)
+
+
+class RemapCommand(Command):
+    """
+    Reasignación de colores (reemplazar, intercambiar, fusionar) sobre capas
+    enteras: se guarda la tabla índice antiguo -> nuevo, no las celdas.
+    Deshacer aplica la tabla inversa; solo cuando varios colores presentes
+    acaban en el mismo destino (reemplazo por un color ya usado, fusión) se
+    guardan, con su índice antiguo, las celdas que no son del color
+    mayoritario de ese destino.
+    """
+    def __init__(self, grid_canvas, table: np.ndarray, layers: list):
+        self._canvas = grid_canvas
+        self._width = grid_canvas.grid_data.width
+        self._table = np.asarray(table, dtype=np.uint16)
+        self._layers = list(layers)
+        self._inverse: list[tuple[np.ndarray, np.ndarray, np.ndarray] | None] = [] # Por capa: (tabla inversa, celdas, índices antiguos)
+        self._cells_changed = 0
+
+    def _lookup(self, table: np.ndarray, size: int) -> np.ndarray:
+        """La tabla cubre las entradas que existían al crearla; las posteriores se quedan igual."""
+        if size <= len(table): return table
+        return np.concatenate([table, np.arange(len(table), size, dtype=table.dtype)])
+
+    def _write(self, layer, flat: np.ndarray, values: np.ndarray) -> int:
+        cells = np.flatnonzero(values != flat)
+        if cells.size:
+            self._canvas.grid_data.write_cells(cells % self._width, cells // self._width, values[cells], layer=layer)
+        return int(cells.size)
+
+    def execute(self):
+        grid = self._canvas.grid_data
+        self._inverse = []; self._cells_changed = 0
+        for layer in self._layers:
+            flat = layer.indices.ravel(); table = self._lookup(self._table, len(grid.entries)); size = len(table)
+            new = table[flat]
+            changed = new != flat
+            if not changed.any(): self._inverse.append(None); continue
+            # Destinos implicados: su origen mayoritario define la inversa; el resto de sus celdas son excepciones
+            involved = np.zeros(size, dtype=bool); involved[new[changed]] = True
+            selected = involved[new]
+            keys, counts = np.unique(new[selected].astype(np.int64) * size + flat[selected], return_counts=True)
+            targets, sources = keys // size, keys % size
+            order = np.lexsort((-counts, targets))
+            first = order[np.concatenate(([True], targets[order][1:] != targets[order][:-1]))]
+            inverse = np.arange(size, dtype=np.uint16); inverse[targets[first]] = sources[first]
+            exceptions = np.flatnonzero(selected & (inverse[new] != flat)).astype(np.uint32)
+            self._inverse.append((inverse, exceptions, flat[exceptions].copy()))
+            self._cells_changed += self._write(layer, flat, new)
+        self._canvas.update()
+
+    def undo(self):
+        grid = self._canvas.grid_data
+        for layer, record in zip(self._layers, self._inverse):
+            if record is None: continue
+            inverse, exceptions, old_values = record
+            flat = layer.indices.ravel()
+            restored = self._lookup(inverse, len(grid.entries))[flat]
+            restored[exceptions] = old_values
+            self._write(layer, flat, restored)
         self._canvas.update()
 
-# --- Fin de la clase SelectionCommand ---
\ No newline at end of file
+    def cell_count(self) -> int:
+        return self._cells_changed
+
+
+class ResizeCommand(Command):
+    """
+    Cambio de tamaño no destructivo: el contenido se desplaza (offset) y se
+    recorta o amplía con celdas vacías. Solo se guardan, por capa, las tiras
+    recortadas que no estaban vacías; al deshacer, la zona conservada sale de
+    la propia cuadrícula y lo añadido (vacío, en ese punto del historial) se
+    descarta.
+    """
+    def __init__(self, grid_canvas, width: int, height: int, offset_x: int, offset_y: int):
+        self._canvas = grid_canvas
+        grid = grid_canvas.grid_data
+        self._old_size = (grid.width, grid.height); self._new_size = (width, height)
+        self._offset = (offset_x, offset_y)
+        self._layers = list(grid.layers)
+        self._strips: list[list[tuple[int, int, np.ndarray]]] = [] # Por capa: (x, y, bloque) en coordenadas anteriores
+
+    def _cropped_rects(self) -> list[tuple[int, int, int, int]]:
+        """Rectángulos (x, y, ancho, alto) de la cuadrícula anterior que quedan fuera de la nueva."""
+        (old_width, old_height), (width, height), (dx, dy) = self._old_size, self._new_size, self._offset
+        x0, y0 = max(0, -dx), max(0, -dy); x1, y1 = min(old_width, width - dx), min(old_height, height - dy)
+        if x0 >= x1 or y0 >= y1: return [(0, 0, old_width, old_height)] # No queda nada: se guarda todo
+        rects = [(0, 0, old_width, y0), (0, y1, old_width, old_height - y1), (0, y0, x0, y1 - y0), (x1, y0, old_width - x1, y1 - y0)]
+        return [rect for rect in rects if rect[2] > 0 and rect[3] > 0]
+
+    def execute(self):
+        rects = self._cropped_rects()
+        self._strips = [[(x, y, block) for x, y, w, h in rects if (block := layer.indices[y:y + h, x:x + w].copy()).any()] for layer in self._layers]
+        (width, height), (dx, dy) = self._new_size, self._offset
+        self._canvas.grid_data.resize(width, height, dx, dy)
+        self._canvas._sync_grid_size()
+
+    def undo(self):
+        grid = self._canvas.grid_data
+        (width, height), (dx, dy) = self._old_size, self._offset
+        grid.resize(width, height, -dx, -dy)
+        for layer, strips in zip(self._layers, self._strips):
+            for x, y, block in strips: layer.indices[y:y + block.shape[0], x:x + block.shape[1]] = block
+        if any(self._strips): grid.recomposite()
+        self._canvas._sync_grid_size()
+
+    def cell_count(self) -> int:
+        return sum(block.size for strips in self._strips for _x, _y, block in strips)
+
+
+class LayerCommand(Command):
+    """
+    Cambio en la pila de capas (añadir, duplicar, quitar, mover, mostrar,
+    bloquear, renombrar). La primera ejecución aplica 'action'; se guarda la
+    pila antes y después (los mismos objetos GridLayer, la activa y las
+    banderas de cada una), no las celdas. Una capa quitada sigue viva en el
+    comando, así que los comandos anteriores que escriben en ella vuelven a
+    encontrarla al deshacer.
+    """
+    def __init__(self, grid_canvas, action, composite_changed: bool = True):
+        self._canvas = grid_canvas
+        self._action = action
+        self._composite_changed = composite_changed # False en renombrar/bloquear: no hace falta recomponer
+        self._before = self._snapshot()
+        self._after = None
+
+    def _snapshot(self) -> tuple[list, object, list[tuple[str, bool, bool]]]:
+        grid = self._canvas.grid_data
+        return list(grid.layers), grid.active_layer, [(layer.name, layer.visible, layer.locked) for layer in grid.layers]
+
+    def _restore(self, state):
+        grid = self._canvas.grid_data
+        layers, active, flags = state
+        for layer, (name, visible, locked) in zip(layers, flags): layer.name, layer.visible, layer.locked = name, visible, locked
+        grid.layers = list(layers); grid.active_layer = active
+        if self._composite_changed: grid.recomposite()
+
+    def execute(self):
+        if self._after is None: self._action(); self._after = self._snapshot()
+        else: self._restore(self._after)
+        self._canvas.layers_changed.emit(); self._canvas.update()
+
+    def undo(self):
+        self._restore(self._before)
+        self._canvas.layers_changed.emit(); self._canvas.update()
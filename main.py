@@ -3,10 +3,19 @@
 import sys
 import os # Import the 'os' module to handle file paths
 
+# --- Optional startup profiling (--profile-startup) ---
+# Installed before the heavy imports below so that they are timed too.
+from utils.startup_profile import StartupProfiler, startup_mark
+startup_profiler = StartupProfiler() if "--profile-startup" in sys.argv else None
+if startup_profiler: startup_profiler.install()
+
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 
 # Import the main window class from its file
 from main_window import MainWindow 
+from utils.watchdog import StallWatchdog, DEFAULT_THRESHOLD_MS
+startup_mark("imports")
 
 # --- Best Practice: Function to load stylesheet ---
 def load_stylesheet(filename: str) -> str:
@@ -28,17 +37,29 @@ def load_stylesheet(filename: str) -> str:
         print(f"Error loading stylesheet '{filename}': {e}")
         return "" # Return empty string on other errors
 
+def watchdog_threshold(argv: list[str]) -> int | None:
+    """Returns the stall threshold (ms) if '--watchdog' or '--watchdog=MS' was given."""
+    for arg in argv[1:]:
+        if arg == "--watchdog": return DEFAULT_THRESHOLD_MS
+        if arg.startswith("--watchdog="):
+            try: return max(1, int(arg.split("=", 1)[1]))
+            except ValueError: print(f"Warning: Invalid watchdog threshold '{arg}'. Using {DEFAULT_THRESHOLD_MS} ms.")
+            return DEFAULT_THRESHOLD_MS
+    return None
+
 # --- Main execution block ---
 if __name__ == "__main__":
     # 1. Create the QApplication instance
     #    This is the core object managing GUI application resources.
     app = QApplication(sys.argv) # sys.argv allows command line arguments if needed
+    startup_mark("QApplication")
 
     # 2. Load the stylesheet
     #    Separating styles makes the application easier to theme.
     stylesheet = load_stylesheet("styles/dark_theme.qss")
     if stylesheet:
         app.setStyleSheet(stylesheet)
+    startup_mark("stylesheet")
 
     # 3. Create the MainWindow instance
     #    This initializes your main application window using the class we defined.
@@ -48,8 +69,21 @@ if __name__ == "__main__":
     #    Make it visible. showMaximized() is often good for design tools.
     window.showMaximized()
     # window.show() # Use this for a normal, non-maximized window
+    startup_mark("show window")
+    if startup_profiler:
+        # The first timer runs once the event loop has processed the initial show/paint events
+        def finish_startup_profile():
+            startup_mark("first frame"); startup_profiler.uninstall(); startup_profiler.write_report()
+        QTimer.singleShot(0, finish_startup_profile)
+
+    # 5. Optional: watch the GUI thread for stalls (summary printed on exit)
+    threshold = watchdog_threshold(sys.argv)
+    if threshold is not None:
+        watchdog = StallWatchdog(threshold, parent=app)
+        app.aboutToQuit.connect(watchdog.stop)
+        watchdog.start()
 
-    # 5. Start the application's event loop
+    # 6. Start the application's event loop
     #    This hands control over to Qt to handle user interactions (clicks, etc.)
     #    sys.exit() ensures a clean exit code is returned when the app closes.
     sys.exit(app.exec())
\ No newline at end of file
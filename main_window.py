@@ -1,27 +1,28 @@
 # main_window.py (v9.5 - Lógica de Edición de Acabado)
 
 import sys 
-import json
 
 # --- Qt Modules ---
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QPushButton, QLabel, QFileDialog, QSpinBox, QFrame, QSizePolicy, QComboBox,
+    QPushButton, QLabel, QFileDialog, QSpinBox, QDoubleSpinBox, QFrame, QSizePolicy, QComboBox,
     QScrollArea, QApplication, QDialog, QColorDialog, 
-    QButtonGroup 
+    QButtonGroup, QMenu, QInputDialog, QMessageBox 
 )
 from PyQt6.QtGui import (
-    QIcon, QColor, QImage, QAction, QKeySequence, QPixmap, QPainter
+    QIcon, QColor, QImage, QAction, QActionGroup, QKeySequence, QPixmap
 )
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QPoint, QPointF
+from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer
 
 # --- Import Widgets ---
 from widgets.image_picker import ImageColorPicker
 from widgets.palette_widget import PaletteWidget
 from widgets.grid_canvas import GridCanvas 
-from widgets.crop_dialog import CropDialog
-from widgets.preview_dialog import PreviewDialog
-from widgets.miyuki_code_dialog import MiyukiCodeDialog 
+from widgets.materials_panel import MaterialsPanel
+from widgets.tile_dialog import TileStampDialog
+from widgets.layers_panel import LayersPanel
+from widgets.color_remap_dialog import ColorRemapDialog, ReduceColorsDialog
+# CropDialog, PreviewDialog y MiyukiCodeDialog (con el catálogo) se importan al usarse por primera vez
 
 # --- Importar modelos necesarios ---
 from models import BeadColorEntry 
@@ -30,10 +31,18 @@ from utils.helpers import (
     ICON_SAVE, ICON_LOAD, ICON_EXPORT, ICON_CLEAR, ICON_PREVIEW, 
     ICON_UNDO, ICON_REDO,
     ICON_PENCIL, ICON_SYMMETRY_VERTICAL_DESCRIPTIVE, ICON_SYMMETRY_HORIZONTAL_DESCRIPTIVE,
-    ICON_FILL_TOOL, ICON_SELECT_TOOL,
-    ICON_COPY, ICON_CUT, ICON_PASTE 
+    ICON_FILL_TOOL, ICON_SELECT_TOOL, ICON_LINE_TOOL, ICON_RECTANGLE_TOOL, ICON_ELLIPSE_TOOL, ICON_POLYGON_TOOL, ICON_WAND_TOOL,
+    ICON_COPY, ICON_CUT, ICON_PASTE, ICON_BEAD_CHART, ICON_PRINT_CHART, ICON_EXPORT_SVG 
 )
-from utils.constants import PRESET_SIZES, DEFAULT_PRESET_NAME
+from utils.constants import PRESET_SIZES, DEFAULT_PRESET_NAME, RESIZE_ANCHORS, RESIZE_DEBOUNCE_MS
+from utils.jobs import Job, JobRunner
+from utils.grid_render import RenderGridImageJob, snapshot_palette
+from utils.geometry import GRID_TYPES
+from utils.symmetry import ROTATION_ORDERS
+from utils.floating import MIN_SCALE_PERCENT, MAX_SCALE_PERCENT
+from utils.design_io import LoadDesignJob, SaveDesignJob, ExportFileJob
+from utils.watchdog import watch_action
+from utils.startup_profile import startup_mark
 
 # --- Constantes de Color ---
 ICON_COLOR_INACTIVE = "#f8f9fa"  
@@ -52,9 +61,17 @@ class MainWindow(QMainWindow):
         
         main_widget = QWidget(); self.setCentralWidget(main_widget)
         main_layout = QHBoxLayout(main_widget)
+        startup_mark("MainWindow: window shell")
 
         # --- Left Panel ---
-        left_panel = QWidget(); left_layout = QVBoxLayout(left_panel); left_panel.setFixedWidth(570); left_panel.setObjectName("LeftPanel"); left_layout.setContentsMargins(0, 0, 0, 0); left_layout.setSpacing(0); inspiration_frame = QFrame(); inspiration_frame.setObjectName("SectionFrame"); inspiration_layout = QVBoxLayout(inspiration_frame); inspiration_layout.setContentsMargins(10, 10, 10, 10); load_section_label = QLabel("Inspiration"); load_section_label.setObjectName("SectionHeader"); inspiration_layout.addWidget(load_section_label); self.btn_load_image = QPushButton(); self.btn_load_image.setIcon(svg_to_qicon(ICON_LOAD)); self.btn_load_image.setIconSize(QSize(24, 24)); self.btn_load_image.setToolTip("Load Inspiration Image"); self.btn_load_image.setObjectName("PrimaryButton"); inspiration_layout.addWidget(self.btn_load_image); image_grid_container = QWidget(); image_grid = QGridLayout(image_grid_container); image_grid_container.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred); self.image_pickers = [ImageColorPicker() for _ in range(4)]; image_grid.addWidget(self.image_pickers[0], 0, 0); image_grid.addWidget(self.image_pickers[1], 0, 1); image_grid.addWidget(self.image_pickers[2], 1, 0); image_grid.addWidget(self.image_pickers[3], 1, 1); image_grid.setHorizontalSpacing(10); image_grid.setVerticalSpacing(10); image_grid.setContentsMargins(0, 5, 0, 0); image_grid.setColumnStretch(0, 1); image_grid.setColumnStretch(1, 1); image_grid.setRowStretch(0, 1); image_grid.setRowStretch(1, 1); inspiration_layout.addWidget(image_grid_container); palette_section_frame = QFrame(); palette_section_frame.setObjectName("SectionFrame"); palette_section_layout = QVBoxLayout(palette_section_frame); palette_section_layout.setContentsMargins(10, 10, 10, 10); palette_label = QLabel("Color Palette"); palette_label.setObjectName("SectionHeader"); self.palette_widget = PaletteWidget(); self.current_color_label = QLabel("Selected:"); self.current_color_swatch = QLabel(); self.current_color_swatch.setFixedSize(30, 30); self.current_color_swatch.setStyleSheet("border: 1px solid #555; background-color: #2c2c2c;"); current_color_layout = QHBoxLayout(); current_color_layout.addWidget(self.current_color_label); current_color_layout.addWidget(self.current_color_swatch); current_color_layout.addStretch(); palette_section_layout.addWidget(palette_label); palette_section_layout.addWidget(self.palette_widget); palette_section_layout.addLayout(current_color_layout); left_layout.addWidget(inspiration_frame); left_layout.addWidget(palette_section_frame); left_layout.addStretch() 
+        left_panel = QWidget(); left_layout = QVBoxLayout(left_panel); left_panel.setFixedWidth(570); left_panel.setObjectName("LeftPanel"); left_layout.setContentsMargins(0, 0, 0, 0); left_layout.setSpacing(0); inspiration_frame = QFrame(); inspiration_frame.setObjectName("SectionFrame"); inspiration_layout = QVBoxLayout(inspiration_frame); inspiration_layout.setContentsMargins(10, 10, 10, 10); load_section_label = QLabel("Inspiration"); load_section_label.setObjectName("SectionHeader"); inspiration_layout.addWidget(load_section_label); self.btn_load_image = QPushButton(); self.btn_load_image.setIcon(svg_to_qicon(ICON_LOAD)); self.btn_load_image.setIconSize(QSize(24, 24)); self.btn_load_image.setToolTip("Load Inspiration Image"); self.btn_load_image.setObjectName("PrimaryButton"); inspiration_layout.addWidget(self.btn_load_image); image_grid_container = QWidget(); image_grid = QGridLayout(image_grid_container); image_grid_container.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred); self.image_pickers = [ImageColorPicker() for _ in range(4)]; image_grid.addWidget(self.image_pickers[0], 0, 0); image_grid.addWidget(self.image_pickers[1], 0, 1); image_grid.addWidget(self.image_pickers[2], 1, 0); image_grid.addWidget(self.image_pickers[3], 1, 1); image_grid.setHorizontalSpacing(10); image_grid.setVerticalSpacing(10); image_grid.setContentsMargins(0, 5, 0, 0); image_grid.setColumnStretch(0, 1); image_grid.setColumnStretch(1, 1); image_grid.setRowStretch(0, 1); image_grid.setRowStretch(1, 1); inspiration_layout.addWidget(image_grid_container); palette_section_frame = QFrame(); palette_section_frame.setObjectName("SectionFrame"); palette_section_layout = QVBoxLayout(palette_section_frame); palette_section_layout.setContentsMargins(10, 10, 10, 10); palette_label = QLabel("Color Palette"); palette_label.setObjectName("SectionHeader"); self.palette_widget = PaletteWidget(); self.current_color_label = QLabel("Selected:"); self.current_color_swatch = QLabel(); self.current_color_swatch.setFixedSize(30, 30); self.current_color_swatch.setStyleSheet("border: 1px solid #555; background-color: #2c2c2c;"); current_color_layout = QHBoxLayout(); current_color_layout.addWidget(self.current_color_label); current_color_layout.addWidget(self.current_color_swatch); current_color_layout.addStretch(); palette_section_layout.addWidget(palette_label); palette_section_layout.addWidget(self.palette_widget); palette_section_layout.addLayout(current_color_layout); left_layout.addWidget(inspiration_frame); left_layout.addWidget(palette_section_frame)
+        layers_frame = QFrame(); layers_frame.setObjectName("SectionFrame"); layers_layout = QVBoxLayout(layers_frame); layers_layout.setContentsMargins(10, 10, 10, 10)
+        layers_label = QLabel("Layers"); layers_label.setObjectName("SectionHeader"); self.layers_panel = LayersPanel()
+        layers_layout.addWidget(layers_label); layers_layout.addWidget(self.layers_panel); left_layout.addWidget(layers_frame)
+        materials_frame = QFrame(); materials_frame.setObjectName("SectionFrame"); materials_layout = QVBoxLayout(materials_frame); materials_layout.setContentsMargins(10, 10, 10, 10)
+        materials_label = QLabel("Materials"); materials_label.setObjectName("SectionHeader"); self.materials_panel = MaterialsPanel()
+        materials_layout.addWidget(materials_label); materials_layout.addWidget(self.materials_panel, 1); left_layout.addWidget(materials_frame, 1)
+        startup_mark("MainWindow: left panel (pickers, palette, layers, materials)")
 
         # --- Right Panel (Canvas & Controls) ---
         right_panel = QWidget(); right_panel.setObjectName("RightPanel"); right_layout = QVBoxLayout(right_panel)
@@ -68,12 +85,22 @@ class MainWindow(QMainWindow):
         # Barra de Herramientas de Pintado
         tool_toolbar_layout = QHBoxLayout(); tool_toolbar_layout.setContentsMargins(0, 0, 0, 5); self.paint_tool_group = QButtonGroup(self); self.paint_tool_group.setExclusive(True)
         self.btn_tool_pencil = QPushButton(); self.btn_tool_pencil.setIcon(svg_to_qicon(ICON_PENCIL, ICON_COLOR_ACTIVE_TOOL)); self.btn_tool_pencil.setToolTip("Pencil Tool (P)"); self.btn_tool_pencil.setCheckable(True); self.btn_tool_pencil.setChecked(True); self.paint_tool_group.addButton(self.btn_tool_pencil, 0); tool_toolbar_layout.addWidget(self.btn_tool_pencil)
-        self.btn_tool_fill = QPushButton(); self.btn_tool_fill.setIcon(svg_to_qicon(ICON_FILL_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_fill.setToolTip("Fill Tool (G)"); self.btn_tool_fill.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_fill, 1); tool_toolbar_layout.addWidget(self.btn_tool_fill)
+        self.btn_tool_fill = QPushButton(); self.btn_tool_fill.setIcon(svg_to_qicon(ICON_FILL_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_fill.setToolTip("Fill Tool (G): regions follow the visible design, paint goes to the active layer"); self.btn_tool_fill.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_fill, 1); tool_toolbar_layout.addWidget(self.btn_tool_fill)
         self.btn_tool_select = QPushButton(); self.btn_tool_select.setIcon(svg_to_qicon(ICON_SELECT_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_select.setToolTip("Selection Tool (M)"); self.btn_tool_select.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_select, 2); tool_toolbar_layout.addWidget(self.btn_tool_select)
+        self.btn_tool_line = QPushButton(); self.btn_tool_line.setIcon(svg_to_qicon(ICON_LINE_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_line.setToolTip("Line Tool (drag)"); self.btn_tool_line.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_line, 3); tool_toolbar_layout.addWidget(self.btn_tool_line)
+        self.btn_tool_rectangle = QPushButton(); self.btn_tool_rectangle.setIcon(svg_to_qicon(ICON_RECTANGLE_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_rectangle.setToolTip("Rectangle Tool (drag)"); self.btn_tool_rectangle.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_rectangle, 4); tool_toolbar_layout.addWidget(self.btn_tool_rectangle)
+        self.btn_tool_ellipse = QPushButton(); self.btn_tool_ellipse.setIcon(svg_to_qicon(ICON_ELLIPSE_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_ellipse.setToolTip("Ellipse Tool (drag)"); self.btn_tool_ellipse.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_ellipse, 5); tool_toolbar_layout.addWidget(self.btn_tool_ellipse)
+        self.btn_tool_polygon = QPushButton(); self.btn_tool_polygon.setIcon(svg_to_qicon(ICON_POLYGON_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_polygon.setToolTip("Polygon Tool (click vertices; double-click or Enter to finish, Esc to cancel)"); self.btn_tool_polygon.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_polygon, 6); tool_toolbar_layout.addWidget(self.btn_tool_polygon)
+        self.btn_tool_wand = QPushButton(); self.btn_tool_wand.setIcon(svg_to_qicon(ICON_WAND_TOOL, ICON_COLOR_INACTIVE)); self.btn_tool_wand.setToolTip("Magic Wand (select similar colors of the visible design; Shift adds)"); self.btn_tool_wand.setCheckable(True); self.paint_tool_group.addButton(self.btn_tool_wand, 7); tool_toolbar_layout.addWidget(self.btn_tool_wand)
+        self.spin_tolerance = QDoubleSpinBox(); self.spin_tolerance.setRange(0.0, 100.0); self.spin_tolerance.setDecimals(1); self.spin_tolerance.setPrefix("ΔE "); self.spin_tolerance.setToolTip("Fill and Magic Wand tolerance (CIEDE2000; 0 = exact color)"); tool_toolbar_layout.addWidget(self.spin_tolerance)
+        self.btn_fill_contiguous = QPushButton("Contiguous"); self.btn_fill_contiguous.setToolTip("Fill and Magic Wand reach only connected cells (otherwise every similar cell)"); self.btn_fill_contiguous.setCheckable(True); self.btn_fill_contiguous.setChecked(True); tool_toolbar_layout.addWidget(self.btn_fill_contiguous)
+        self.btn_shape_filled = QPushButton("Filled"); self.btn_shape_filled.setToolTip("Fill rectangles, ellipses and polygons (otherwise outline only)"); self.btn_shape_filled.setCheckable(True); tool_toolbar_layout.addWidget(self.btn_shape_filled)
         separator = QFrame(); separator.setFrameShape(QFrame.Shape.VLine); separator.setFrameShadow(QFrame.Shadow.Sunken); tool_toolbar_layout.addWidget(separator)
         self.btn_tool_sym_v = QPushButton(); self.btn_tool_sym_v.setIcon(svg_to_qicon(ICON_SYMMETRY_VERTICAL_DESCRIPTIVE, ICON_COLOR_INACTIVE)); self.btn_tool_sym_v.setToolTip("Toggle Vertical Symmetry (Mirrors drawing horizontally)"); self.btn_tool_sym_v.setCheckable(True); tool_toolbar_layout.addWidget(self.btn_tool_sym_v)
         self.btn_tool_sym_h = QPushButton(); self.btn_tool_sym_h.setIcon(svg_to_qicon(ICON_SYMMETRY_HORIZONTAL_DESCRIPTIVE, ICON_COLOR_INACTIVE)); self.btn_tool_sym_h.setToolTip("Toggle Horizontal Symmetry (Mirrors drawing vertically)"); self.btn_tool_sym_h.setCheckable(True); tool_toolbar_layout.addWidget(self.btn_tool_sym_h)
+        self.btn_tool_sym_more = QPushButton("Symmetry"); self.btn_tool_sym_more.setToolTip("Rotational symmetry, column repeat and seam wrap-around"); self.btn_tool_sym_more.setMenu(self._create_symmetry_menu()); tool_toolbar_layout.addWidget(self.btn_tool_sym_more)
         tool_toolbar_layout.addStretch(); design_section_layout.addLayout(tool_toolbar_layout)
+        startup_mark("MainWindow: tool bar")
 
         # Canvas ScrollArea
         self.canvas_scroll_area = QScrollArea(); self.canvas_scroll_area.setWidgetResizable(True); self.canvas_scroll_area.setObjectName("CanvasScrollArea"); self.canvas_scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter) 
@@ -81,6 +108,7 @@ class MainWindow(QMainWindow):
         default_w, default_h = PRESET_SIZES[DEFAULT_PRESET_NAME]; initial_grid_type = "Square"; initial_cell_size = 12 
         self.grid_canvas.set_grid_type(initial_grid_type); self.grid_canvas.set_cell_size(initial_cell_size); self.grid_canvas.set_grid_size(default_w, default_h) 
         self.canvas_scroll_area.setWidget(self.grid_canvas)
+        startup_mark("MainWindow: grid canvas")
 
         # --- IO Controls ---
         io_controls_layout = QHBoxLayout()
@@ -95,19 +123,31 @@ class MainWindow(QMainWindow):
         io_controls_layout.addWidget(self.btn_copy)
         self.btn_paste = QPushButton(); self.btn_paste.setIcon(svg_to_qicon(ICON_PASTE)); self.btn_paste.setToolTip("Paste Selection (Ctrl+V)"); self.btn_paste.setEnabled(False)
         io_controls_layout.addWidget(self.btn_paste)
+        self.btn_tile = QPushButton("Tile"); self.btn_tile.setToolTip("Tile the clipboard across the selection or the whole grid (Ctrl+Shift+V)"); self.btn_tile.setEnabled(False)
+        io_controls_layout.addWidget(self.btn_tile)
         self.btn_delete = QPushButton(); self.btn_delete.setIcon(svg_to_qicon(ICON_CLEAR, color="#f8d7da")); self.btn_delete.setToolTip("Delete Selection (Delete)"); self.btn_delete.setEnabled(False); self.btn_delete.setObjectName("DangerButton")
         io_controls_layout.addWidget(self.btn_delete)
+        self.btn_transform = QPushButton("Transform"); self.btn_transform.setToolTip("Move, flip, rotate or scale the selection (drag it to move; Enter applies, Esc cancels)"); self.btn_transform.setEnabled(False)
+        io_controls_layout.addWidget(self.btn_transform)
+        self.btn_find = QPushButton("Find"); self.btn_find.setToolTip("Find the copied motif in the design and replace every occurrence"); self.btn_find.setEnabled(False)
+        io_controls_layout.addWidget(self.btn_find)
+        self.btn_colors = QPushButton("Colors"); self.btn_colors.setToolTip("Replace, swap or merge colors across the whole design")
+        io_controls_layout.addWidget(self.btn_colors)
         io_controls_layout.addSpacing(20) 
         self.btn_preview = QPushButton(); self.btn_preview.setIcon(svg_to_qicon(ICON_PREVIEW)); self.btn_preview.setToolTip("Preview Design")
         self.btn_save = QPushButton(); self.btn_save.setIcon(svg_to_qicon(ICON_SAVE)); self.btn_save.setToolTip("Save Design")
         self.btn_load = QPushButton(); self.btn_load.setIcon(svg_to_qicon(ICON_LOAD)); self.btn_load.setToolTip("Load Design")
         self.btn_export_png = QPushButton(); self.btn_export_png.setIcon(svg_to_qicon(ICON_EXPORT)); self.btn_export_png.setToolTip("Export as PNG")
+        self.btn_export_chart = QPushButton(); self.btn_export_chart.setIcon(svg_to_qicon(ICON_BEAD_CHART)); self.btn_export_chart.setToolTip("Export Bead List && Word Chart")
+        self.btn_export_pdf = QPushButton(); self.btn_export_pdf.setIcon(svg_to_qicon(ICON_PRINT_CHART)); self.btn_export_pdf.setToolTip("Export Printable PDF Chart")
+        self.btn_export_svg = QPushButton(); self.btn_export_svg.setIcon(svg_to_qicon(ICON_EXPORT_SVG)); self.btn_export_svg.setToolTip("Export as SVG (vector)")
         io_controls_layout.addWidget(self.btn_preview); io_controls_layout.addWidget(self.btn_save)
-        io_controls_layout.addWidget(self.btn_load); io_controls_layout.addWidget(self.btn_export_png); 
+        io_controls_layout.addWidget(self.btn_load); io_controls_layout.addWidget(self.btn_export_png); io_controls_layout.addWidget(self.btn_export_chart); io_controls_layout.addWidget(self.btn_export_pdf); io_controls_layout.addWidget(self.btn_export_svg)
         io_controls_layout.addStretch() 
         self.btn_clear_grid = QPushButton(); self.btn_clear_grid.setIcon(svg_to_qicon(ICON_CLEAR, color="#f8d7da")); self.btn_clear_grid.setObjectName("DangerButton"); self.btn_clear_grid.setToolTip("Clear Grid")
         io_controls_layout.addWidget(self.btn_clear_grid)
         design_section_layout.addWidget(self.canvas_scroll_area, 1); design_section_layout.addLayout(io_controls_layout)
+        startup_mark("MainWindow: IO controls")
 
         # --- Section 4: Define Size ---
         size_section_frame = QFrame(); size_section_frame.setObjectName("SectionFrame"); size_section_layout = QVBoxLayout(size_section_frame); size_section_layout.setContentsMargins(10, 10, 10, 10)
@@ -123,9 +163,11 @@ class MainWindow(QMainWindow):
         custom_size_sublayout.addWidget(QLabel("Cols:")); self.spin_grid_width = QSpinBox(); self.spin_grid_width.setRange(5, 500); self.spin_grid_width.setValue(default_w)
         custom_size_sublayout.addWidget(self.spin_grid_width); custom_size_sublayout.addSpacing(15); custom_size_sublayout.addWidget(QLabel("Rows:"))
         self.spin_grid_height = QSpinBox(); self.spin_grid_height.setRange(5, 500); self.spin_grid_height.setValue(default_h)
-        custom_size_sublayout.addWidget(self.spin_grid_height); custom_size_sublayout.addStretch() 
+        custom_size_sublayout.addWidget(self.spin_grid_height); custom_size_sublayout.addSpacing(15); custom_size_sublayout.addWidget(QLabel("Anchor:"))
+        self.combo_resize_anchor = QComboBox(); self.combo_resize_anchor.addItems(RESIZE_ANCHORS.keys()); self.combo_resize_anchor.setToolTip("Where the design stays when the grid grows (empty cells are added) or shrinks (the other side is cropped). Undo restores cropped beads.")
+        custom_size_sublayout.addWidget(self.combo_resize_anchor); custom_size_sublayout.addStretch() 
         size_controls_layout.addLayout(custom_size_sublayout, 1, 1, alignment=Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft) 
-        self.combo_grid_type = QComboBox(); self.combo_grid_type.addItems(["Square", "Peyote/Brick"]); self.combo_grid_type.setCurrentText(initial_grid_type)
+        self.combo_grid_type = QComboBox(); self.combo_grid_type.addItems(GRID_TYPES); self.combo_grid_type.setCurrentText(initial_grid_type)
         size_controls_layout.addWidget(self.combo_grid_type, 1, 2, alignment=Qt.AlignmentFlag.AlignVCenter) 
         self.spin_cell_size = QSpinBox(); self.spin_cell_size.setRange(5, 50); self.spin_cell_size.setValue(initial_cell_size)
         size_controls_layout.addWidget(self.spin_cell_size, 1, 3, alignment=Qt.AlignmentFlag.AlignVCenter) 
@@ -134,6 +176,7 @@ class MainWindow(QMainWindow):
         
         right_layout.addWidget(design_section_frame, 1); right_layout.addWidget(size_section_frame) 
         main_layout.addWidget(left_panel); main_layout.addWidget(right_panel, 1) 
+        startup_mark("MainWindow: size controls")
 
         # --- Create Actions ---
         self._create_actions()
@@ -149,9 +192,12 @@ class MainWindow(QMainWindow):
         self.palette_widget.colorRequest.connect(self.open_color_dialog) 
         
         self.btn_clear_grid.clicked.connect(self.grid_canvas.clear_grid) 
-        self.btn_save.clicked.connect(self.save_design)
+        self.btn_save.clicked.connect(lambda: self.save_design())
         self.btn_load.clicked.connect(self.load_design)
         self.btn_export_png.clicked.connect(self.export_as_png)
+        self.btn_export_chart.clicked.connect(self.export_bead_chart)
+        self.btn_export_pdf.clicked.connect(self.export_pdf_chart)
+        self.btn_export_svg.clicked.connect(self.export_as_svg)
         self.btn_preview.clicked.connect(self.show_preview)
         self.combo_presets.currentIndexChanged.connect(self.apply_preset_size) 
         self.spin_cell_size.valueChanged.connect(self.update_grid_size_from_controls) 
@@ -162,14 +208,43 @@ class MainWindow(QMainWindow):
         self.btn_redo.clicked.connect(self.grid_canvas.redo)
         self.grid_canvas.undo_redo_changed.connect(self.update_undo_redo_buttons)
         self.paint_tool_group.buttonToggled.connect(self._on_paint_tool_changed)
+        self.btn_shape_filled.toggled.connect(self.grid_canvas.set_shape_filled)
+        self.spin_tolerance.valueChanged.connect(self.grid_canvas.set_fill_tolerance); self.btn_fill_contiguous.toggled.connect(self.grid_canvas.set_fill_contiguous)
         self.btn_tool_sym_v.toggled.connect(self._on_symmetry_v_toggled) 
         self.btn_tool_sym_h.toggled.connect(self._on_symmetry_h_toggled)
         self.btn_cut.clicked.connect(self.grid_canvas.cut_selection)
         self.btn_copy.clicked.connect(self.grid_canvas.copy_selection)
         self.btn_paste.clicked.connect(self.grid_canvas.paste_selection)
+        self.btn_tile.clicked.connect(self.tile_clipboard)
         self.btn_delete.clicked.connect(self.grid_canvas.delete_selection)
         self.grid_canvas.selection_changed.connect(self._update_selection_actions)
         
+        # Capas: el panel pide, el lienzo aplica y avisa con layers_changed
+        self.layers_panel.layer_selected.connect(self.grid_canvas.set_active_layer)
+        self.layers_panel.visibility_toggled.connect(self.grid_canvas.set_layer_visible)
+        self.layers_panel.lock_toggled.connect(self.grid_canvas.set_layer_locked)
+        self.layers_panel.rename_requested.connect(self.grid_canvas.rename_layer)
+        self.layers_panel.add_requested.connect(lambda: self.grid_canvas.add_layer())
+        self.layers_panel.duplicate_requested.connect(lambda: self.grid_canvas.add_layer(duplicate=True))
+        self.layers_panel.remove_requested.connect(self.grid_canvas.remove_layer)
+        self.layers_panel.move_requested.connect(self.grid_canvas.move_layer)
+        self.grid_canvas.layers_changed.connect(self._refresh_layers)
+        self._refresh_layers()
+        
+        # Conteos de cuentas: se agrupan las señales de un trazo en un solo refresco
+        self._usage_refresh_timer = QTimer(self); self._usage_refresh_timer.setSingleShot(True); self._usage_refresh_timer.setInterval(50)
+        self._usage_refresh_timer.timeout.connect(self._refresh_bead_usage)
+        self.grid_canvas.usage_changed.connect(self._usage_refresh_timer.start)
+        # Redimensionado diferido: girar un spinbox de 26 a 45 aplica un único cambio de tamaño al detenerse
+        self._resize_timer = QTimer(self); self._resize_timer.setSingleShot(True); self._resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self._resize_timer.timeout.connect(self._apply_pending_resize)
+        self.grid_canvas.grid_size_changed.connect(self._on_canvas_grid_size_changed)
+
+        # Trabajos en segundo plano (E/S de diseños, renderizado); progreso en la barra de estado
+        self.jobs = JobRunner(self)
+        self._refresh_bead_usage()
+        startup_mark("MainWindow: actions and signals")
+        
     # --- METODOS DE MANEJO DE COLOR (v9.5) ---
     
     # MODIFICADO: Acepta 'index' (int) en lugar de 'QColor | None'
@@ -185,6 +260,7 @@ class MainWindow(QMainWindow):
         is_editing = (entry_to_edit is not None)
 
         # 2. Inicializar el diálogo (pasa la entrada si estamos editando)
+        from widgets.miyuki_code_dialog import MiyukiCodeDialog
         miyuki_dialog = MiyukiCodeDialog(existing_entry=entry_to_edit, parent=self)
         
         if miyuki_dialog.exec() == QDialog.DialogCode.Accepted:
@@ -198,6 +274,7 @@ class MainWindow(QMainWindow):
                 self.palette_widget.update_color_entry(index, new_entry)
             else:
                 self.palette_widget.add_color_entry(new_entry) 
+            self._refresh_bead_usage()
             
             # 4. Seleccionar la nueva entrada para pintar
             self._handle_palette_selection(new_entry) 
@@ -218,13 +295,55 @@ class MainWindow(QMainWindow):
         if entry.finish == "Eraser":
             # Si tienes un botón de borrador, selecciónalo aquí
             pass
-        elif self.paint_tool_group.checkedId() != 0: 
+        elif self.paint_tool_group.checkedId() in (1, 2): # Relleno/selección -> lápiz (las formas pintan con el color nuevo)
             self.btn_tool_pencil.setChecked(True)
             
     def set_current_color(self, color: QColor): 
         """Método de compatibilidad obsoleto. La lógica está en _handle_palette_selection."""
         pass
+
+    def _refresh_layers(self):
+        grid = self.grid_canvas.grid_data
+        self.layers_panel.set_layers(grid.layers, grid.active_layer)
+
+    def _refresh_bead_usage(self):
+        """
+        Publica los conteos por color (mantenidos por deltas en la cuadrícula) 
+        en los tooltips de la paleta y en el panel de materiales.
+        """
+        counts_by_hex = self.grid_canvas.grid_data.usage_by_hex()
+        self.palette_widget.set_bead_counts(counts_by_hex)
+        self.materials_panel.set_materials(self._used_colors(counts_by_hex))
+
+    def _used_colors(self, counts_by_hex: dict[str, int]) -> list[tuple[BeadColorEntry, int]]:
+        """(entrada, cuentas) por color HEX usado, de más a menos usado."""
+        # Preferir la metadata de la paleta (código/acabado) sobre la entrada cargada
+        palette_entries = {entry.color.name(): entry for entry in self.palette_widget.colors[1:] if entry}
+        rows: dict[str, tuple[BeadColorEntry, int]] = {}
+        for entry, count in self.grid_canvas.grid_data.used_entries():
+            key = entry.color.name()
+            if key not in rows:
+                rows[key] = (palette_entries.get(key, entry), counts_by_hex[key])
+        return sorted(rows.values(), key=lambda item: item[1], reverse=True)
     
+    def _submit_job(self, job: Job, label: str, on_finished, on_failed=None) -> Job:
+        """Envía un trabajo al JobRunner mostrando su progreso en la barra de estado."""
+        self.statusBar().showMessage(f"{label}...")
+        def finished(result):
+            self.statusBar().clearMessage()
+            with watch_action(f"{label} (apply result)"): on_finished(result)
+        def failed(message):
+            self.statusBar().showMessage(f"{label} failed", 5000)
+            if on_failed: on_failed(message)
+            else: print(f"Error: {label} failed: {message}")
+        return self.jobs.submit(job, on_finished=finished, on_failed=failed,
+                                on_progress=lambda percent: self.statusBar().showMessage(f"{label}... {percent}%"))
+
+    def closeEvent(self, event):
+        """Cancela los trabajos cancelables y espera a que terminen los guardados en curso."""
+        self.jobs.shutdown()
+        super().closeEvent(event)
+
     # --- MÉTODOS RESTAURADOS ---
     
     def load_image(self):
@@ -232,6 +351,7 @@ class MainWindow(QMainWindow):
         if not file_path: return
         original_image = QImage(file_path);
         if original_image.isNull(): print(f"Error: Failed to load image file: {file_path}"); return
+        from widgets.crop_dialog import CropDialog
         crop_dialog = CropDialog(original_image, self) 
         if crop_dialog.exec() == QDialog.DialogCode.Accepted:
             cropped_image = crop_dialog.get_cropped_image()
@@ -245,45 +365,55 @@ class MainWindow(QMainWindow):
         if not file_path: return 
         if not file_path.lower().endswith(".png"): file_path += ".png"
         
-        original_zoom = self.grid_canvas.zoom_factor
-        original_pan = self.grid_canvas.pan_offset
-        
-        try:
-            base_width_multiplier = self.grid_canvas.grid_width + 0.5 if self.grid_canvas.grid_type == "Peyote/Brick" else self.grid_canvas.grid_width
-            unzoomed_width = int(base_width_multiplier * self.grid_canvas.cell_size) + 1 
-            unzoomed_height = int(self.grid_canvas.grid_height * self.grid_canvas.cell_size) + 1
-            
-            pixmap = QPixmap(unzoomed_width, unzoomed_height)
-            if pixmap.isNull(): 
-                print("Error: Failed to create pixmap for export (possibly too large).")
-                return
-            
-            pixmap.fill(QColor("#e0e0e0")) 
-            
-            painter = QPainter(pixmap)
-            if not painter.isActive(): 
-                print("Error: Failed to create QPainter for export.")
-                painter.end()
-                return
-            
-            self.grid_canvas.zoom_factor = 1.0
-            self.grid_canvas.pan_offset = QPointF(0.0, 0.0)
-            
-            self.grid_canvas.render(painter, QPoint(), flags=QWidget.RenderFlag.DrawChildren) 
-            painter.end() 
-            
-            if not pixmap.save(file_path, "PNG"): 
-                print(f"Error: Failed to save PNG file to '{file_path}'")
-                
-        except Exception as e:
-            print(f"An unexpected error occurred during PNG export: {e}")
-            if 'painter' in locals() and painter.isActive(): 
-                painter.end() 
-        finally:
-            self.grid_canvas.zoom_factor = original_zoom
-            self.grid_canvas.pan_offset = original_pan
-            self.grid_canvas._update_canvas_size_hint()
-            self.grid_canvas.update()
+        canvas = self.grid_canvas
+        job = RenderGridImageJob(canvas.grid_data.indices, snapshot_palette(canvas.grid_data.entries), canvas.cell_size,
+                                 canvas.cell_layout, save_path=file_path, key="export-png")
+        self._submit_job(job, "Exporting PNG", lambda _image: self.statusBar().showMessage(f"Exported '{file_path}'", 3000),
+                         on_failed=lambda message: print(f"An unexpected error occurred during PNG export: {message}"))
+
+    def _submit_export(self, file_path: str, label: str, key: str, export):
+        """Exporta en segundo plano sobre una instantánea del diseño: export(ruta, rejilla, tramos, job)."""
+        grid = self.grid_canvas.grid_data.snapshot(); run_cache = self.grid_canvas.row_runs.snapshot(grid)
+        job = ExportFileJob(file_path, lambda path, job: export(path, grid, run_cache, job), key=key)
+        self._submit_job(job, label, lambda path: self.statusBar().showMessage(f"Exported '{path}'", 3000),
+                         on_failed=lambda message: print(f"Error: {label} to '{file_path}' failed: {message}"))
+
+    def export_bead_chart(self):
+        """Exporta la lista de compra y el word chart (texto o CSV)."""
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "Export Bead List & Word Chart", "", "Text Files (*.txt);;CSV Files (*.csv)")
+        if not file_path: return
+        if not file_path.lower().endswith((".txt", ".csv")): file_path += ".csv" if "CSV" in selected_filter else ".txt"
+        from utils.bead_chart import export_bead_chart, chart_repeat
+        serpentine = self.grid_canvas.cell_layout.axis is not None
+        repeat = chart_repeat(self.grid_canvas.grid_data, serpentine)
+        if repeat != (self.grid_canvas.grid_width, self.grid_canvas.grid_height):
+            answer = QMessageBox.question(self, "Export Bead List & Word Chart", f"{self._describe_repeat()}.\nPrint a single repeat in the word chart?")
+            if answer != QMessageBox.StandardButton.Yes: repeat = None
+        else: repeat = None
+        palette = self.palette_widget.get_palette_data_with_metadata()
+        self._submit_export(file_path, "Exporting bead chart", "export-chart",
+                            lambda path, grid, run_cache, job: export_bead_chart(path, grid, run_cache, palette, serpentine=serpentine, repeat=repeat, job=job))
+
+    def export_pdf_chart(self):
+        """Exporta la carta de patrón paginada en PDF (vectorial o con páginas raster)."""
+        raster_filter = "PDF Chart, raster pages (*.pdf)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "Export PDF Chart", "", f"PDF Chart (*.pdf);;{raster_filter}")
+        if not file_path: return
+        if not file_path.lower().endswith(".pdf"): file_path += ".pdf"
+        from utils.pdf_chart import export_pdf_chart
+        palette, grid_type, raster = self.palette_widget.get_palette_data_with_metadata(), self.grid_canvas.grid_type, selected_filter == raster_filter
+        self._submit_export(file_path, "Exporting PDF chart", "export-pdf",
+                            lambda path, grid, _run_cache, job: export_pdf_chart(path, grid, palette, grid_type, raster=raster, job=job))
+
+    def export_as_svg(self):
+        """Exporta el diseño como SVG vectorial (tramos fusionados, escrito en streaming)."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export as SVG", "", "SVG Images (*.svg)")
+        if not file_path: return
+        if not file_path.lower().endswith(".svg"): file_path += ".svg"
+        from utils.svg_export import export_svg
+        grid_type, cell_size = self.grid_canvas.grid_type, self.grid_canvas.cell_size
+        self._submit_export(file_path, "Exporting SVG", "export-svg",
+                            lambda path, grid, run_cache, job: export_svg(path, grid, run_cache, grid_type, cell_size, job=job))
 
     # --- Métodos de Acciones y Controles (Sin cambios estructurales) ---
     def _create_actions(self):
@@ -294,8 +424,53 @@ class MainWindow(QMainWindow):
         self.cut_action = QAction("Cut", self); self.cut_action.setIcon(svg_to_qicon(ICON_CUT)); self.cut_action.setShortcut(QKeySequence.StandardKey.Cut); self.cut_action.setEnabled(False); self.cut_action.triggered.connect(self.grid_canvas.cut_selection); self.addAction(self.cut_action)
         self.copy_action = QAction("Copy", self); self.copy_action.setIcon(svg_to_qicon(ICON_COPY)); self.copy_action.setShortcut(QKeySequence.StandardKey.Copy); self.copy_action.setEnabled(False); self.copy_action.triggered.connect(self.grid_canvas.copy_selection); self.addAction(self.copy_action)
         self.paste_action = QAction("Paste", self); self.paste_action.setIcon(svg_to_qicon(ICON_PASTE)); self.paste_action.setShortcut(QKeySequence.StandardKey.Paste); self.paste_action.setEnabled(False); self.paste_action.triggered.connect(self.grid_canvas.paste_selection); self.addAction(self.paste_action)
+        self.tile_action = QAction("Tile Clipboard...", self); self.tile_action.setShortcut(QKeySequence("Ctrl+Shift+V")); self.tile_action.setEnabled(False); self.tile_action.triggered.connect(self.tile_clipboard); self.addAction(self.tile_action)
         self.delete_action = QAction("Delete", self); self.delete_action.setIcon(svg_to_qicon(ICON_CLEAR, color="#f8d7da")); self.delete_action.setShortcut(QKeySequence.StandardKey.Delete); self.delete_action.setEnabled(False); self.delete_action.triggered.connect(self.grid_canvas.delete_selection); self.addAction(self.delete_action)
+        # Transformaciones de la selección (bloque flotante hasta Enter o cambiar de selección)
+        self.flip_h_action = QAction("Flip Horizontal", self); self.flip_h_action.setShortcut(QKeySequence("Shift+H")); self.flip_h_action.triggered.connect(lambda: self.grid_canvas.flip_selection(horizontal=True))
+        self.flip_v_action = QAction("Flip Vertical", self); self.flip_v_action.setShortcut(QKeySequence("Shift+V")); self.flip_v_action.triggered.connect(lambda: self.grid_canvas.flip_selection(horizontal=False))
+        self.rotate_cw_action = QAction("Rotate 90° Clockwise", self); self.rotate_cw_action.setShortcut(QKeySequence("Ctrl+R")); self.rotate_cw_action.triggered.connect(lambda: self.grid_canvas.rotate_selection(clockwise=True))
+        self.rotate_ccw_action = QAction("Rotate 90° Counterclockwise", self); self.rotate_ccw_action.setShortcut(QKeySequence("Ctrl+Shift+R")); self.rotate_ccw_action.triggered.connect(lambda: self.grid_canvas.rotate_selection(clockwise=False))
+        self.scale_action = QAction("Scale...", self); self.scale_action.triggered.connect(self._on_scale_selection)
+        self.apply_transform_action = QAction("Apply", self); self.apply_transform_action.triggered.connect(self.grid_canvas.commit_floating)
+        self.transform_actions = [self.flip_h_action, self.flip_v_action, self.rotate_cw_action, self.rotate_ccw_action, self.scale_action, self.apply_transform_action]
+        transform_menu = QMenu(self)
+        for action in self.transform_actions:
+            if action is self.apply_transform_action: transform_menu.addSeparator()
+            action.setEnabled(False); transform_menu.addAction(action); self.addAction(action)
+        self.btn_transform.setMenu(transform_menu)
+        # Reasignación global de colores (un único comando por operación)
+        colors_menu = QMenu(self)
+        self.replace_color_action = colors_menu.addAction("Replace Color..."); self.replace_color_action.triggered.connect(lambda: self.remap_colors(swap=False))
+        self.swap_colors_action = colors_menu.addAction("Swap Colors..."); self.swap_colors_action.triggered.connect(lambda: self.remap_colors(swap=True))
+        self.merge_colors_action = colors_menu.addAction("Merge Similar Colors..."); self.merge_colors_action.triggered.connect(self.merge_similar_colors)
+        self.reduce_colors_action = colors_menu.addAction("Reduce to N Colors..."); self.reduce_colors_action.triggered.connect(self.reduce_colors)
+        colors_menu.addSeparator()
+        self.fill_selection_action = QAction("Fill Selection", self); self.fill_selection_action.setShortcut(QKeySequence("Alt+Backspace")); self.fill_selection_action.setEnabled(False); self.fill_selection_action.triggered.connect(self.grid_canvas.fill_selection); colors_menu.addAction(self.fill_selection_action); self.addAction(self.fill_selection_action)
+        self.btn_colors.setMenu(colors_menu)
+        # Búsqueda del motivo copiado (se resaltan las apariciones hasta limpiarlas)
+        find_menu = QMenu(self)
+        self.find_motif_action = QAction("Find Copied Motif", self); self.find_motif_action.setShortcut(QKeySequence.StandardKey.Find); self.find_motif_action.triggered.connect(lambda: self.find_motif(transforms=False))
+        self.find_motif_variants_action = QAction("Find Including Rotations and Mirrors", self); self.find_motif_variants_action.setShortcut(QKeySequence("Ctrl+Shift+F")); self.find_motif_variants_action.triggered.connect(lambda: self.find_motif(transforms=True))
+        self.replace_motif_action = QAction("Replace Matches with Selection", self); self.replace_motif_action.triggered.connect(self.replace_motif_matches)
+        self.clear_motif_action = QAction("Clear Matches", self); self.clear_motif_action.triggered.connect(self.grid_canvas.clear_motif_matches)
+        for action in (self.find_motif_action, self.find_motif_variants_action, self.replace_motif_action, self.clear_motif_action):
+            if action is self.replace_motif_action: find_menu.addSeparator()
+            action.setEnabled(action is self.clear_motif_action); find_menu.addAction(action); self.addAction(action)
+        self.btn_find.setMenu(find_menu)
+        # Diagnóstico de rendimiento (sin botones: solo atajos)
+        self.diagnostics_action = QAction("Diagnostics Overlay", self); self.diagnostics_action.setCheckable(True); self.diagnostics_action.setShortcut(QKeySequence("Ctrl+Shift+D")); self.diagnostics_action.toggled.connect(self.grid_canvas.set_diagnostics_enabled); self.addAction(self.diagnostics_action)
+        self.export_diagnostics_action = QAction("Export Diagnostics CSV", self); self.export_diagnostics_action.setShortcut(QKeySequence("Ctrl+Shift+L")); self.export_diagnostics_action.triggered.connect(self.export_diagnostics); self.addAction(self.export_diagnostics_action)
         
+    def export_diagnostics(self):
+        diagnostics = self.grid_canvas.diagnostics
+        if diagnostics is None: print("Warning: Diagnostics are disabled (Ctrl+Shift+D to enable)."); return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostics", "", "CSV Files (*.csv)")
+        if not file_path: return
+        if not file_path.lower().endswith(".csv"): file_path += ".csv"
+        try: diagnostics.export_csv(file_path)
+        except Exception as e: print(f"Error exporting diagnostics to '{file_path}': {e}")
+
     def update_undo_redo_buttons(self, can_undo: bool, can_redo: bool):
         self.btn_undo.setEnabled(can_undo); self.btn_redo.setEnabled(can_redo)
         self.undo_action.setEnabled(can_undo); self.redo_action.setEnabled(can_redo)
@@ -309,17 +484,122 @@ class MainWindow(QMainWindow):
         self.copy_action.setEnabled(has_selection)
         self.delete_action.setEnabled(has_selection)
         self.paste_action.setEnabled(has_clipboard and has_selection)
+        self.fill_selection_action.setEnabled(has_selection)
+        self.btn_find.setEnabled(has_clipboard); self.find_motif_action.setEnabled(has_clipboard); self.find_motif_variants_action.setEnabled(has_clipboard)
+        self.replace_motif_action.setEnabled(has_selection)
+        self.btn_tile.setEnabled(has_clipboard); self.tile_action.setEnabled(has_clipboard)
+        self.btn_transform.setEnabled(has_selection)
+        for action in self.transform_actions: action.setEnabled(has_selection)
+
+    def tile_clipboard(self):
+        canvas = self.grid_canvas
+        if canvas.clipboard_data is None: return
+        motif_height, motif_width = canvas.clipboard_data.shape
+        target = f"the {canvas.selection_rect.width()}x{canvas.selection_rect.height()} selection" if canvas.selection_rect else "the whole grid"
+        dialog = TileStampDialog(motif_width, motif_height, target, self)
+        if dialog.exec(): canvas.tile_clipboard(**dialog.options())
+
+    def remap_colors(self, swap: bool = False):
+        palette = [entry for entry in self.palette_widget.colors[1:] if entry and entry.finish != "Eraser"]
+        dialog = ColorRemapDialog(self._used_colors(self.grid_canvas.grid_data.usage_by_hex()), palette, swap=swap, parent=self)
+        if not dialog.exec(): return
+        source, target = dialog.colors()
+        if swap and target is not None: self.grid_canvas.swap_colors(source, target)
+        else: self.grid_canvas.replace_color(source.color.name(), target)
+
+    def merge_similar_colors(self):
+        threshold, ok = QInputDialog.getDouble(self, "Merge Similar Colors", "Merge colors closer than ΔE (CIEDE2000):", 2.0, 0.1, 50.0, 1)
+        if not ok: return
+        merged = self.grid_canvas.merge_similar_colors(threshold)
+        self.statusBar().showMessage(f"Merged {merged} color(s)" if merged else "No colors within the threshold", 3000)
+
+    def reduce_colors(self):
+        used_count = len(self.grid_canvas.grid_data.usage_by_hex())
+        dialog = ReduceColorsDialog(used_count, self)
+        if not dialog.exec(): return
+        count, snap = dialog.options()
+        catalog = None
+        if snap:
+            from utils.miyuki_catalog import MIYUKI_CATALOG
+            catalog = [BeadColorEntry(QColor(data["hex"]), finish=data["finish"], code=code, name=data["name"]) for code, data in MIYUKI_CATALOG.items()]
+        remaining = self.grid_canvas.reduce_colors(count, catalog)
+        self.statusBar().showMessage(f"Design now uses {remaining} color(s)", 3000)
+
+    def find_motif(self, transforms: bool = False):
+        found = self.grid_canvas.find_motif(transforms)
+        self.statusBar().showMessage(f"Found {found} occurrence(s) of the copied motif" if found else "The copied motif does not appear in the design", 3000)
+
+    def replace_motif_matches(self):
+        replaced = self.grid_canvas.replace_motif_matches()
+        if replaced: self.statusBar().showMessage(f"Replaced {replaced} occurrence(s)", 3000)
+
+    def _on_scale_selection(self):
+        percent, ok = QInputDialog.getInt(self, "Scale Selection", "Scale (%):", 200, MIN_SCALE_PERCENT, MAX_SCALE_PERCENT)
+        if ok: self.grid_canvas.scale_selection(percent)
 
     def _on_paint_tool_changed(self, button: QPushButton, checked: bool):
         if not checked: return 
-        self.btn_tool_pencil.setIcon(svg_to_qicon(ICON_PENCIL, ICON_COLOR_INACTIVE))
-        self.btn_tool_fill.setIcon(svg_to_qicon(ICON_FILL_TOOL, ICON_COLOR_INACTIVE))
-        self.btn_tool_select.setIcon(svg_to_qicon(ICON_SELECT_TOOL, ICON_COLOR_INACTIVE))
+        tools = [("pencil", ICON_PENCIL), ("fill", ICON_FILL_TOOL), ("select", ICON_SELECT_TOOL), # Por id de botón
+                 ("line", ICON_LINE_TOOL), ("rectangle", ICON_RECTANGLE_TOOL), ("ellipse", ICON_ELLIPSE_TOOL), ("polygon", ICON_POLYGON_TOOL), ("wand", ICON_WAND_TOOL)]
+        for tool_id, (_tool, icon) in enumerate(tools): self.paint_tool_group.button(tool_id).setIcon(svg_to_qicon(icon, ICON_COLOR_INACTIVE))
         tool_id = self.paint_tool_group.id(button)
-        if tool_id == 0: self.grid_canvas.set_current_tool("pencil"); button.setIcon(svg_to_qicon(ICON_PENCIL, ICON_COLOR_ACTIVE_TOOL))
-        elif tool_id == 1: self.grid_canvas.set_current_tool("fill"); button.setIcon(svg_to_qicon(ICON_FILL_TOOL, ICON_COLOR_ACTIVE_TOOL))
-        elif tool_id == 2: self.grid_canvas.set_current_tool("select"); button.setIcon(svg_to_qicon(ICON_SELECT_TOOL, ICON_COLOR_ACTIVE_TOOL))
+        if 0 <= tool_id < len(tools):
+            tool, icon = tools[tool_id]
+            self.grid_canvas.set_current_tool(tool); button.setIcon(svg_to_qicon(icon, ICON_COLOR_ACTIVE_TOOL))
             
+    def _create_symmetry_menu(self) -> QMenu:
+        """Menú de rotación (orden N), repetición cada K columnas y continuidad en la costura."""
+        menu = QMenu(self)
+        rotation_menu = menu.addMenu("Rotation"); self.rotation_action_group = QActionGroup(self)
+        for order in ROTATION_ORDERS:
+            action = QAction("Off" if order == 1 else f"{order}-fold", self); action.setCheckable(True); action.setChecked(order == 1); action.setData(order)
+            self.rotation_action_group.addAction(action); rotation_menu.addAction(action)
+        self.rotation_action_group.triggered.connect(lambda action: self._set_symmetry(rotation=action.data()))
+        self.repeat_action = QAction("Repeat Every K Columns...", self); self.repeat_action.setCheckable(True); self.repeat_action.triggered.connect(self._on_repeat_triggered); menu.addAction(self.repeat_action)
+        self.repeat_detected_action = QAction("Repeat Every Detected Period", self); self.repeat_detected_action.triggered.connect(self._on_repeat_detected); menu.addAction(self.repeat_detected_action)
+        self.wrap_action = QAction("Wrap Around Seam (Tubular)", self); self.wrap_action.setCheckable(True); self.wrap_action.toggled.connect(lambda checked: self._set_symmetry(wrap=checked)); menu.addAction(self.wrap_action)
+        menu.addSeparator()
+        self.detect_repeat_action = QAction("Detect Repeat Period", self); self.detect_repeat_action.triggered.connect(self.report_repeat_period); menu.addAction(self.detect_repeat_action)
+        self.save_repeat_action = QAction("Save Single Repeat...", self); self.save_repeat_action.setToolTip("Save only one repeat period (older versions cannot expand it)"); self.save_repeat_action.triggered.connect(lambda: self.save_design(compact=True)); menu.addAction(self.save_repeat_action)
+        return menu
+
+    def _describe_repeat(self) -> str:
+        canvas = self.grid_canvas; columns, rows = canvas.repeat_periods()
+        parts = [f"every {columns} columns ({canvas.grid_width / columns:.1f} repeats)" if columns < canvas.grid_width else "",
+                 f"every {rows} rows ({canvas.grid_height / rows:.1f} repeats)" if rows < canvas.grid_height else ""]
+        parts = [part for part in parts if part]
+        return "The design repeats " + " and ".join(parts) if parts else "The design does not repeat"
+
+    def report_repeat_period(self):
+        self.statusBar().showMessage(self._describe_repeat(), 5000)
+
+    def _on_repeat_detected(self):
+        """Fija la repetición de la simetría al periodo de columnas detectado."""
+        columns, _rows = self.grid_canvas.repeat_periods()
+        if columns >= self.grid_canvas.grid_width: self.statusBar().showMessage("No column repeat detected", 3000); return
+        self._set_symmetry(repeat_columns=columns)
+        self.statusBar().showMessage(f"Repeating every {columns} columns", 3000)
+
+    def _on_repeat_triggered(self, checked: bool):
+        if not checked: self._set_symmetry(repeat_columns=0); return
+        current = self.grid_canvas.symmetry.repeat_columns or max(1, self.grid_canvas.grid_width // 4)
+        columns, ok = QInputDialog.getInt(self, "Repeat Every K Columns", "Columns per repeat:", current, 1, max(1, self.grid_canvas.grid_width - 1))
+        self._set_symmetry(repeat_columns=columns if ok else 0)
+
+    def _set_symmetry(self, rotation: int | None = None, repeat_columns: int | None = None, wrap: bool | None = None):
+        """Aplica opciones de simetría al lienzo y sincroniza el menú."""
+        symmetry = self.grid_canvas.symmetry
+        if rotation is not None: symmetry.rotation = rotation
+        if repeat_columns is not None: symmetry.repeat_columns = repeat_columns
+        if wrap is not None: symmetry.wrap = wrap
+        for action in self.rotation_action_group.actions(): action.setChecked(action.data() == symmetry.rotation)
+        self.repeat_action.setChecked(symmetry.repeat_columns > 0)
+        self.repeat_action.setText(f"Repeat Every {symmetry.repeat_columns} Columns" if symmetry.repeat_columns else "Repeat Every K Columns...")
+        self.wrap_action.blockSignals(True); self.wrap_action.setChecked(symmetry.wrap); self.wrap_action.blockSignals(False)
+        active = symmetry.rotation > 1 or symmetry.repeat_columns > 0 or symmetry.wrap
+        self.btn_tool_sym_more.setText("Symmetry (on)" if active else "Symmetry")
+        self.grid_canvas.update()
+
     def _on_symmetry_v_toggled(self, checked: bool):
         self.grid_canvas.mirror_mode_vertical = checked
         color = ICON_COLOR_ACTIVE_SYM if checked else ICON_COLOR_INACTIVE 
@@ -342,7 +622,22 @@ class MainWindow(QMainWindow):
             if size == current_size and name != "Custom": preset_match = name; break
         if self.combo_presets.currentText() != preset_match:
              self.combo_presets.blockSignals(True); self.combo_presets.setCurrentText(preset_match); self.combo_presets.blockSignals(False)
-        self.grid_canvas.set_cell_size(current_cell_size); self.grid_canvas.set_grid_type(current_grid_type); self.grid_canvas.set_grid_size(w, h) 
+        self.grid_canvas.set_cell_size(current_cell_size); self.grid_canvas.set_grid_type(current_grid_type)
+        if (w, h) != (self.grid_canvas.grid_width, self.grid_canvas.grid_height): self._resize_timer.start()
+
+    def _apply_pending_resize(self):
+        """Aplica el tamaño de los spinboxes (ya estable) conservando el diseño."""
+        anchor = RESIZE_ANCHORS.get(self.combo_resize_anchor.currentText(), (0, 0))
+        self.grid_canvas.resize_grid(self.spin_grid_width.value(), self.spin_grid_height.value(), anchor)
+
+    def _on_canvas_grid_size_changed(self, w: int, h: int):
+        """Deshacer/rehacer un redimensionado: los spinboxes y el preset siguen al lienzo."""
+        self._resize_timer.stop()
+        self.spin_grid_width.blockSignals(True); self.spin_grid_height.blockSignals(True)
+        self.spin_grid_width.setValue(w); self.spin_grid_height.setValue(h)
+        self.spin_grid_width.blockSignals(False); self.spin_grid_height.blockSignals(False)
+        preset_match = next((name for name, size in PRESET_SIZES.items() if size == (w, h) and name != "Custom"), "Custom")
+        self.combo_presets.blockSignals(True); self.combo_presets.setCurrentText(preset_match); self.combo_presets.blockSignals(False)
 
     def mark_custom_preset(self):
          sender = self.sender()
@@ -359,13 +654,21 @@ class MainWindow(QMainWindow):
         self.update_grid_size_from_controls() 
 
     def show_preview(self):
-        self.grid_canvas.update(); QApplication.processEvents() 
-        pixmap = self.grid_canvas.grab() 
-        if pixmap.isNull(): print("Error: Failed to grab canvas pixmap for preview."); return
+        canvas = self.grid_canvas
+        cell_size = min(canvas.cell_size, max(2, 2048 // max(canvas.grid_width, canvas.grid_height, 1))) # Tamaño reducido para grandes diseños
+        job = RenderGridImageJob(canvas.grid_data.indices, snapshot_palette(canvas.grid_data.entries), cell_size,
+                                 canvas.cell_layout, key="preview")
+        self._submit_job(job, "Rendering preview", self._show_preview_image)
+
+    def _show_preview_image(self, image: QImage):
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.isNull(): print("Error: Failed to render pixmap for preview."); return
+        from widgets.preview_dialog import PreviewDialog
         dialog = PreviewDialog(pixmap, self); dialog.exec() 
 
-    def save_design(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Design", "", "Design Files (*.json)")
+    def save_design(self, compact: bool = False):
+        """Guarda el diseño completo; con 'compact' (Save Single Repeat) solo un periodo de repetición."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Single Repeat" if compact else "Save Design", "", "Design Files (*.json)")
         if not file_path: return 
         if not file_path.lower().endswith(".json"): file_path += ".json"
         
@@ -376,36 +679,41 @@ class MainWindow(QMainWindow):
             "cell_size": self.grid_canvas.cell_size, "grid_type": self.grid_canvas.grid_type,
             "mirror_mode_horizontal": self.btn_tool_sym_h.isChecked(), 
             "mirror_mode_vertical": self.btn_tool_sym_v.isChecked(),
+            "symmetry": self.grid_canvas.symmetry.to_dict(),
             "current_tool_id": self.paint_tool_group.checkedId(), 
-            "grid_data": self.grid_canvas.get_grid_data() 
+            "active_layer": self.grid_canvas.grid_data.layer_position(self.grid_canvas.grid_data.active_layer),
         }
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f: json.dump(design_data, f, indent=2) 
-        except Exception as e: print(f"Error saving file '{file_path}': {e}")
+        job = SaveDesignJob(file_path, design_data, self.grid_canvas.grid_data.indices, self.grid_canvas.get_hex_table(), self.grid_canvas.get_layer_data(), compact=compact)
+        self._submit_job(job, "Saving design", lambda path: self.statusBar().showMessage(f"Saved '{path}'", 3000),
+                         on_failed=lambda message: print(f"Error saving file '{file_path}': {message}"))
 
     def load_design(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Design", "", "Design Files (*.json)")
         if not file_path: return 
+        self._submit_job(LoadDesignJob(file_path), "Loading design",
+                         lambda result: self._apply_loaded_design(file_path, *result),
+                         on_failed=lambda message: print(f"Error: {message}"))
+
+    def _apply_loaded_design(self, file_path: str, design_data: dict, packed: tuple | None):
+        """Instala en la GUI un diseño decodificado por LoadDesignJob."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f: design_data = json.load(f)
-            
             loaded_palette_data = design_data.get("palette", [])
             self.palette_widget.load_palette_entries(loaded_palette_data) 
+            self._usage_refresh_timer.start()
             
-            loaded_grid_type = design_data.get("grid_type", "Square"); self.combo_grid_type.blockSignals(True)
-            self.combo_grid_type.setCurrentText(loaded_grid_type); self.combo_grid_type.blockSignals(False)
-            self.grid_canvas.set_grid_type(loaded_grid_type) 
+            self.grid_canvas.set_grid_type(design_data.get("grid_type", "Square")) # Traduce nombres antiguos
+            self.combo_grid_type.blockSignals(True)
+            self.combo_grid_type.setCurrentText(self.grid_canvas.grid_type); self.combo_grid_type.blockSignals(False)
             loaded_cell_size = design_data.get("cell_size", 12); self.spin_cell_size.setValue(loaded_cell_size)
             self.grid_canvas.set_cell_size(loaded_cell_size) 
-            grid_data = design_data.get("grid_data", [])
             loaded_successfully = False
-            if grid_data:
+            if packed is not None:
                 saved_w = design_data.get("grid_size", {}).get("width", self.grid_canvas.grid_width)
                 saved_h = design_data.get("grid_size", {}).get("height", self.grid_canvas.grid_height)
                 self.spin_grid_width.blockSignals(True); self.spin_grid_height.blockSignals(True)
                 self.spin_grid_width.setValue(saved_w); self.spin_grid_height.setValue(saved_h)
                 self.spin_grid_height.blockSignals(False); self.spin_grid_width.blockSignals(False)
-                loaded_successfully = self.grid_canvas.load_grid_data(grid_data) 
+                loaded_successfully = self.grid_canvas.load_packed_grid(*packed, active_layer=int(design_data.get("active_layer", 0))) 
             else: 
                 saved_w = design_data.get("grid_size", {}).get("width", self.grid_canvas.grid_width)
                 saved_h = design_data.get("grid_size", {}).get("height", self.grid_canvas.grid_height)
@@ -423,6 +731,7 @@ class MainWindow(QMainWindow):
             mirror_v_state = design_data.get("mirror_mode_vertical", False)
             self.btn_tool_sym_h.setChecked(mirror_h_state)
             self.btn_tool_sym_v.setChecked(mirror_v_state)
+            self.grid_canvas.symmetry.load_dict(design_data.get("symmetry", {})); self._set_symmetry()
             
             tool_id = design_data.get("current_tool_id", 0) 
             button_to_check = self.paint_tool_group.button(tool_id)
@@ -432,6 +741,4 @@ class MainWindow(QMainWindow):
                 self.btn_tool_pencil.setChecked(True)
                 
             self.grid_canvas._update_canvas_size_hint()
-        except FileNotFoundError: print(f"Error: File not found '{file_path}'")
-        except json.JSONDecodeError: print(f"Error: Could not decode JSON from '{file_path}'")
         except Exception as e: print(f"An unexpected error occurred while loading file '{file_path}': {e}")
\ No newline at end of file
@@ -1,5 +1,6 @@
 # models.py
 
+import numpy as np
 from PyQt6.QtGui import QColor
 
 class BeadColorEntry:
@@ -32,4 +33,383 @@ class BeadColorEntry:
         # Palabras clave comunes para el brillo en Miyuki Delica
         return any(f.lower() in self.finish.lower() for f in ["metallic", "luster", "galvanized", "plated", "rainbow", "ab"])
 
-# --- End of BeadColorEntry class ---
\ No newline at end of file
+# --- End of BeadColorEntry class ---
+
+class BeadUsageStats:
+    """
+    Conteo de cuentas por índice de entrada de la cuadrícula empaquetada.
+    
+    Se recalcula por completo solo al cargar (un único histograma vectorizado);
+    después se mantiene por deltas con las celdas que cada comando modifica.
+    """
+    def __init__(self):
+        self.counts: np.ndarray = np.zeros(1, dtype=np.int64)
+
+    def _ensure_size(self, size: int):
+        if size > len(self.counts):
+            grown = np.zeros(size, dtype=np.int64)
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+
+    def recount(self, indices: np.ndarray, table_size: int):
+        """Recuento completo: un solo np.bincount sobre la matriz de índices."""
+        self.counts = np.bincount(indices.ravel(), minlength=max(table_size, 1)).astype(np.int64)
+
+    def apply_delta(self, old_indices: np.ndarray, new_indices: np.ndarray):
+        """Ajusta los conteos solo para las celdas cambiadas (old -> new)."""
+        if old_indices.size == 0:
+            return
+        size = int(max(old_indices.max(), new_indices.max())) + 1
+        self._ensure_size(size)
+        n = len(self.counts)
+        self.counts += np.bincount(new_indices, minlength=n) - np.bincount(old_indices, minlength=n)
+
+    def count_for(self, index: int) -> int:
+        return int(self.counts[index]) if 0 <= index < len(self.counts) else 0
+
+
+class GridLayer:
+    """
+    Capa del diseño (fondo, motivo, borde...): su propia matriz de índices
+    (mismo formato y tabla de entradas que BeadGrid) con visibilidad y
+    bloqueo. El índice 0 es transparente: deja ver las capas de debajo.
+    """
+    def __init__(self, name: str, indices: np.ndarray, visible: bool = True, locked: bool = False):
+        self.name: str = name
+        self.indices: np.ndarray = indices
+        self.visible: bool = visible
+        self.locked: bool = locked
+
+    def __repr__(self):
+        return f"GridLayer('{self.name}', visible={self.visible}, locked={self.locked})"
+
+# --- End of GridLayer class ---
+
+
+class BeadGrid:
+    """
+    Cuadrícula empaquetada: una matriz de índices (uint16, fila x columna) más
+    una tabla de entradas. El índice 0 es siempre la celda vacía (None).
+    
+    La tabla de entradas solo crece (las entradas se internan por valor: HEX,
+    acabado y código, así que recargar un diseño reutiliza sus índices), 
+    así que un índice sigue siendo válido aunque la cuadrícula cambie de tamaño.
+    
+    El diseño se edita por capas (GridLayer, de abajo a arriba); 'indices' es
+    el compuesto aplanado de las capas visibles (en cada celda gana la capa
+    no vacía más alta) y es lo que leen el render, las exportaciones, el
+    relleno y los conteos. Toda escritura pasa por write_cells/write_block
+    sobre una capa (por defecto la activa): el compuesto se recalcula solo en
+    las celdas tocadas y con él los conteos y la revisión de cada fila
+    (row_revision), que usan las cachés derivadas.
+    """
+    EMPTY = 0
+
+    def __init__(self, width: int, height: int):
+        self.entries: list[BeadColorEntry | None] = [None]
+        self._entry_lookup: dict[tuple, int] = {}
+        self.indices: np.ndarray = np.zeros((height, width), dtype=np.uint16)
+        self.layers: list[GridLayer] = [GridLayer("Background", np.zeros_like(self.indices))]
+        self.active_layer: GridLayer = self.layers[0]
+        self.usage = BeadUsageStats()
+        self._revision: int = 0
+        self.row_revision: np.ndarray = np.zeros(height, dtype=np.int64)
+
+    @property
+    def width(self) -> int:
+        return self.indices.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.indices.shape[0]
+
+    @property
+    def revision(self) -> int:
+        """Revisión global: crece con cada cambio del compuesto (sirve de clave para cachés)."""
+        return self._revision
+
+    # --- Tabla de entradas ---
+    def index_of(self, entry: BeadColorEntry | None) -> int:
+        """Devuelve (e interna si hace falta) el índice de una entrada."""
+        if entry is None:
+            return self.EMPTY
+        key = (entry.color.name(), entry.finish, entry.code)
+        index = self._entry_lookup.get(key)
+        if index is None:
+            index = len(self.entries)
+            if index > np.iinfo(self.indices.dtype).max:
+                raise ValueError("BeadGrid entry table is full.")
+            self.entries.append(entry)
+            self._entry_lookup[key] = index
+        return index
+
+    def get(self, x: int, y: int) -> BeadColorEntry | None:
+        return self.entries[self.indices[y, x]]
+
+    def _touch_rows(self, rows):
+        """Marca filas como modificadas (invalida las cachés por fila)."""
+        self._revision += 1
+        self.row_revision[rows] = self._revision
+
+    # --- Compuesto ---
+    def _compose(self, select) -> np.ndarray:
+        """Compuesto de las capas visibles sobre las celdas que 'select' extrae de cada matriz de capa."""
+        result = np.zeros_like(select(self.layers[0].indices))
+        for layer in self.layers:
+            if layer.visible:
+                values = select(layer.indices)
+                np.copyto(result, values, where=values != self.EMPTY)
+        return result
+
+    def _compose_cells(self, xs: np.ndarray, ys: np.ndarray):
+        """Recalcula el compuesto en un lote de celdas y propaga solo las que cambian."""
+        composite = self._compose(lambda indices: indices[ys, xs])
+        old = self.indices[ys, xs]
+        changed = old != composite
+        if changed.any():
+            self.indices[ys[changed], xs[changed]] = composite[changed]
+            self.usage.apply_delta(old[changed], composite[changed])
+            self._touch_rows(np.unique(ys[changed]))
+
+    def _compose_block(self, x0: int, y0: int, x1: int, y1: int):
+        """Recalcula el compuesto en un rectángulo (ya recortado a la cuadrícula)."""
+        composite = self._compose(lambda indices: indices[y0:y1, x0:x1])
+        target = self.indices[y0:y1, x0:x1]
+        changed = target != composite
+        if changed.any():
+            self.usage.apply_delta(target[changed], composite[changed])
+            target[changed] = composite[changed]
+            self._touch_rows(y0 + np.flatnonzero(changed.any(axis=1)))
+
+    def recomposite(self):
+        """Pasada vectorizada completa (cambios de visibilidad u orden de las capas)."""
+        self._compose_block(0, 0, self.width, self.height)
+
+    def read_composite_block(self, x: int, y: int, w: int, h: int, skip: GridLayer | None = None) -> np.ndarray:
+        """Como read_block pero del compuesto; con 'skip' se compone sin esa capa (lo que queda debajo al levantarla)."""
+        block = np.zeros((max(h, 0), max(w, 0)), dtype=self.indices.dtype)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        if x0 < x1 and y0 < y1:
+            for layer in self.layers:
+                if layer.visible and layer is not skip:
+                    values = layer.indices[y0:y1, x0:x1]
+                    np.copyto(block[y0 - y:y1 - y, x0 - x:x1 - x], values, where=values != self.EMPTY)
+        return block
+
+    # --- Escritura (mantiene los conteos por deltas) ---
+    def _layer(self, layer: GridLayer | None) -> GridLayer:
+        return self.active_layer if layer is None else layer
+
+    def _in_stack(self, layer: GridLayer) -> bool:
+        """Una capa eliminada puede seguir en el historial: se escribe en ella pero no afecta al compuesto."""
+        return any(layer is other for other in self.layers)
+
+    def write_cells(self, xs: np.ndarray, ys: np.ndarray, values: np.ndarray, layer: GridLayer | None = None) -> np.ndarray:
+        """
+        Escribe 'values' en las celdas (xs, ys) de una capa (por defecto la
+        activa). Devuelve la máscara de las celdas de la capa que cambiaron.
+        """
+        layer = self._layer(layer)
+        old = layer.indices[ys, xs]
+        changed = old != values
+        if changed.any():
+            layer.indices[ys[changed], xs[changed]] = values[changed]
+            if self._in_stack(layer): self._compose_cells(xs[changed], ys[changed])
+        return changed
+
+    def read_block(self, x: int, y: int, w: int, h: int, layer: GridLayer | None = None) -> np.ndarray:
+        """Extrae un bloque de una capa; las celdas fuera de la cuadrícula se devuelven vacías."""
+        source = self._layer(layer).indices
+        block = np.zeros((max(h, 0), max(w, 0)), dtype=source.dtype)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        if x0 < x1 and y0 < y1:
+            block[y0 - y:y1 - y, x0 - x:x1 - x] = source[y0:y1, x0:x1]
+        return block
+
+    def write_block(self, x: int, y: int, block: np.ndarray, layer: GridLayer | None = None) -> bool:
+        """Escribe un bloque recortado a los límites en una capa. Devuelve True si algo cambió."""
+        layer = self._layer(layer)
+        h, w = block.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return False
+        target = layer.indices[y0:y1, x0:x1]
+        source = block[y0 - y:y1 - y, x0 - x:x1 - x]
+        changed = target != source
+        if not changed.any():
+            return False
+        target[changed] = source[changed]
+        if self._in_stack(layer):
+            rows = np.flatnonzero(changed.any(axis=1)); columns = np.flatnonzero(changed.any(axis=0))
+            self._compose_block(x0 + columns[0], y0 + rows[0], x0 + columns[-1] + 1, y0 + rows[-1] + 1)
+        return True
+
+    # --- Capas ---
+    def layer_position(self, layer: GridLayer) -> int:
+        return next(i for i, other in enumerate(self.layers) if other is layer)
+
+    def add_layer(self, name: str, indices: np.ndarray | None = None) -> GridLayer:
+        """Añade una capa (vacía, o con una copia de 'indices') encima de la activa y la activa."""
+        layer = GridLayer(name, np.zeros_like(self.indices) if indices is None else indices.copy())
+        self.layers.insert(self.layer_position(self.active_layer) + 1, layer)
+        self.active_layer = layer
+        if indices is not None: self.recomposite()
+        return layer
+
+    def remove_layer(self, layer: GridLayer) -> bool:
+        """Quita una capa (siempre queda al menos una); la activa pasa a la de debajo."""
+        if len(self.layers) <= 1 or not self._in_stack(layer):
+            return False
+        position = self.layer_position(layer)
+        del self.layers[position]
+        if self.active_layer is layer: self.active_layer = self.layers[max(position - 1, 0)]
+        if layer.visible: self.recomposite()
+        return True
+
+    def move_layer(self, layer: GridLayer, offset: int) -> bool:
+        """Sube (offset > 0) o baja una capa en la pila."""
+        position = self.layer_position(layer)
+        target = min(max(position + offset, 0), len(self.layers) - 1)
+        if target == position:
+            return False
+        self.layers.insert(target, self.layers.pop(position))
+        if layer.visible: self.recomposite()
+        return True
+
+    def set_layer_visible(self, layer: GridLayer, visible: bool):
+        if layer.visible != visible:
+            layer.visible = visible
+            self.recomposite()
+
+    # --- Reasignación completa ---
+    def reset(self, width: int, height: int):
+        """Vacía la cuadrícula con un nuevo tamaño (conserva la tabla de entradas y las capas, vacías)."""
+        self.indices = np.zeros((height, width), dtype=np.uint16)
+        for layer in self.layers: layer.indices = np.zeros_like(self.indices)
+        self.usage.recount(self.indices, len(self.entries))
+        self.row_revision = np.zeros(height, dtype=np.int64); self._touch_rows(slice(None))
+
+    def resize(self, width: int, height: int, offset_x: int = 0, offset_y: int = 0):
+        """
+        Cambia el tamaño conservando el contenido: la esquina del diseño
+        anterior queda en (offset_x, offset_y) del nuevo (negativo recorta por
+        la izquierda/arriba). Lo que queda fuera se pierde y lo nuevo queda
+        vacío. Solo cambian las capas de la pila: una capa quitada vuelve por
+        el historial, y para entonces el tamaño ya es el suyo.
+        """
+        for layer in self.layers:
+            layer.indices = self.read_block(-offset_x, -offset_y, width, height, layer=layer)
+        self.indices = self._compose(lambda indices: indices)
+        self.usage.recount(self.indices, len(self.entries))
+        self.row_revision = np.zeros(height, dtype=np.int64); self._touch_rows(slice(None))
+
+    def load_indices(self, indices: np.ndarray):
+        """Sustituye la matriz completa (carga sin capas: una sola capa de fondo); único punto con recuento total."""
+        self.load_layers([GridLayer("Background", np.ascontiguousarray(indices, dtype=np.uint16).copy())])
+
+    def load_layers(self, layers: list[GridLayer], active_position: int = 0):
+        """Sustituye todas las capas (del mismo tamaño) y recompone de una vez."""
+        self.layers = layers
+        self.active_layer = layers[min(max(active_position, 0), len(layers) - 1)]
+        self.indices = self._compose(lambda indices: indices)
+        self.usage.recount(self.indices, len(self.entries))
+        self.row_revision = np.zeros(self.height, dtype=np.int64); self._touch_rows(slice(None))
+
+    # --- Estadísticas ---
+    def snapshot(self) -> "BeadGrid":
+        """
+        Copia independiente del compuesto (como una sola capa), de la tabla de
+        entradas (con copias de sus QColor), de los conteos y de las
+        revisiones por fila: se puede leer desde un hilo de trabajo mientras
+        se sigue editando el original.
+        """
+        copy = BeadGrid(self.width, self.height)
+        copy.entries = [None] + [BeadColorEntry(QColor(entry.color), entry.finish, entry.code, entry.name) for entry in self.entries[1:]]
+        copy._entry_lookup = dict(self._entry_lookup)
+        copy.indices = self.indices.copy()
+        copy.layers = [GridLayer("Composite", copy.indices.copy())]; copy.active_layer = copy.layers[0]
+        copy.usage.counts = self.usage.counts.copy()
+        copy.row_revision = self.row_revision.copy(); copy._revision = self._revision
+        return copy
+
+    def usage_by_hex(self) -> dict[str, int]:
+        """Conteo de cuentas agrupado por color HEX (la identidad de la paleta)."""
+        totals: dict[str, int] = {}
+        counts = self.usage.counts
+        for index in np.flatnonzero(counts[1:]) + 1:
+            entry = self.entries[index]
+            key = entry.color.name()
+            totals[key] = totals.get(key, 0) + int(counts[index])
+        return totals
+
+    def used_entries(self) -> list[tuple[BeadColorEntry, int]]:
+        """(entrada, conteo) de cada entrada presente en la cuadrícula."""
+        counts = self.usage.counts
+        return [(self.entries[i], int(counts[i])) for i in np.flatnonzero(counts[1:]) + 1]
+
+# --- End of BeadGrid class ---
+
+
+def pack_hex_grid(hex_grid: list, job=None) -> tuple[list[str], np.ndarray]:
+    """
+    Convierte una cuadrícula de códigos HEX (formato JSON) en (tabla HEX local,
+    matriz de índices). El índice 0 es vacío y la tabla[i - 1] es el HEX del índice i.
+    No toca ningún BeadGrid, así que puede ejecutarse en un hilo de trabajo.
+    """
+    height = len(hex_grid); width = 0 if height == 0 else (len(hex_grid[0]) if hex_grid[0] else 0)
+    indices = np.zeros((height, width), dtype=np.uint16)
+    hex_table: list[str] = []; local: dict[str, int] = {}
+    for y, row_data in enumerate(hex_grid):
+        if job is not None and y % 64 == 0: job.report_progress(y * 100 // max(height, 1))
+        if not isinstance(row_data, list): continue
+        for x, hex_color in enumerate(row_data[:width]):
+            if not isinstance(hex_color, str) or not hex_color.startswith('#'): continue
+            index = local.get(hex_color)
+            if index is None:
+                if not QColor(hex_color).isValid(): continue
+                hex_table.append(hex_color); index = local[hex_color] = len(hex_table)
+            indices[y, x] = index
+    return hex_table, indices
+
+
+def unpack_hex_grid(indices: np.ndarray, hex_by_index: list[str | None]) -> list[list[str | None]]:
+    """Inverso de pack_hex_grid: matriz de índices -> listas de HEX (o None)."""
+    return np.array(hex_by_index, dtype=object)[indices].tolist()
+
+
+class RowRunCache:
+    """
+    Codificación run-length (RLE) de cada fila de un BeadGrid, cacheada por fila.
+    
+    Una fila solo se vuelve a codificar cuando su revisión cambia, es decir,
+    cuando algún comando la tocó; el resto se sirve desde la caché.
+    """
+    def __init__(self, grid: BeadGrid):
+        self._grid = grid
+        self._runs: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._revisions: dict[int, int] = {}
+
+    def runs(self, y: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Devuelve (inicios, longitudes, índices) de los tramos de la fila y."""
+        revision = int(self._grid.row_revision[y])
+        if self._revisions.get(y) != revision:
+            row = self._grid.indices[y]
+            starts = np.concatenate(([0], np.flatnonzero(row[1:] != row[:-1]) + 1)) if row.size else np.zeros(0, dtype=np.intp)
+            lengths = np.diff(np.append(starts, row.size))
+            self._runs[y] = (starts, lengths, row[starts])
+            self._revisions[y] = revision
+        return self._runs[y]
+
+    def invalidate(self):
+        self._runs.clear(); self._revisions.clear()
+
+    def snapshot(self, grid: BeadGrid) -> "RowRunCache":
+        """Caché para una instantánea de la cuadrícula (BeadGrid.snapshot()): reutiliza los tramos ya codificados."""
+        copy = RowRunCache(grid)
+        copy._runs = dict(self._runs); copy._revisions = dict(self._revisions)
+        return copy
+
+# --- End of RowRunCache class ---
@@ -0,0 +1,33 @@
+# tests/conftest.py
+# Configuración común: Qt sin pantalla, raíz del repositorio en sys.path y
+# una QApplication compartida para las pruebas que crean el lienzo.
+
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+@pytest.fixture
+def canvas(qapp):
+    """Lienzo de 12 x 10 vacío, cuadrícula regular."""
+    from widgets.grid_canvas import GridCanvas
+    canvas = GridCanvas(); canvas.set_grid_type("Square"); canvas.set_grid_size(12, 10)
+    yield canvas
+    canvas.deleteLater()
+
+
+@pytest.fixture
+def entries(qapp):
+    from PyQt6.QtGui import QColor
+    from models import BeadColorEntry
+    return [BeadColorEntry(QColor(hex_color), code=f"C{n}") for n, hex_color in enumerate(["#e63946", "#f1faee", "#457b9d", "#1d3557", "#ffb703", "#e53a47"])]
@@ -0,0 +1,34 @@
+# tests/grid_state.py
+# Utilidades compartidas por las pruebas de comandos: instantánea completa de
+# las capas y del compuesto, y diseños aleatorios de varias capas.
+
+import numpy as np
+
+
+def snapshot(canvas) -> list:
+    grid = canvas.grid_data
+    return [(layer.name, layer.visible, layer.locked, layer.indices.copy()) for layer in grid.layers] + [grid.layer_position(grid.active_layer), grid.indices.copy()]
+
+
+def same_state(first, second) -> bool:
+    return len(first) == len(second) and all(
+        np.array_equal(a[3], b[3]) and a[:3] == b[:3] if isinstance(a, tuple) else np.array_equal(a, b) for a, b in zip(first, second))
+
+
+def fill_random(canvas, entries, rng, layers: int = 2):
+    """Varias capas con ruido de colores (y huecos) para que el compuesto mezcle capas."""
+    grid = canvas.grid_data
+    lookup = np.array([0] + [grid.index_of(entry) for entry in entries], dtype=np.uint16)
+    for n in range(layers):
+        if n: canvas.add_layer()
+        values = lookup[rng.integers(0, len(lookup), size=(canvas.grid_height, canvas.grid_width))]
+        values[rng.random(values.shape) < 0.4 * n] = 0
+        ys, xs = np.divmod(np.arange(values.size), canvas.grid_width)
+        grid.write_cells(xs, ys, values.ravel())
+    canvas._clear_history()
+
+
+def assert_round_trip(canvas, before, after):
+    canvas.undo(); assert same_state(snapshot(canvas), before)
+    canvas.redo(); assert same_state(snapshot(canvas), after)
+    canvas.undo(); assert same_state(snapshot(canvas), before)
@@ -0,0 +1,118 @@
+# tests/test_color_math.py
+# CIEDE2000 contra los pares de prueba publicados (Sharma, Wu y Dalal, 2005),
+# k-means ponderado contra la mejor partición por fuerza bruta, la fusión por
+# umbral y la reducción de colores de un diseño vacío.
+
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.color_math import hex_to_rgb, rgb_to_lab, ciede2000, merge_near_duplicates, weighted_kmeans
+
+# (Lab 1, Lab 2, ΔE00)
+SHARMA_PAIRS = [
+    ((50.0000, 2.6772, -79.7751), (50.0000, 0.0000, -82.7485), 2.0425),
+    ((50.0000, 3.1571, -77.2803), (50.0000, 0.0000, -82.7485), 2.8615),
+    ((50.0000, 2.8361, -74.0200), (50.0000, 0.0000, -82.7485), 3.4412),
+    ((50.0000, -1.3802, -84.2814), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, -1.1848, -84.8006), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, -0.9009, -85.5211), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, 0.0000, 0.0000), (50.0000, -1.0000, 2.0000), 2.3669),
+    ((50.0000, -1.0000, 2.0000), (50.0000, 0.0000, 0.0000), 2.3669),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0009), 7.1792),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0010), 7.1792),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0011), 7.2195),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0012), 7.2195),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0009, -2.4900), 4.8045),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0010, -2.4900), 4.8045),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0011, -2.4900), 4.7461),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 0.0000, -2.5000), 4.3065),
+    ((50.0000, 2.5000, 0.0000), (73.0000, 25.0000, -18.0000), 27.1492),
+    ((50.0000, 2.5000, 0.0000), (61.0000, -5.0000, 29.0000), 22.8977),
+    ((50.0000, 2.5000, 0.0000), (56.0000, -27.0000, -3.0000), 31.9030),
+    ((50.0000, 2.5000, 0.0000), (58.0000, 24.0000, 15.0000), 19.4535),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.1736, 0.5854), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.2972, 0.0000), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 1.8634, 0.5757), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.2592, 0.3350), 1.0000),
+    ((60.2574, -34.0099, 36.2677), (60.4626, -34.1751, 39.4387), 1.2644),
+    ((63.0109, -31.0961, -5.8663), (62.8187, -29.7946, -4.0864), 1.2630),
+    ((61.2901, 3.7196, -5.3901), (61.4292, 2.2480, -4.9620), 1.8731),
+    ((35.0831, -44.1164, 3.7933), (35.0232, -40.0716, 1.5901), 1.8645),
+    ((22.7233, 20.0904, -46.6940), (23.0331, 14.9730, -42.5619), 2.0373),
+    ((36.4612, 47.8580, 18.3852), (36.2715, 50.5065, 21.2231), 1.4146),
+    ((90.8027, -2.0831, 1.4410), (91.1528, -1.6435, 0.0447), 1.4441),
+    ((90.9257, -0.5406, -0.9208), (88.6381, -0.8985, -0.7239), 1.5381),
+    ((6.7747, -0.2908, -2.4247), (5.8714, -0.0985, -2.2286), 0.6377),
+    ((2.0776, 0.0795, -1.1350), (0.9033, -0.0636, -0.5514), 0.9082),
+]
+
+
+def test_ciede2000_reference_pairs():
+    lab1 = np.array([pair[0] for pair in SHARMA_PAIRS]); lab2 = np.array([pair[1] for pair in SHARMA_PAIRS])
+    expected = np.array([pair[2] for pair in SHARMA_PAIRS])
+    np.testing.assert_allclose(ciede2000(lab1, lab2), expected, atol=5e-5)
+    np.testing.assert_allclose(ciede2000(lab2, lab1), expected, atol=5e-5) # Simétrica
+
+
+def test_ciede2000_broadcasts_to_a_distance_matrix():
+    lab = np.array([pair[0] for pair in SHARMA_PAIRS[:6]])
+    matrix = ciede2000(lab[:, None, :], lab[None, :, :])
+    assert matrix.shape == (6, 6)
+    np.testing.assert_allclose(np.diag(matrix), 0.0, atol=1e-9)
+    np.testing.assert_allclose(matrix, [[ciede2000(a, b) for b in lab] for a in lab])
+
+
+def test_rgb_to_lab_reference_colors():
+    np.testing.assert_allclose(rgb_to_lab(hex_to_rgb(["#ffffff", "#000000"])), [[100.0, 0.0, 0.0], [0.0, 0.0, 0.0]], atol=1e-2)
+    np.testing.assert_allclose(rgb_to_lab(hex_to_rgb(["#ff0000"]))[0], [53.24, 80.09, 67.20], atol=2e-2)
+
+
+def weighted_sse(points, weights, labels) -> float:
+    total = 0.0
+    for label in set(labels):
+        members = np.asarray(labels) == label
+        center = np.average(points[members], axis=0, weights=weights[members])
+        total += float((weights[members] * ((points[members] - center) ** 2).sum(axis=1)).sum())
+    return total
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_weighted_kmeans_finds_the_best_partition_of_separated_clusters(seed):
+    rng = np.random.default_rng(seed)
+    k = 3; anchors = rng.uniform(-80, 80, size=(k, 3)) + np.array([[0, 0, 0], [200, 0, 0], [0, 200, 0]])
+    points = np.vstack([anchor + rng.normal(0, 3, size=(int(rng.integers(1, 4)), 3)) for anchor in anchors])
+    weights = rng.integers(1, 100, size=len(points)).astype(float)
+    centers, labels = weighted_kmeans(points, weights, k)
+    best = min(weighted_sse(points, weights, labeling) for labeling in itertools.product(range(k), repeat=len(points)) if len(set(labeling)) == k)
+    assert weighted_sse(points, weights, labels.tolist()) == pytest.approx(best)
+    for label in range(k): # Cada centro es la media ponderada de su grupo
+        np.testing.assert_allclose(centers[label], np.average(points[labels == label], axis=0, weights=weights[labels == label]))
+
+
+def test_weighted_kmeans_edge_cases():
+    centers, labels = weighted_kmeans(np.empty((0, 3)), np.empty(0), 4)
+    assert centers.shape == (0, 3) and labels.shape == (0,)
+    centers, labels = weighted_kmeans(np.eye(3), np.ones(3), 10) # k nunca supera el número de puntos
+    assert centers.shape == (3, 3) and sorted(labels.tolist()) == [0, 1, 2]
+
+
+def test_merge_near_duplicates_matches_greedy_reference():
+    rng = np.random.default_rng(7)
+    lab = np.vstack([rng.uniform([0, -60, -60], [100, 60, 60], size=(6, 3))] * 2) + rng.normal(0, 0.8, size=(12, 3))
+    counts = rng.integers(1, 50, size=12); threshold = 3.0
+    representative = merge_near_duplicates(lab, counts, threshold)
+    chosen = []; expected = list(range(len(lab)))
+    for i in sorted(range(len(lab)), key=lambda i: -counts[i]):
+        near = [c for c in chosen if ciede2000(lab[i], lab[c]) <= threshold]
+        if near: expected[i] = min(near, key=lambda c: ciede2000(lab[i], lab[c]))
+        else: chosen.append(i)
+    assert representative.tolist() == expected
+
+
+def test_reduce_colors_on_empty_design(canvas, entries):
+    assert canvas.reduce_colors(3, catalog=entries) == 0
+    assert canvas.reduce_colors(3) == 0
+    assert canvas.merge_similar_colors(10.0) == 0
+    assert canvas.undo_stack == []
@@ -0,0 +1,26 @@
+# tests/test_grid_render.py
+# Imagen de nivel de detalle (BeadImageCache): un color nuevo no reasigna la
+# imagen y el resultado coincide con una caché nueva.
+
+import numpy as np
+import pytest
+from PyQt6.QtGui import QColor
+
+from models import BeadGrid, BeadColorEntry
+from utils.geometry import get_layout
+from utils.grid_render import BeadImageCache, snapshot_palette
+
+
+@pytest.mark.parametrize("grid_type", ["Square", "Peyote", "Brick"])
+def test_new_color_keeps_image(qapp, grid_type):
+    layout = get_layout(grid_type); grid = BeadGrid(40, 30); cache = BeadImageCache()
+    first = grid.index_of(BeadColorEntry(QColor("#e63946")))
+    grid.write_cells(np.arange(40), np.zeros(40, dtype=np.intp), np.full(40, first, dtype=np.uint16))
+    cache.update(grid, snapshot_palette(grid.entries), layout); image = cache.image
+    for n in range(1, 6):
+        index = grid.index_of(BeadColorEntry(QColor.fromRgb(40 * n, 255 - 30 * n, 7 * n)))
+        grid.write_cells(np.array([n, 2 * n]), np.array([n, 3 * n]), np.full(2, index, dtype=np.uint16))
+        cache.update(grid, snapshot_palette(grid.entries), layout)
+    fresh = BeadImageCache(); fresh.update(grid, snapshot_palette(grid.entries), layout)
+    assert cache.image is image
+    assert np.array_equal(cache._pixels, fresh._pixels)
@@ -0,0 +1,30 @@
+# tests/test_layers.py
+# Deshacer/rehacer de los cambios de la pila de capas (LayerCommand).
+
+import numpy as np
+
+from grid_state import snapshot, same_state, fill_random
+
+
+def test_layer_commands_round_trip(canvas, entries):
+    fill_random(canvas, entries, np.random.default_rng(3))
+    states = [snapshot(canvas)]
+    for action in (lambda: canvas.add_layer(duplicate=True), lambda: canvas.move_layer(-1), lambda: canvas.set_layer_visible(0, False),
+                   lambda: canvas.set_layer_locked(1, True), lambda: canvas.rename_layer(2, "Renamed"), canvas.remove_layer, canvas.remove_layer):
+        action(); states.append(snapshot(canvas))
+    assert len(canvas.undo_stack) == len(states) - 1
+    for state in reversed(states[:-1]): canvas.undo(); assert same_state(snapshot(canvas), state)
+    for state in states[1:]: canvas.redo(); assert same_state(snapshot(canvas), state)
+
+
+def test_removed_layer_survives_resize_and_undo(canvas, entries):
+    fill_random(canvas, entries, np.random.default_rng(5))
+    before = snapshot(canvas)
+    canvas.remove_layer(); canvas.resize_grid(7, 4, (1, 1)); canvas.add_layer()
+    canvas.undo(); canvas.undo(); canvas.undo()
+    assert same_state(snapshot(canvas), before)
+
+
+def test_no_op_layer_changes_stay_out_of_history(canvas):
+    canvas.remove_layer(); canvas.move_layer(1); canvas.set_layer_visible(0, True); canvas.rename_layer(0, canvas.grid_data.layers[0].name)
+    assert canvas.undo_stack == []
@@ -0,0 +1,43 @@
+# tests/test_motif_search.py
+# Búsqueda de motivos por hash rodante 2D contra la comparación ventana a ventana.
+
+import numpy as np
+import pytest
+
+from utils.motif_search import transform_block, motif_variants, find_motif
+
+
+def brute_find(indices: np.ndarray, variants) -> set[tuple[int, int, int]]:
+    height, width = indices.shape
+    return {(x, y, transform) for transform, block in variants for y in range(height - block.shape[0] + 1)
+            for x in range(width - block.shape[1] + 1) if np.array_equal(indices[y:y + block.shape[0], x:x + block.shape[1]], block)}
+
+
+def test_transforms_form_the_square_group():
+    block = np.arange(6).reshape(2, 3)
+    assert np.array_equal(transform_block(block, 1), np.rot90(block, -1)) # Giro horario
+    assert np.array_equal(transform_block(block, 4), block[:, ::-1])
+    assert len({transform_block(block, t).tobytes() + bytes(transform_block(block, t).shape) for t in range(8)}) == 8
+    assert [t for t, _v in motif_variants(np.ones((2, 2), dtype=int), transforms=True)] == [0] # Simétrico: una sola variante
+
+
+@pytest.mark.parametrize("seed", range(25))
+@pytest.mark.parametrize("transforms", [False, True])
+def test_find_motif_matches_brute_force(seed, transforms):
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, 3, size=(rng.integers(4, 20), rng.integers(4, 20))).astype(np.uint16)
+    motif = rng.integers(0, 3, size=(rng.integers(1, 4), rng.integers(1, 4))).astype(np.uint16)
+    for _ in range(3): # Planta algunas apariciones transformadas
+        block = transform_block(motif, int(rng.integers(0, 8)))
+        if block.shape[0] <= indices.shape[0] and block.shape[1] <= indices.shape[1]:
+            y, x = rng.integers(0, indices.shape[0] - block.shape[0] + 1), rng.integers(0, indices.shape[1] - block.shape[1] + 1)
+            indices[y:y + block.shape[0], x:x + block.shape[1]] = block
+    variants = motif_variants(motif, transforms)
+    found = find_motif(indices, variants)
+    assert found.shape[1] == 3
+    assert {tuple(row) for row in found.tolist()} == brute_find(indices, variants)
+    assert len(found) == len(brute_find(indices, variants)) # Sin duplicados
+
+
+def test_motif_larger_than_grid():
+    assert find_motif(np.zeros((2, 2), dtype=np.uint16), motif_variants(np.ones((3, 1), dtype=np.uint16))).shape == (0, 3)
@@ -0,0 +1,23 @@
+# tests/test_pdf_chart.py
+# Símbolos de la carta PDF: únicos por etiqueta aunque haya más colores que
+# caracteres en CHART_SYMBOLS.
+
+import numpy as np
+from PyQt6.QtGui import QColor
+
+from models import BeadGrid, BeadColorEntry
+from utils.bead_chart import build_label_table
+from utils.pdf_chart import CHART_SYMBOLS, _symbol_table
+
+
+def test_symbols_unique_beyond_single_glyphs(qapp):
+    count = len(CHART_SYMBOLS) + 40
+    grid = BeadGrid(count, 2)
+    indices = np.array([grid.index_of(BeadColorEntry(QColor.fromRgb(n * 97 % 256, n * 31 % 256, n), code=f"C{n}")) for n in range(count)], dtype=np.uint16)
+    grid.write_cells(np.arange(count), np.zeros(count, dtype=np.intp), indices)
+    grid.write_cells(np.arange(10), np.ones(10, dtype=np.intp), indices[:10]) # Los más usados reciben un solo carácter
+    symbols, legend = _symbol_table(grid, build_label_table(grid, []))
+    used = [item[0] for item in legend]
+    assert len(used) == count and len(set(used)) == count
+    assert all(len(symbol) == 1 for symbol in used[:len(CHART_SYMBOLS)]) and all(len(symbol) == 2 for symbol in used[len(CHART_SYMBOLS):])
+    assert {symbols[i] for i in indices[:10].tolist()} <= set(CHART_SYMBOLS)
@@ -0,0 +1,78 @@
+# tests/test_rasterize.py
+# Rasterizado de formas contra pruebas punto a punto sobre el centro de cada celda.
+
+import numpy as np
+import pytest
+
+from utils.geometry import get_layout
+from utils.rasterize import cell_centers, rasterize_polyline, rasterize_rectangle, rasterize_ellipse, rasterize_polygon
+
+WIDTH, HEIGHT, CELL = 16, 13, 10.0
+GRID_TYPES = ["Square", "Brick", "Peyote", "Herringbone"]
+
+
+def all_centers(layout):
+    cells = np.array([(x, y) for y in range(HEIGHT) for x in range(WIDTH)])
+    return cell_centers(layout, WIDTH, HEIGHT, CELL, cells)
+
+
+def shares_edge(layout, a: int, b: int) -> bool:
+    """Dos celdas se tocan si sus cuadrados comparten un trozo de lado (no solo una esquina)."""
+    origin_x, origin_y = layout.origins(WIDTH, HEIGHT, CELL)
+    ax, ay = origin_x.ravel()[a], origin_y.ravel()[a]; bx, by = origin_x.ravel()[b], origin_y.ravel()[b]
+    overlap_x = min(ax, bx) + CELL - max(ax, bx); overlap_y = min(ay, by) + CELL - max(ay, by)
+    return (abs(overlap_x) < 1e-9 and overlap_y > 1e-9) or (abs(overlap_y) < 1e-9 and overlap_x > 1e-9)
+
+
+def brute_outline(layout, region: set[int]) -> set[int]:
+    return {cell for cell in region if any(shares_edge(layout, cell, other) for other in range(WIDTH * HEIGHT) if other not in region)}
+
+
+def point_in_polygon(px: float, py: float, vertices) -> bool:
+    inside = False
+    for (x1, y1), (x2, y2) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if (y1 > py) != (y2 > py) and px < x1 + (py - y1) * (x2 - x1) / (y2 - y1): inside = not inside
+    return inside
+
+
+def random_corners(layout, rng):
+    return cell_centers(layout, WIDTH, HEIGHT, CELL, np.array([[rng.integers(0, WIDTH), rng.integers(0, HEIGHT)] for _ in range(2)]))
+
+
+@pytest.mark.parametrize("grid_type", GRID_TYPES)
+@pytest.mark.parametrize("seed", range(6))
+def test_rectangle_and_ellipse(grid_type, seed):
+    layout = get_layout(grid_type); rng = np.random.default_rng(seed)
+    a, b = random_corners(layout, rng); centers = all_centers(layout)
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    rectangle = {n for n, c in enumerate(centers) if (low - 1e-6 <= c).all() and (c <= high + 1e-6).all()}
+    assert set(rasterize_rectangle(layout, WIDTH, HEIGHT, CELL, a, b, filled=True).tolist()) == rectangle
+    assert set(rasterize_rectangle(layout, WIDTH, HEIGHT, CELL, a, b, filled=False).tolist()) == brute_outline(layout, rectangle)
+    low, high = low - CELL / 2, high + CELL / 2; center, radii = (low + high) / 2, (high - low) / 2
+    ellipse = {n for n, c in enumerate(centers) if (((c - center) / radii) ** 2).sum() <= 1.0}
+    assert set(rasterize_ellipse(layout, WIDTH, HEIGHT, CELL, a, b, filled=True).tolist()) == ellipse
+    assert set(rasterize_ellipse(layout, WIDTH, HEIGHT, CELL, a, b, filled=False).tolist()) == brute_outline(layout, ellipse)
+
+
+@pytest.mark.parametrize("grid_type", GRID_TYPES)
+@pytest.mark.parametrize("seed", range(6))
+def test_polygon_fill_is_even_odd_plus_edges(grid_type, seed):
+    layout = get_layout(grid_type); rng = np.random.default_rng(seed)
+    vertices = rng.uniform([0, 0], [WIDTH * CELL, HEIGHT * CELL], size=(int(rng.integers(3, 7)), 2))
+    edges = set(rasterize_polygon(layout, WIDTH, HEIGHT, CELL, vertices, filled=False).tolist())
+    assert edges == set(rasterize_polyline(layout, WIDTH, HEIGHT, CELL, np.vstack([vertices, vertices[:1]])).tolist())
+    inside = {n for n, (px, py) in enumerate(all_centers(layout)) if point_in_polygon(px, py, vertices)}
+    assert set(rasterize_polygon(layout, WIDTH, HEIGHT, CELL, vertices, filled=True).tolist()) == inside | edges
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_polyline_is_a_thin_connected_line(seed):
+    layout = get_layout("Square"); rng = np.random.default_rng(seed)
+    start, end = [np.array([rng.integers(0, WIDTH), rng.integers(0, HEIGHT)]) for _ in range(2)]
+    line = rasterize_polyline(layout, WIDTH, HEIGHT, CELL, cell_centers(layout, WIDTH, HEIGHT, CELL, np.array([start, end])))
+    steps = int(np.abs(end - start).max())
+    assert len(line) == steps + 1 # Una cuenta por paso del eje mayor
+    points = {(c % WIDTH, c // WIDTH) for c in line.tolist()}
+    assert tuple(start) in points and tuple(end) in points
+    samples = np.linspace(0.0, 1.0, 2001)[:, None] * (end - start) + start # La línea continua pasa por todas sus celdas
+    assert points <= {(int(x), int(y)) for x, y in np.floor(samples + 0.5).tolist()} | {(int(x), int(y)) for x, y in np.ceil(samples - 0.5).tolist()}
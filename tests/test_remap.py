@@ -0,0 +1,38 @@
+# tests/test_remap.py
+# Reasignación de colores (RemapCommand): deshacer/rehacer exacto, capas
+# bloqueadas y selección flotante.
+
+import numpy as np
+import pytest
+from PyQt6.QtCore import QRect
+
+from grid_state import snapshot, same_state, fill_random, assert_round_trip
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_remap_round_trip(canvas, entries, seed):
+    rng = np.random.default_rng(seed)
+    fill_random(canvas, entries, rng, layers=3)
+    if seed % 2: canvas.grid_data.layers[1].locked = True
+    before = snapshot(canvas); locked = [layer.indices.copy() for layer in canvas.grid_data.layers if layer.locked]
+    hexes = [entry.color.name() for entry in entries]
+    if seed % 3 == 0: changed = canvas.swap_colors(entries[0], entries[1])
+    elif seed % 3 == 1: changed = canvas.remap_colors({hexes[0]: entries[2], hexes[3]: entries[2], hexes[4]: None}) # Varios orígenes a un destino usado
+    else: changed = canvas.merge_similar_colors(5.0) > 0 # #e63946 y #e53a47 se fusionan
+    assert changed and len(canvas.undo_stack) == 1
+    after = snapshot(canvas)
+    assert not same_state(after, before)
+    assert all(np.array_equal(a, layer.indices) for a, layer in zip(locked, [l for l in canvas.grid_data.layers if l.locked]))
+    assert_round_trip(canvas, before, after)
+
+
+def test_remap_with_floating_selection(canvas, entries):
+    grid = canvas.grid_data
+    red = grid.index_of(entries[0])
+    grid.write_cells(np.array([1, 2, 3]), np.array([1, 1, 1]), np.full(3, red, dtype=np.uint16)); canvas._clear_history()
+    canvas.selection_rect = QRect(1, 1, 2, 1); canvas.flip_selection(True)
+    assert canvas.floating is not None
+    assert canvas.replace_color(entries[0].color.name(), entries[2])
+    assert canvas.floating is None
+    assert [grid.entries[i] for i in grid.indices[1, 1:4].tolist()] == [entries[2]] * 3 # El bloque flotante también se reasigna
+    canvas.undo(); assert grid.indices[1, 1:4].tolist() == [red] * 3
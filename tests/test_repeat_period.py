@@ -0,0 +1,36 @@
+# tests/test_repeat_period.py
+# Periodo de repetición (hash + KMP) contra la búsqueda directa del menor periodo.
+
+import numpy as np
+import pytest
+
+from utils.repeat_period import minimal_period, repeat_periods, expand_period
+
+
+def brute_period(indices: np.ndarray, axis: int) -> int:
+    lines = np.moveaxis(indices, axis, 0)
+    return next(p for p in range(1, len(lines) + 1) if np.array_equal(lines[p:], lines[:len(lines) - p]))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_minimal_period_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    period = rng.integers(1, 8, size=2); size = rng.integers(1, 30, size=2)
+    indices = expand_period(rng.integers(0, rng.integers(1, 4), size=(period[1], period[0])).astype(np.uint16), int(size[0]), int(size[1]))
+    if seed % 3 == 0: indices[rng.integers(0, indices.shape[0]), rng.integers(0, indices.shape[1])] = 7 # Rompe la repetición
+    assert minimal_period(indices, axis=1) == brute_period(indices, 1)
+    assert minimal_period(indices, axis=0) == brute_period(indices, 0)
+    assert repeat_periods(indices) == (brute_period(indices, 1), brute_period(indices, 0))
+
+
+def test_partial_last_repeat_and_empty():
+    row = np.array([[1, 2, 3, 1, 2, 3, 1, 2]], dtype=np.uint16)
+    assert repeat_periods(row) == (3, 1)
+    assert repeat_periods(np.zeros((4, 5), dtype=np.uint16)) == (1, 1)
+
+
+def test_expand_period_tiles_and_crops():
+    block = np.arange(6, dtype=np.uint16).reshape(2, 3)
+    expanded = expand_period(block, 7, 5)
+    assert expanded.shape == (5, 7)
+    assert all(expanded[y, x] == block[y % 2, x % 3] for y in range(5) for x in range(7))
@@ -0,0 +1,27 @@
+# tests/test_resize.py
+# Cambio de tamaño no destructivo (ResizeCommand) contra el desplazamiento celda a celda.
+
+import numpy as np
+import pytest
+
+from grid_state import snapshot, same_state, fill_random
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_resize_round_trip(canvas, entries, seed):
+    rng = np.random.default_rng(seed)
+    fill_random(canvas, entries, rng)
+    before = snapshot(canvas); old_width, old_height = canvas.grid_width, canvas.grid_height
+    width, height = int(rng.integers(3, 20)), int(rng.integers(3, 20)); anchor = (int(rng.integers(0, 3)), int(rng.integers(0, 3)))
+    assert canvas.resize_grid(width, height, anchor)
+    after = snapshot(canvas)
+    assert (canvas.grid_width, canvas.grid_height) == (width, height)
+    offset_x = (width - old_width) * anchor[0] // 2; offset_y = (height - old_height) * anchor[1] // 2
+    for (_n, _v, _l, old), layer in zip(before, canvas.grid_data.layers): # El contenido conservado se desplaza, lo nuevo queda vacío
+        expected = np.zeros((height, width), dtype=old.dtype)
+        for y in range(height):
+            for x in range(width):
+                if 0 <= x - offset_x < old_width and 0 <= y - offset_y < old_height: expected[y, x] = old[y - offset_y, x - offset_x]
+        assert np.array_equal(layer.indices, expected)
+    canvas.undo(); assert (canvas.grid_width, canvas.grid_height) == (old_width, old_height) and same_state(snapshot(canvas), before)
+    canvas.redo(); assert same_state(snapshot(canvas), after)
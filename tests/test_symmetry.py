@@ -0,0 +1,62 @@
+# tests/test_symmetry.py
+# Expansión de simetría (tablas precalculadas) contra las imágenes calculadas celda a celda.
+
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.geometry import get_layout
+from utils.symmetry import Symmetry
+
+CELL = 10.0
+
+
+def brute_images(x: int, y: int, width: int, height: int, symmetry: Symmetry) -> set[tuple[int, int]]:
+    images = {(x, y)}
+    if symmetry.mirror_horizontal: images |= {(width - 1 - ix, iy) for ix, iy in images}
+    if symmetry.mirror_vertical: images |= {(ix, height - 1 - iy) for ix, iy in images}
+    if symmetry.rotation == 2: images |= {(width - 1 - ix, height - 1 - iy) for ix, iy in images}
+    if symmetry.rotation == 4: # Cuadrícula cuadrada: los giros de 90° son exactos
+        for _ in range(3): images |= {(width - 1 - iy, ix) for ix, iy in images}
+    k = symmetry.repeat_columns
+    if 0 < k < width:
+        if symmetry.wrap: images = {((ix + k * m) % width, iy) for ix, iy in images for m in range(-(-width // k))}
+        else: images = {(ix + k * m, iy) for ix, iy in images for m in range(-width, width + 1) if 0 <= ix + k * m < width}
+    return images
+
+
+SETTINGS = [settings for settings in itertools.product([False, True], [False, True], [1, 2, 4], [0, 3, 5], [False, True])]
+
+
+@pytest.mark.parametrize("mirror_h, mirror_v, rotation, repeat, wrap", SETTINGS)
+def test_expand_matches_per_cell_images(mirror_h, mirror_v, rotation, repeat, wrap):
+    width = height = 9
+    symmetry = Symmetry(mirror_h, mirror_v, rotation, repeat, wrap)
+    rng = np.random.default_rng(rotation * 100 + repeat)
+    cells = rng.choice(width * height, size=6, replace=False)
+    expanded, source = symmetry.expand(cells, width, height, get_layout("Square"), CELL)
+    expected = set().union(*(brute_images(c % width, c // width, width, height, symmetry) for c in cells.tolist()))
+    assert {(c % width, c // width) for c in expanded.tolist()} == expected
+    assert len(set(expanded.tolist())) == len(expanded)
+    for cell, origin in zip(expanded.tolist(), source.tolist()): # Cada celda viene de un origen que la genera
+        assert (cell % width, cell // width) in brute_images(cells[origin] % width, cells[origin] // width, width, height, symmetry)
+    position = {cell: n for n, cell in enumerate(expanded.tolist())}
+    for n, cell in enumerate(cells.tolist()): assert source[position[cell]] == n # Las celdas originales ganan a las imágenes
+
+
+@pytest.mark.parametrize("grid_type", ["Square", "Brick", "Peyote", "Herringbone"])
+@pytest.mark.parametrize("rotation", [3, 6, 8])
+def test_approximate_rotation_stays_inside_the_grid(grid_type, rotation):
+    width, height = 11, 7
+    cells = np.arange(width * height)
+    expanded, source = Symmetry(rotation=rotation).expand(cells, width, height, get_layout(grid_type), CELL)
+    assert np.array_equal(expanded, cells) and np.array_equal(source, cells) # La identidad siempre está
+    single, _ = Symmetry(rotation=rotation).expand(np.array([0]), width, height, get_layout(grid_type), CELL)
+    assert 1 <= len(single) <= rotation and ((single >= 0) & (single < width * height)).all()
+
+
+def test_identity_deduplicates_and_keeps_first():
+    cells = np.array([5, 3, 5, 8])
+    expanded, source = Symmetry().expand(cells, 4, 4, get_layout("Square"), CELL)
+    assert expanded.tolist() == [3, 5, 8] and source.tolist() == [1, 0, 3]
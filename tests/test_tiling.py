@@ -0,0 +1,41 @@
+# tests/test_tiling.py
+# Mosaico por gather contra el estampado tesela a tesela.
+
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.tiling import TILE_STEPS, tile_pattern
+
+
+def stamp_tiles(block, width, height, offset_x, offset_y, gap_x, gap_y, step, mirror_columns, mirror_rows):
+    """Referencia directa: recorre las teselas y copia cada una (volteada si toca) en su origen."""
+    tile_height, tile_width = block.shape
+    period_x, period_y = tile_width + gap_x, tile_height + gap_y
+    values = np.zeros((height, width), dtype=block.dtype); mask = np.zeros((height, width), dtype=bool)
+    reach_x = (width + abs(offset_x)) // period_x + 2; reach_y = (height + abs(offset_y)) // period_y + 2
+    for column in range(-reach_x, reach_x + 1):
+        for row in range(-reach_y, reach_y + 1):
+            origin_x = offset_x + column * period_x + (row % 2 * (period_x // 2) if step == "Brick" else 0)
+            origin_y = offset_y + row * period_y + (column % 2 * (period_y // 2) if step == "Half-drop" else 0)
+            tile = block[:, ::-1] if mirror_columns and column % 2 else block
+            tile = tile[::-1, :] if mirror_rows and row % 2 else tile
+            for v, u in itertools.product(range(tile_height), range(tile_width)):
+                x, y = origin_x + u, origin_y + v
+                if 0 <= x < width and 0 <= y < height: values[y, x] = tile[v, u]; mask[y, x] = True
+    return values, mask
+
+
+@pytest.mark.parametrize("step", TILE_STEPS)
+@pytest.mark.parametrize("seed", range(12))
+def test_tile_pattern_matches_stamping(step, seed):
+    rng = np.random.default_rng(seed)
+    block = rng.integers(1, 9, size=(rng.integers(1, 5), rng.integers(1, 5))).astype(np.uint16)
+    width, height = int(rng.integers(1, 25)), int(rng.integers(1, 25))
+    options = dict(offset_x=int(rng.integers(-6, 7)), offset_y=int(rng.integers(-6, 7)), gap_x=int(rng.integers(0, 3)), gap_y=int(rng.integers(0, 3)),
+                   step=step, mirror_columns=bool(seed % 2), mirror_rows=bool(seed // 2 % 2))
+    values, mask = tile_pattern(block, width, height, **options)
+    expected_values, expected_mask = stamp_tiles(block, width, height, **options)
+    assert np.array_equal(mask, expected_mask)
+    assert np.array_equal(values[mask], expected_values[mask])
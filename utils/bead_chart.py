@@ -0,0 +1,168 @@
+# utils/bead_chart.py
+# Lista de compra de cuentas (bill of materials) y "word chart" fila a fila.
+
+import csv
+import math
+
+import numpy as np
+
+from models import BeadGrid, RowRunCache
+from utils.constants import DELICA_BEADS_PER_GRAM, DELICA_GRAMS_PER_TUBE
+from utils.repeat_period import repeat_periods
+
+EMPTY_LABEL = "empty"
+
+
+def build_label_table(grid: BeadGrid, palette_metadata: list[dict]) -> list[dict]:
+    """
+    Resuelve la metadata (código, nombre, acabado) de cada índice de la tabla de
+    entradas. Se busca primero por HEX en los datos de la paleta
+    (get_palette_data_with_metadata), y si no, se usa la propia entrada.
+    """
+    by_hex = {item["hex"]: item for item in palette_metadata if item.get("hex")}
+    table = [{"hex": "", "code": None, "name": EMPTY_LABEL, "finish": "", "label": EMPTY_LABEL}]
+    for entry in grid.entries[1:]:
+        hex_color = entry.color.name()
+        meta = by_hex.get(hex_color, {})
+        code = meta.get("code") or entry.code
+        name = meta.get("name") or entry.name
+        finish = meta.get("finish") or entry.finish
+        table.append({"hex": hex_color, "code": code, "name": name, "finish": finish, "label": code or name})
+    return table
+
+
+def bill_of_materials(grid: BeadGrid, labels: list[dict]) -> list[dict]:
+    """
+    Agrupa los conteos (ya mantenidos por deltas) por código y acabado, con
+    estimaciones de gramos y tubos. Ordenado de mayor a menor cantidad.
+    """
+    lines: dict[tuple, dict] = {}
+    for index, count in ((i, int(c)) for i, c in enumerate(grid.usage.counts) if i and c):
+        meta = labels[index]
+        key = (meta["code"] or meta["hex"], meta["finish"])
+        line = lines.setdefault(key, {**meta, "beads": 0})
+        line["beads"] += count
+    for line in lines.values():
+        line["grams"] = line["beads"] / DELICA_BEADS_PER_GRAM
+        line["tubes"] = math.ceil(line["grams"] / DELICA_GRAMS_PER_TUBE)
+    return sorted(lines.values(), key=lambda line: line["beads"], reverse=True)
+
+
+def iter_word_chart(grid: BeadGrid, run_cache: RowRunCache, labels: list[dict], serpentine: bool = False):
+    """
+    Genera (número_de_fila, dirección, [(cantidad, etiqueta), ...]) por fila.
+
+    Los tramos salen de la caché RLE, así que solo se recodifican las filas
+    editadas desde la última exportación. Con serpentine=True (peyote) las filas
+    impares se leen de derecha a izquierda.
+    """
+    for y in range(grid.height):
+        _starts, lengths, values = run_cache.runs(y)
+        reverse = serpentine and y % 2 == 1
+        pairs = zip(lengths.tolist()[::-1], values.tolist()[::-1]) if reverse else zip(lengths.tolist(), values.tolist())
+        yield y + 1, ("R→L" if reverse else "L→R"), _label_runs(pairs, labels)
+
+
+def _label_runs(pairs, labels: list[dict]) -> list[list]:
+    """[(cantidad, índice), ...] -> [[cantidad, etiqueta], ...], fusionando tramos seguidos con la misma etiqueta."""
+    runs: list[list] = []
+    for length, index in pairs:
+        label = labels[index]["label"]
+        if runs and runs[-1][1] == label:
+            runs[-1][0] += length # Entradas distintas con el mismo código
+        else:
+            runs.append([length, label])
+    return runs
+
+
+def _row_runs(row: np.ndarray, labels: list[dict]) -> list[list]:
+    if not row.size: return []
+    starts = np.concatenate(([0], np.flatnonzero(row[1:] != row[:-1]) + 1))
+    return _label_runs(zip(np.diff(np.append(starts, row.size)).tolist(), row[starts].tolist()), labels)
+
+
+def chart_repeat(grid: BeadGrid, serpentine: bool = False) -> tuple[int, int]:
+    """
+    Periodo (columnas, filas) con el que imprimir el word chart. En
+    serpentina un periodo impar de filas invertiría el sentido de lectura en
+    cada repetición, así que se dobla (o no se compacta si no cabe).
+    """
+    columns, rows = repeat_periods(grid.indices)
+    if serpentine and rows % 2: rows = rows * 2 if rows * 2 < grid.height else grid.height
+    return columns, rows
+
+
+def iter_repeat_chart(grid: BeadGrid, labels: list[dict], columns: int, rows: int, serpentine: bool = False):
+    """
+    Word chart de un solo periodo: genera (número_de_fila, dirección, tramos
+    de un periodo de columnas, repeticiones completas, tramos del resto) para
+    las 'rows' primeras filas. Una fila periódica lo es igual leída al revés,
+    así que en serpentina basta con invertirla antes de cortar el periodo.
+    """
+    repeats, tail = divmod(grid.width, columns)
+    for y in range(rows):
+        reverse = serpentine and y % 2 == 1
+        row = grid.indices[y, ::-1] if reverse else grid.indices[y]
+        yield y + 1, ("R→L" if reverse else "L→R"), _row_runs(row[:columns], labels), repeats, _row_runs(row[:tail], labels)
+
+
+def _format_runs(runs: list[list]) -> str:
+    return ", ".join(f"{count}× {label}" for count, label in runs)
+
+
+def _with_progress(rows, total: int, job):
+    """Pasa las filas del word chart informando del progreso (y de la cancelación) al trabajo cada 64 filas."""
+    for n, row in enumerate(rows):
+        if job is not None and n % 64 == 0: job.report_progress(n * 100 // max(total, 1))
+        yield row
+
+
+def export_bead_chart(file_path: str, grid: BeadGrid, run_cache: RowRunCache, palette_metadata: list[dict], serpentine: bool = False,
+                      repeat: tuple[int, int] | None = None, job=None):
+    """
+    Escribe la lista de compra y el word chart en 'file_path' (.csv o texto),
+    fila a fila y sin construir el documento completo en memoria. Con
+    'repeat' = (columnas, filas) (ver chart_repeat) el word chart imprime un
+    solo periodo y cuántas veces se repite. 'job' (opcional) recibe el
+    progreso y puede cancelar la exportación.
+    """
+    labels = build_label_table(grid, palette_metadata)
+    materials = bill_of_materials(grid, labels)
+    columns, period_rows = repeat or (grid.width, grid.height)
+    if (columns, period_rows) == (grid.width, grid.height): repeat = None
+    rows = iter_repeat_chart(grid, labels, columns, period_rows, serpentine) if repeat else iter_word_chart(grid, run_cache, labels, serpentine)
+    rows = _with_progress(rows, period_rows if repeat else grid.height, job)
+    row_repeats, row_tail = divmod(grid.height, period_rows)
+
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        if file_path.lower().endswith(".csv"):
+            writer = csv.writer(f)
+            writer.writerow(["Code", "Name", "Finish", "Hex", "Beads", "Grams", "Tubes"])
+            for line in materials:
+                writer.writerow([line["code"] or "", line["name"], line["finish"], line["hex"], line["beads"], f"{line['grams']:.1f}", line["tubes"]])
+            writer.writerow([])
+            if not repeat:
+                writer.writerow(["Row", "Direction", "Count", "Bead"])
+                for row_number, direction, runs in rows:
+                    writer.writerows([row_number, direction, count, label] for count, label in runs)
+            else:
+                writer.writerow(["Repeat", f"{columns} columns", f"{period_rows} rows", f"{row_repeats} time(s) down, then {row_tail} row(s)"])
+                writer.writerow(["Row", "Direction", "Count", "Bead", "Part"])
+                for row_number, direction, runs, repeats, tail in rows:
+                    writer.writerows([row_number, direction, count, label, f"repeat ×{repeats}"] for count, label in runs)
+                    writer.writerows([row_number, direction, count, label, "tail"] for count, label in tail)
+        else:
+            f.write(f"BEAD SHOPPING LIST ({grid.width}x{grid.height})\n\n")
+            for line in materials:
+                f.write(f"{line['label']:<12} {line['finish']:<22} {line['beads']:>7} beads  {line['grams']:>6.1f} g  {line['tubes']:>3} tube(s)\n")
+            f.write(f"\nTotal: {sum(line['beads'] for line in materials)} beads\n\nWORD CHART\n\n")
+            if not repeat:
+                for row_number, direction, runs in rows:
+                    f.write(f"Row {row_number} ({direction}): {_format_runs(runs)}\n")
+            else:
+                f.write(f"One repeat of {columns} columns x {period_rows} rows.\n\n")
+                for row_number, direction, runs, repeats, tail in rows:
+                    line = f"[{_format_runs(runs)}] ×{repeats}" if repeats > 1 else _format_runs(runs)
+                    f.write(f"Row {row_number} ({direction}): {line}" + (f", then {_format_runs(tail)}" if tail else "") + "\n")
+                if period_rows < grid.height:
+                    f.write(f"\nRepeat rows 1-{period_rows} {row_repeats} time(s)" + (f", then rows 1-{row_tail}" if row_tail else "") + f" ({grid.height} rows in total).\n")
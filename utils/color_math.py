@@ -0,0 +1,115 @@
+# utils/color_math.py
+# Matemática de color vectorizada: sRGB -> CIELAB (D65), diferencia de color
+# CIEDE2000 (ΔE00) y agrupamiento de paletas (fusión por umbral, k-means
+# ponderado). Todo trabaja sobre arrays de numpy con la última dimensión de
+# tamaño 3, así que una matriz de distancias entre N colores es una sola
+# llamada con difusión (broadcast); se agrupa el histograma de colores, nunca
+# las celdas.
+
+import numpy as np
+
+_SRGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                         [0.2126729, 0.7151522, 0.0721750],
+                         [0.0193339, 0.1191920, 0.9503041]])
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+
+
+def hex_to_rgb(hex_colors: list[str]) -> np.ndarray:
+    """'#rrggbb' -> (N x 3) en 0..255."""
+    return np.array([[int(h[1:3], 16), int(h[3:5], 16), int(h[5:7], 16)] for h in hex_colors], dtype=float).reshape(-1, 3)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (0..255, última dimensión 3) -> CIELAB con iluminante D65."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    t = (linear @ _SRGB_TO_XYZ.T) / _WHITE_D65
+    f = np.where(t > (6.0 / 29.0) ** 3, np.cbrt(t), t / (3.0 * (6.0 / 29.0) ** 2) + 4.0 / 29.0)
+    return np.stack([116.0 * f[..., 1] - 16.0, 500.0 * (f[..., 0] - f[..., 1]), 200.0 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def entry_lab_table(entries: list) -> np.ndarray:
+    """Lab de cada entrada de la tabla de un BeadGrid (NaN para la celda vacía): las distancias se calculan por entrada, no por celda."""
+    lab = np.full((len(entries), 3), np.nan)
+    present = [i for i, entry in enumerate(entries) if entry is not None]
+    if present: lab[present] = rgb_to_lab(hex_to_rgb([entries[i].color.name() for i in present]))
+    return lab
+
+
+def ciede2000(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """ΔE00 entre dos arrays Lab (difundibles entre sí), con kL = kC = kH = 1."""
+    L1, a1, b1 = np.moveaxis(np.asarray(lab1, dtype=float), -1, 0)
+    L2, a2, b2 = np.moveaxis(np.asarray(lab2, dtype=float), -1, 0)
+    C_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2.0
+    G = 0.5 * (1.0 - np.sqrt(C_mean ** 7 / (C_mean ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1.0 + G) * a1, (1.0 + G) * a2
+    C1p, C2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360.0; h2p = np.degrees(np.arctan2(b2, a2p)) % 360.0
+    chroma_zero = C1p * C2p == 0
+
+    dLp = L2 - L1; dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180.0, dhp - 360.0, np.where(dhp < -180.0, dhp + 360.0, dhp))
+    dhp = np.where(chroma_zero, 0.0, dhp)
+    dHp = 2.0 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp) / 2.0)
+
+    Lp_mean = (L1 + L2) / 2.0; Cp_mean = (C1p + C2p) / 2.0
+    h_sum = h1p + h2p
+    hp_mean = np.where(np.abs(h1p - h2p) <= 180.0, h_sum / 2.0, np.where(h_sum < 360.0, (h_sum + 360.0) / 2.0, (h_sum - 360.0) / 2.0))
+    hp_mean = np.where(chroma_zero, h_sum, hp_mean)
+
+    T = (1.0 - 0.17 * np.cos(np.radians(hp_mean - 30.0)) + 0.24 * np.cos(np.radians(2.0 * hp_mean))
+         + 0.32 * np.cos(np.radians(3.0 * hp_mean + 6.0)) - 0.20 * np.cos(np.radians(4.0 * hp_mean - 63.0)))
+    d_theta = 30.0 * np.exp(-(((hp_mean - 275.0) / 25.0) ** 2))
+    R_C = 2.0 * np.sqrt(Cp_mean ** 7 / (Cp_mean ** 7 + 25.0 ** 7))
+    S_L = 1.0 + 0.015 * (Lp_mean - 50.0) ** 2 / np.sqrt(20.0 + (Lp_mean - 50.0) ** 2)
+    S_C = 1.0 + 0.045 * Cp_mean; S_H = 1.0 + 0.015 * Cp_mean * T
+    R_T = -np.sin(np.radians(2.0 * d_theta)) * R_C
+    return np.sqrt((dLp / S_L) ** 2 + (dCp / S_C) ** 2 + (dHp / S_H) ** 2 + R_T * (dCp / S_C) * (dHp / S_H))
+
+
+def merge_near_duplicates(lab: np.ndarray, counts: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Agrupa colores a menos de 'threshold' (ΔE00). Recorre los colores de más
+    a menos usados: cada uno se une al representante más cercano dentro del
+    umbral o pasa a ser representante. Devuelve el representante de cada
+    color (él mismo si no se fusiona).
+    """
+    distances = ciede2000(lab[:, None, :], lab[None, :, :])
+    representative = np.arange(len(lab))
+    chosen: list[int] = []
+    for i in np.argsort(-np.asarray(counts), kind="stable").tolist():
+        if chosen:
+            nearest = int(np.argmin(distances[i, chosen]))
+            if distances[i, chosen[nearest]] <= threshold:
+                representative[i] = chosen[nearest]; continue
+        chosen.append(i)
+    return representative
+
+
+def weighted_kmeans(points: np.ndarray, weights: np.ndarray, k: int, iterations: int = 30) -> tuple[np.ndarray, np.ndarray]:
+    """
+    K-means ponderado sobre un histograma (un punto por color, con su número
+    de cuentas como peso). Arranque determinista: el color más usado y luego,
+    uno a uno, el que maximiza peso x distancia² al centro más cercano
+    (k-means++ sin azar). Devuelve (centros k x 3, etiqueta de cada punto);
+    k nunca supera el número de puntos y sin puntos no hay centros.
+    """
+    points = np.asarray(points, dtype=float); weights = np.asarray(weights, dtype=float)
+    if len(points) == 0: return np.empty((0, points.shape[1] if points.ndim == 2 else 3)), np.empty(0, dtype=np.intp)
+    k = max(1, min(k, len(points)))
+    chosen = [int(np.argmax(weights))]
+    nearest = ((points - points[chosen[0]]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        chosen.append(int(np.argmax(weights * nearest)))
+        nearest = np.minimum(nearest, ((points - points[chosen[-1]]) ** 2).sum(axis=1))
+    centers = points[chosen]
+    for _ in range(iterations):
+        labels = np.argmin(((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        totals = np.bincount(labels, weights, minlength=k)
+        sums = np.stack([np.bincount(labels, weights * points[:, c], minlength=k) for c in range(points.shape[1])], axis=1)
+        moved = np.where(totals[:, None] > 0, sums / np.maximum(totals, 1e-12)[:, None], centers) # Un grupo vacío conserva su centro
+        if np.allclose(moved, centers): break
+        centers = moved
+    labels = np.argmin(((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+    return centers, labels
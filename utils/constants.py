@@ -12,4 +12,17 @@ PRESET_SIZES = {
 # Default preset name to select on startup
 DEFAULT_PRESET_NAME = "Bracelet - Medium (75x26)"
 
-# You could also add other constants here later, like default colors, etc.
\ No newline at end of file
+# Resize anchors: where the existing design stays when the grid grows or shrinks
+# (0 = left/top, 1 = center, 2 = right/bottom, per axis)
+RESIZE_ANCHORS = {
+    "Top Left": (0, 0), "Top": (1, 0), "Top Right": (2, 0),
+    "Left": (0, 1), "Center": (1, 1), "Right": (2, 1),
+    "Bottom Left": (0, 2), "Bottom": (1, 2), "Bottom Right": (2, 2),
+}
+RESIZE_DEBOUNCE_MS = 400   # The size spinboxes apply once the value settles
+
+# You could also add other constants here later, like default colors, etc.
+
+# Material estimates for Miyuki Delica 11/0 (used by the bill of materials)
+DELICA_BEADS_PER_GRAM = 200   # Approx. beads per gram
+DELICA_GRAMS_PER_TUBE = 7.2   # Standard retail tube
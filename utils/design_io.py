@@ -0,0 +1,110 @@
+# utils/design_io.py
+# Trabajos de lectura/escritura de diseños (.json) para ejecutar fuera del hilo de la GUI.
+
+import json
+import os
+
+import numpy as np
+
+from models import pack_hex_grid, unpack_hex_grid
+from utils.jobs import Job
+from utils.repeat_period import repeat_periods, expand_period
+
+
+class LoadDesignJob(Job):
+    """
+    Lee y decodifica un diseño. Devuelve (design_data, (hex_table, índices, capas) | None),
+    con las capas como (metadata, hex_table, índices); la instalación en el
+    lienzo se hace después, en el hilo de la GUI. Un diseño guardado
+    compacto (un solo periodo, menor que 'grid_size') se vuelve a extender
+    al tamaño completo.
+    """
+    key = "load-design"
+
+    def __init__(self, file_path: str):
+        super().__init__()
+        self.file_path = file_path
+
+    def run_job(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f: design_data = json.load(f)
+        except FileNotFoundError: raise IOError(f"File not found '{self.file_path}'")
+        except json.JSONDecodeError: raise IOError(f"Could not decode JSON from '{self.file_path}'")
+        self.report_progress(30)
+        grid_data = design_data.get("grid_data", [])
+        if not grid_data: return design_data, None
+        hex_table, indices = pack_hex_grid(grid_data, job=self)
+        layers = [({key: value for key, value in layer.items() if key != "grid_data"}, *pack_hex_grid(layer.get("grid_data", [])))
+                  for layer in design_data.get("layers", []) if isinstance(layer, dict)]
+        size = design_data.get("grid_size", {})
+        width, height = int(size.get("width", indices.shape[1])), int(size.get("height", indices.shape[0]))
+        if isinstance(design_data.get("repeat"), dict) and indices.shape != (height, width): # Guardado compacto
+            indices = expand_period(indices, width, height)
+            layers = [(meta, table, expand_period(layer_indices, width, height)) for meta, table, layer_indices in layers]
+        return design_data, (hex_table, indices, layers)
+
+
+class SaveDesignJob(Job):
+    """
+    Serializa y escribe un diseño a partir de una instantánea tomada en la GUI
+    (metadata + copia de la matriz de índices). 'grid_data' es siempre el
+    compuesto (lo que leen las versiones sin capas); con más de una capa se
+    guardan además en 'layers'. Si el diseño (todas sus capas) se repite cada
+    K columnas y/o R filas, 'repeat' lo indica como metadata; las cuadrículas
+    se guardan completas salvo con 'compact', que escribe un solo periodo
+    (solo lo vuelven a extender las versiones que conocen 'repeat'). Escribe
+    a un temporal y lo renombra, así que un fallo nunca deja el archivo a medias.
+    """
+    cancel_on_exit = False # Un guardado en curso debe terminar aunque se cierre la app
+
+    def __init__(self, file_path: str, design_data: dict, indices: np.ndarray, hex_by_index: list[str | None],
+                 layers: list[tuple[dict, np.ndarray]] | None = None, compact: bool = False):
+        super().__init__()
+        self.file_path = file_path
+        self.compact = compact
+        self._design_data = design_data
+        self._indices = indices.copy()
+        self._hex_by_index = hex_by_index
+        self._layers = [(dict(meta), layer_indices.copy()) for meta, layer_indices in layers or []] if layers and len(layers) > 1 else []
+
+    def run_job(self) -> str:
+        grids = [self._indices] + [indices for _meta, indices in self._layers]
+        height, width = self._indices.shape
+        columns, _ = repeat_periods(np.vstack(grids)); _, rows = repeat_periods(np.hstack(grids)) # Un periodo común a todas las capas
+        saved_height, saved_width = (rows, columns) if self.compact else (height, width)
+        design_data = dict(self._design_data, grid_data=unpack_hex_grid(self._indices[:saved_height, :saved_width], self._hex_by_index))
+        if (columns, rows) != (width, height): design_data["repeat"] = {"columns": columns, "rows": rows}
+        if self._layers:
+            design_data["layers"] = [dict(meta, grid_data=unpack_hex_grid(indices[:saved_height, :saved_width], self._hex_by_index)) for meta, indices in self._layers]
+        temp_path = self.file_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f: json.dump(design_data, f, indent=2)
+            os.replace(temp_path, self.file_path)
+        finally:
+            if os.path.exists(temp_path): os.remove(temp_path)
+        return self.file_path
+
+
+class ExportFileJob(Job):
+    """
+    Exportación a archivo (word chart, PDF, SVG) fuera del hilo de la GUI.
+    'export(ruta, job)' escribe a partir de una instantánea tomada en la GUI
+    (BeadGrid.snapshot()), nunca del diseño vivo. Escribe a un temporal con
+    la misma extensión y lo renombra al terminar, así que cancelar o fallar
+    nunca deja el archivo a medias.
+    """
+    def __init__(self, file_path: str, export, key: str | None = None):
+        super().__init__(key)
+        self.file_path = file_path
+        self._export = export
+
+    def run_job(self) -> str:
+        root, extension = os.path.splitext(self.file_path)
+        temp_path = f"{root}.tmp{extension}"
+        try:
+            self._export(temp_path, self)
+            self.check_cancelled()
+            os.replace(temp_path, self.file_path)
+        finally:
+            if os.path.exists(temp_path): os.remove(temp_path)
+        return self.file_path
@@ -0,0 +1,122 @@
+# utils/diagnostics.py
+# Diagnóstico de rendimiento del lienzo: tiempos de frame y de comandos,
+# historial rodante exportable a CSV y superposición en pantalla.
+#
+# GridCanvas solo llama aquí cuando 'canvas.diagnostics' no es None, así que
+# desactivado no cuesta nada más que esa comprobación.
+
+import csv
+import time
+from collections import deque
+
+import numpy as np
+from PyQt6.QtGui import QPainter, QColor, QFont
+from PyQt6.QtCore import Qt, QPoint, QRect, QRectF
+
+HISTORY_LENGTH = 2000   # Registros conservados (frames + comandos)
+OVERLAY_WINDOW = 60     # Frames usados para las medias de la superposición
+
+FRAME_KINDS = ("frame", "lod", "gesture", "overlay")
+
+CSV_COLUMNS = [
+    "timestamp", "kind", "duration_ms", "command", "command_cells",
+    "cells_drawn", "solid_fills", "gradient_fills", "lines_drawn",
+    "region_x", "region_y", "region_width", "region_height",
+]
+
+
+class CanvasDiagnostics:
+    """
+    Registro de métricas del lienzo.
+
+    Cada registro es un dict con las claves de CSV_COLUMNS: 'kind' es "frame"
+    para un paintEvent celda a celda, "lod" para uno servido con la imagen de
+    una cuenta por píxel, "gesture" para un frame de zoom/pan servido desde la
+    instantánea, "overlay" para uno con selección flotante o vista previa de
+    una forma (base en caché más la capa), o "execute"/"merge"/"undo"/"redo" para un comando.
+    """
+    def __init__(self, history_length: int = HISTORY_LENGTH):
+        self.history: deque[dict] = deque(maxlen=history_length)
+        self._shiny_mask = np.zeros(1, dtype=bool)
+        self._last_command: dict | None = None
+
+    # --- Registro ---
+    def record_frame(self, duration: float, indices: np.ndarray, palette: list, lines_drawn: int, region: QRect, kind: str = "frame"):
+        """
+        Registra un frame. Los conteos de relleno se calculan en bloque sobre los
+        índices (solo en frames celda a celda: "lod", "gesture" y "overlay" no dibujan celdas).
+        """
+        if kind != "frame":
+            cells = gradient = 0
+        else:
+            if len(self._shiny_mask) != len(palette):
+                self._shiny_mask = np.array([False] + [item[1] for item in palette[1:]], dtype=bool)
+            cells = int(np.count_nonzero(indices))
+            gradient = int(np.count_nonzero(self._shiny_mask[indices]))
+        self.history.append({
+            "timestamp": time.time(), "kind": kind, "duration_ms": duration * 1000.0,
+            "command": "", "command_cells": 0,
+            "cells_drawn": cells, "solid_fills": cells - gradient, "gradient_fills": gradient, "lines_drawn": lines_drawn,
+            "region_x": region.x(), "region_y": region.y(), "region_width": region.width(), "region_height": region.height(),
+        })
+
+    def record_command(self, kind: str, command, duration: float):
+        """Registra la ejecución, fusión, deshacer o rehacer de un comando."""
+        record = {
+            "timestamp": time.time(), "kind": kind, "duration_ms": duration * 1000.0,
+            "command": type(command).__name__, "command_cells": command.cell_count(),
+            "cells_drawn": 0, "solid_fills": 0, "gradient_fills": 0, "lines_drawn": 0,
+            "region_x": 0, "region_y": 0, "region_width": 0, "region_height": 0,
+        }
+        self.history.append(record)
+        self._last_command = record
+
+    def clear(self):
+        self.history.clear(); self._last_command = None
+
+    # --- Consulta / exportación ---
+    def recent_frames(self, count: int = OVERLAY_WINDOW) -> list[dict]:
+        frames = []
+        for record in reversed(self.history):
+            if record["kind"] in FRAME_KINDS:
+                frames.append(record)
+                if len(frames) == count: break
+        return frames
+
+    def export_csv(self, file_path: str):
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            for record in self.history:
+                writer.writerow(dict(record, duration_ms=f"{record['duration_ms']:.3f}"))
+
+    def overlay_lines(self) -> list[str]:
+        frames = self.recent_frames()
+        if not frames:
+            return ["Diagnostics: waiting for frames..."]
+        last = frames[0]
+        durations = [frame["duration_ms"] for frame in frames]
+        average = sum(durations) / len(durations)
+        lines = [
+            f"Frame ({last['kind']}) {last['duration_ms']:.1f} ms  (avg {average:.1f}, max {max(durations):.1f} over {len(frames)})",
+            f"Cells {last['cells_drawn']}  solid {last['solid_fills']}  gradient {last['gradient_fills']}  lines {last['lines_drawn']}",
+            f"Region {last['region_width']}x{last['region_height']} px at ({last['region_x']}, {last['region_y']})",
+        ]
+        if self._last_command:
+            command = self._last_command
+            lines.append(f"Last {command['kind']}: {command['command']} ({command['command_cells']} cells) {command['duration_ms']:.2f} ms")
+        return lines
+
+    def paint_overlay(self, painter: QPainter, origin: QPoint):
+        """Dibuja el resumen en 'origin' (esquina visible del widget, en sus coordenadas)."""
+        lines = self.overlay_lines()
+        font = QFont("Monospace"); font.setStyleHint(QFont.StyleHint.TypeWriter); font.setPixelSize(11)
+        painter.setFont(font)
+        line_height = painter.fontMetrics().height()
+        width = max(painter.fontMetrics().horizontalAdvance(line) for line in lines) + 12
+        box = QRectF(origin.x() + 6, origin.y() + 6, width, line_height * len(lines) + 8)
+        painter.fillRect(box, QColor(0, 0, 0, 170))
+        painter.setPen(QColor("#7CFC00"))
+        for i, line in enumerate(lines):
+            painter.drawText(QRectF(box.x() + 6, box.y() + 4 + i * line_height, width, line_height),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, line)
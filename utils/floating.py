@@ -0,0 +1,66 @@
+# utils/floating.py
+# Selección flotante: un bloque de índices levantado de la cuadrícula que se
+# puede mover, voltear, girar 90° y escalar (vecino más cercano) antes de
+# asentarlo. Todas las transformaciones son cortes/gathers de numpy sobre el
+# bloque empaquetado; la cuadrícula no se toca hasta el commit.
+
+import numpy as np
+from PyQt6.QtCore import QRect
+
+MIN_SCALE_PERCENT = 10; MAX_SCALE_PERCENT = 800
+
+
+def scale_block(block: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Reescala un bloque a (alto, ancho) tomando para cada celda la del centro correspondiente (vecino más cercano)."""
+    rows = (np.arange(height) * 2 + 1) * block.shape[0] // (2 * height)
+    columns = (np.arange(width) * 2 + 1) * block.shape[1] // (2 * width)
+    return block[rows[:, None], columns[None, :]]
+
+
+class FloatingSelection:
+    """
+    Bloque flotante. 'source' es el rectángulo del que se levantó (queda
+    vacío al asentar) y 'original' su contenido; 'block' es el contenido
+    transformado, con la esquina en la celda (x, y). 'revision' crece con cada
+    cambio (clave de las cachés de dibujo).
+    """
+    def __init__(self, source: QRect, block: np.ndarray):
+        self.source = QRect(source)
+        self.original = block
+        self.block = block
+        self.x, self.y = source.x(), source.y()
+        self.revision = 0
+
+    def rect(self) -> QRect:
+        return QRect(self.x, self.y, self.block.shape[1], self.block.shape[0])
+
+    def is_modified(self) -> bool:
+        return self.rect() != self.source or not np.array_equal(self.block, self.original)
+
+    def _set_block(self, block: np.ndarray, keep_center: bool = True):
+        """Sustituye el bloque manteniendo (aprox.) su centro en la cuadrícula."""
+        if keep_center:
+            self.x += (self.block.shape[1] - block.shape[1]) // 2; self.y += (self.block.shape[0] - block.shape[0]) // 2
+        self.block = block; self.revision += 1
+
+    # --- Transformaciones ---
+    def move_to(self, x: int, y: int) -> bool:
+        if (x, y) == (self.x, self.y): return False
+        self.x, self.y = x, y; self.revision += 1
+        return True
+
+    def flip_horizontal(self):
+        self._set_block(self.block[:, ::-1])
+
+    def flip_vertical(self):
+        self._set_block(self.block[::-1, :])
+
+    def rotate(self, clockwise: bool = True):
+        self._set_block(np.rot90(self.block, -1 if clockwise else 1))
+
+    def scale(self, percent: int):
+        """Escala el bloque actual un porcentaje (mínimo una celda por lado)."""
+        height, width = self.block.shape
+        new_width = max(1, round(width * percent / 100.0)); new_height = max(1, round(height * percent / 100.0))
+        if (new_width, new_height) != (width, height):
+            self._set_block(scale_block(self.block, new_width, new_height), keep_center=False) # Crece desde la esquina
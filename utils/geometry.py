@@ -0,0 +1,223 @@
+# utils/geometry.py
+# Geometría de celdas por tipo de puntada: orígenes, mapeo escena <-> celda,
+# vecinos, segmentos de la cuadrícula y contornos de bloques.
+#
+# Cada disposición se describe con un eje desplazado ("rows" o "columns") y un
+# desplazamiento por fila/columna (en fracciones de celda). Todo lo demás se
+# calcula en bloque con numpy a partir de eso, así que añadir un tipo de
+# puntada no añade ramas por celda en los caminos calientes.
+
+from functools import lru_cache
+
+import numpy as np
+
+
+class CellLayout:
+    """
+    Disposición base (cuadrícula regular, telar). Las subclases solo cambian
+    'axis' y shift().
+
+    Internamente se trabaja en coordenadas (a, b): 'b' indexa las líneas
+    desplazadas (filas o columnas) y 'a' avanza a lo largo de ellas. Con
+    axis == "columns" se intercambian x e y a la entrada y a la salida.
+    """
+    name = "Square"
+    axis: str | None = None   # Eje cuyas líneas se desplazan: "rows", "columns" o None
+    max_shift = 0.0           # Desplazamiento máximo (en celdas): espacio extra de la escena
+
+    def shift(self, lines: np.ndarray) -> np.ndarray:
+        """Desplazamiento (en celdas) de cada fila/columna del eje desplazado."""
+        return np.zeros(np.shape(lines))
+
+    def _swap(self, x, y):
+        """(x, y) <-> (a, b): la misma operación en ambos sentidos."""
+        return (y, x) if self.axis == "columns" else (x, y)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+    # --- Tamaño y orígenes ---
+    def scene_size(self, grid_width: int, grid_height: int, cell_size: float) -> tuple[float, float]:
+        """Tamaño de la escena (sin zoom) que ocupa la cuadrícula."""
+        extent_a, extent_b = self._swap(grid_width, grid_height)
+        return self._swap((extent_a + self.max_shift) * cell_size, extent_b * cell_size)
+
+    def offsets(self, grid_width: int, grid_height: int, x0: int = 0, y0: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Desplazamientos (dx, dy) en celdas, de forma (alto, ancho), de un bloque
+        cuya esquina es la celda (x0, y0) (la paridad es la de la cuadrícula completa).
+        """
+        dx = np.zeros((grid_height, grid_width)); dy = np.zeros((grid_height, grid_width))
+        if self.axis == "rows": dx += self.shift(y0 + np.arange(grid_height))[:, None]
+        elif self.axis == "columns": dy += self.shift(x0 + np.arange(grid_width))[None, :]
+        return dx, dy
+
+    @lru_cache(maxsize=8)
+    def origins(self, grid_width: int, grid_height: int, cell_size: float) -> tuple[np.ndarray, np.ndarray]:
+        """Esquina superior izquierda de cada celda en la escena: (xs, ys) de forma (alto, ancho), de solo lectura."""
+        dx, dy = self.offsets(grid_width, grid_height)
+        xs = (np.arange(grid_width)[None, :] + dx) * cell_size
+        ys = (np.arange(grid_height)[:, None] + dy) * cell_size
+        xs.setflags(write=False); ys.setflags(write=False)
+        return xs, ys
+
+    # --- Escena -> celda ---
+    def cells_at(self, scene_x: np.ndarray, scene_y: np.ndarray, grid_width: int, grid_height: int,
+                 cell_size: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Celdas bajo un lote de puntos de escena: (xs, ys, dentro). Fuera de la cuadrícula 'dentro' es False."""
+        pos_a, pos_b = self._swap(np.asarray(scene_x, dtype=float), np.asarray(scene_y, dtype=float))
+        extent_a, extent_b = self._swap(grid_width, grid_height)
+        b = np.floor(pos_b / cell_size).astype(np.intp)
+        a = np.floor(pos_a / cell_size - self.shift(b)).astype(np.intp)
+        inside = (a >= 0) & (a < extent_a) & (b >= 0) & (b < extent_b)
+        xs, ys = self._swap(a, b)
+        return xs, ys, inside
+
+    def cell_at(self, scene_x: float, scene_y: float, grid_width: int, grid_height: int, cell_size: float) -> tuple[int, int] | None:
+        xs, ys, inside = self.cells_at(np.array([scene_x]), np.array([scene_y]), grid_width, grid_height, cell_size)
+        return (int(xs[0]), int(ys[0])) if inside[0] else None
+
+    # --- Vecinos ---
+    @lru_cache(maxsize=4)
+    def neighbors(self, grid_width: int, grid_height: int, wrap: bool = False) -> np.ndarray:
+        """
+        Tabla de vecinos (celdas que comparten borde): una fila por celda (índice
+        plano y * ancho + x) con los índices planos de sus vecinos, -1 si no hay.
+        Con desplazamiento de media celda una celda toca dos de cada línea contigua.
+        Con 'wrap' la primera y la última columna se tocan (costura de un tubo).
+        """
+        extent_a, extent_b = self._swap(grid_width, grid_height)
+        a = np.broadcast_to(np.arange(extent_a)[None, :], (extent_b, extent_a))
+        b = np.broadcast_to(np.arange(extent_b)[:, None], (extent_b, extent_a))
+        shifts = self.shift(np.arange(-1, extent_b + 1))    # shifts[b + 1] es el de la línea b
+
+        def flat(na, nb):
+            x, y = self._swap(na, nb)
+            if wrap: x = np.mod(x, grid_width)
+            valid = (x >= 0) & (x < grid_width) & (y >= 0) & (y < grid_height)
+            return np.where(valid, y * grid_width + x, -1)
+
+        columns = [flat(a - 1, b), flat(a + 1, b)]
+        for step in (-1, 1):
+            # Celdas de la línea b + step que se solapan con [a + s_b, a + s_b + 1)
+            delta = (shifts[1:-1] - shifts[1 + step:extent_b + 1 + step])[:, None]
+            low, high = np.floor(a + delta).astype(np.intp), np.ceil(a + delta).astype(np.intp)
+            columns.append(flat(low, b + step)); columns.append(flat(np.where(high != low, high, -1), b + step))
+        table = np.stack([column.ravel() if self.axis != "columns" else column.T.ravel() for column in columns], axis=1)
+        table = table[:, (table >= 0).any(axis=0)] if table.size else table[:, :4]
+        table.setflags(write=False)
+        return table
+
+    # --- Dibujo ---
+    def line_segments(self, grid_width: int, grid_height: int, cell_size: float, x0: int = 0, y0: int = 0) -> np.ndarray:
+        """
+        Segmentos (x1, y1, x2, y2) de la cuadrícula de un bloque, en escena.
+        Sin desplazamiento: una línea por fila/columna. Con desplazamiento: cada
+        borde entre líneas cubre la unión de las dos que separa y cada línea
+        aporta sus bordes transversales (equivale a contornear cada celda, sin solapes).
+        """
+        extent_a, extent_b = self._swap(grid_width, grid_height)
+        b_start = self._swap(x0, y0)[1]
+        if self.axis is None:
+            along = [(0.0, b, extent_a, b) for b in range(extent_b + 1)]
+            across = [(a, 0.0, a, extent_b) for a in range(extent_a + 1)]
+            segments = np.array(across + along, dtype=float).reshape(-1, 4)
+        else:
+            shifts = self.shift(b_start + np.arange(extent_b))
+            bounds = np.arange(extent_b + 1)
+            above = shifts[np.clip(bounds - 1, 0, None)] if extent_b else np.zeros(1)
+            below = shifts[np.clip(bounds, None, extent_b - 1)] if extent_b else np.zeros(1)
+            along = np.stack([np.minimum(above, below), bounds, np.maximum(above, below) + extent_a, bounds], axis=1)
+            starts = (shifts[:, None] + np.arange(extent_a + 1)[None, :]).ravel()
+            lines = np.repeat(np.arange(extent_b), extent_a + 1)
+            across = np.stack([starts, lines, starts, lines + 1], axis=1)
+            segments = np.concatenate([along, across]).astype(float)
+        if self.axis == "columns":
+            segments = segments[:, [1, 0, 3, 2]]
+        return segments * cell_size
+
+    def block_outline(self, x: int, y: int, width: int, height: int, cell_size: float) -> np.ndarray:
+        """Polígono (puntos x, y en escena) que contornea un bloque de celdas respetando el desplazamiento."""
+        a0, b0 = self._swap(x, y); extent_a, extent_b = self._swap(width, height)
+        shifts = self.shift(b0 + np.arange(extent_b)).tolist()
+        right, left = [], []
+        for line, shift in enumerate(shifts, start=b0):   # Solo las esquinas donde cambia el desplazamiento
+            if line == b0 or shift != previous:
+                if line > b0: right.append((a0 + extent_a + previous, line)); left.append((a0 + previous, line))
+                right.append((a0 + extent_a + shift, line)); left.append((a0 + shift, line))
+            previous = shift
+        if shifts:
+            right.append((a0 + extent_a + shifts[-1], b0 + extent_b)); left.append((a0 + shifts[-1], b0 + extent_b))
+        left.reverse()
+        points = np.array(left[-1:] + right + left[:-1], dtype=float).reshape(-1, 2) # Desde la esquina superior izquierda, en sentido horario
+        if self.axis == "columns":
+            points = points[:, ::-1]
+        return points * cell_size
+
+
+class SquareLayout(CellLayout):
+    """Cuadrícula regular (telar, square stitch)."""
+
+
+class BrickLayout(CellLayout):
+    """Brick: las filas impares se desplazan media cuenta a la derecha."""
+    name = "Brick"
+    axis = "rows"
+    max_shift = 0.5
+
+    def shift(self, lines):
+        return np.where(np.asarray(lines) % 2 != 0, 0.5, 0.0)
+
+
+class PeyoteLayout(CellLayout):
+    """Peyote: las columnas impares bajan media cuenta."""
+    name = "Peyote"
+    axis = "columns"
+    max_shift = 0.5
+
+    def shift(self, lines):
+        return np.where(np.asarray(lines) % 2 != 0, 0.5, 0.0)
+
+
+class HerringboneLayout(CellLayout):
+    """Herringbone: columnas por parejas; cada segunda pareja baja media cuenta."""
+    name = "Herringbone"
+    axis = "columns"
+    max_shift = 0.5
+
+    def shift(self, lines):
+        return np.where(np.asarray(lines) // 2 % 2 != 0, 0.5, 0.0)
+
+
+LAYOUTS: dict[str, CellLayout] = {layout.name: layout for layout in (SquareLayout(), PeyoteLayout(), BrickLayout(), HerringboneLayout())}
+GRID_TYPES = list(LAYOUTS)
+LEGACY_GRID_TYPES = {"Peyote/Brick": "Brick"}   # Diseños guardados por versiones anteriores
+
+
+def get_layout(grid_type: str) -> CellLayout:
+    """Disposición de un tipo de cuadrícula (los nombres antiguos se traducen; los desconocidos son Square)."""
+    return LAYOUTS.get(LEGACY_GRID_TYPES.get(grid_type, grid_type), LAYOUTS["Square"])
+
+
+def connected_region(layout: CellLayout, indices: np.ndarray, x: int, y: int, wrap: bool = False,
+                     accept: np.ndarray | None = None) -> np.ndarray:
+    """
+    Índices planos (y * ancho + x) de la región conexa del mismo índice que
+    contiene (x, y), según la tabla de vecinos de la disposición. Se expande
+    por frentes completos con numpy, no celda a celda. 'accept' (booleano por
+    índice de entrada) sustituye la igualdad exacta: la región crece por las
+    celdas cuyo índice es aceptado (relleno con tolerancia).
+    """
+    height, width = indices.shape
+    flat = indices.ravel(); table = layout.neighbors(width, height, wrap)
+    start = y * width + x
+    if accept is None: accept = np.arange(int(flat.max()) + 1) == flat[start]
+    region = np.zeros(flat.size, dtype=bool); region[start] = True
+    frontier = np.array([start], dtype=np.intp)
+    while frontier.size:
+        candidates = table[frontier].ravel()
+        candidates = candidates[candidates >= 0]
+        candidates = np.unique(candidates[~region[candidates] & accept[flat[candidates]]])
+        region[candidates] = True
+        frontier = candidates
+    return np.flatnonzero(region)
@@ -0,0 +1,232 @@
+# utils/grid_render.py
+# Dibujo de la cuadrícula de cuentas independiente del widget (reutilizable
+# desde hilos de trabajo: solo usa QPainter sobre QImage y datos copiados).
+
+import numpy as np
+from PyQt6.QtGui import QPainter, QImage, QPixmap, QColor, QPen, QBrush, QRadialGradient
+from PyQt6.QtCore import Qt, QPointF, QRectF, QLineF
+
+from utils.geometry import CellLayout
+from utils.jobs import Job
+
+CANVAS_BACKGROUND = "#e0e0e0"
+GRID_LINE_COLOR = "#b0b0b0"
+PAINT_ROW_CHUNK = 16   # Filas por bloque en paint_beads (progreso/cancelación entre bloques)
+
+
+def snapshot_palette(entries: list) -> list[tuple[QColor, bool] | None]:
+    """Copia (color, brillante) de cada entrada: segura para leer desde otro hilo."""
+    return [None] + [(QColor(entry.color), entry.is_shiny()) for entry in entries[1:]]
+
+
+def bead_brush(cell_rect: QRectF, color: QColor) -> QBrush:
+    """Degradado radial de los acabados brillantes."""
+    grad = QRadialGradient(cell_rect.topLeft(), cell_rect.width())
+    grad.setCenter(cell_rect.topLeft() + QPointF(cell_rect.width() * 0.3, cell_rect.height() * 0.3))
+    grad.setFocalPoint(cell_rect.topLeft() + QPointF(cell_rect.width() * 0.1, cell_rect.height() * 0.1))
+    grad.setColorAt(0.0, color.lighter(150))
+    grad.setColorAt(0.7, color)
+    grad.setColorAt(1.0, color.darker(110))
+    return QBrush(grad)
+
+
+def paint_beads(painter: QPainter, indices: np.ndarray, palette: list, cell_size: float, layout: CellLayout, job=None):
+    """
+    Dibuja las cuentas (sin líneas) en los orígenes precalculados de la
+    disposición. 'job' permite cancelar e informar progreso entre bloques de filas.
+    """
+    rows, columns = indices.shape
+    origin_x, origin_y = layout.origins(columns, rows, cell_size)
+    for start in range(0, rows, PAINT_ROW_CHUNK):
+        if job is not None: job.report_progress(start * 100 // rows)
+        block = indices[start:start + PAINT_ROW_CHUNK]
+        ys, xs = np.nonzero(block); ys += start
+        _fill_beads(painter, origin_x[ys, xs], origin_y[ys, xs], indices[ys, xs], palette, cell_size)
+
+
+def _fill_beads(painter: QPainter, lefts: np.ndarray, tops: np.ndarray, indices: np.ndarray, palette: list, cell_size: float):
+    for left, top, index in zip(lefts.tolist(), tops.tolist(), indices.tolist()):
+        color, shiny = palette[index]
+        cell_rect = QRectF(left, top, cell_size, cell_size)
+        if shiny:
+            painter.setBrush(bead_brush(cell_rect, color))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.drawRect(cell_rect)
+        else:
+            painter.fillRect(cell_rect, color)
+
+
+def paint_block(painter: QPainter, block: np.ndarray, x0: int, y0: int, palette: list, cell_size: float, layout: CellLayout,
+                grid_width: int, grid_height: int):
+    """
+    Dibuja un bloque de índices con su esquina en la celda (x0, y0) (capa
+    flotante): solo las celdas que caen dentro de la cuadrícula, con el
+    desplazamiento que la disposición da a esas filas/columnas.
+    """
+    rows, columns = block.shape
+    dx, dy = layout.offsets(columns, rows, x0, y0)
+    ys, xs = np.nonzero(block)
+    inside = (xs + x0 >= 0) & (xs + x0 < grid_width) & (ys + y0 >= 0) & (ys + y0 < grid_height)
+    ys, xs = ys[inside], xs[inside]
+    _fill_beads(painter, (x0 + xs + dx[ys, xs]) * cell_size, (y0 + ys + dy[ys, xs]) * cell_size, block[ys, xs], palette, cell_size)
+
+
+def grid_line_segments(grid_width: int, grid_height: int, cell_size: float, layout: CellLayout) -> list[QLineF]:
+    """Segmentos de la cuadrícula (CellLayout.line_segments) como QLineF, para un único drawLines."""
+    return [QLineF(*segment) for segment in layout.line_segments(grid_width, grid_height, cell_size).tolist()]
+
+
+def grid_pen() -> QPen:
+    pen = QPen(QColor(GRID_LINE_COLOR), 1); pen.setCosmetic(True)
+    return pen
+
+
+def paint_grid_lines(painter: QPainter, grid_width: int, grid_height: int, cell_size: float, layout: CellLayout) -> int:
+    """Dibuja las líneas de la cuadrícula (lápiz cosmético de 1px) en un solo drawLines. Devuelve los segmentos."""
+    segments = grid_line_segments(grid_width, grid_height, cell_size, layout)
+    painter.setPen(grid_pen()); painter.drawLines(segments)
+    return len(segments)
+
+
+class GridLineLayer:
+    """
+    Capa de líneas de la cuadrícula para el lienzo.
+
+    Los segmentos se calculan una vez por geometría (tipo, tamaño, tamaño de
+    celda) como un array (N x 4) con su caja envolvente; en cada frame solo
+    se dibujan los que cruzan la zona visible. Nada se rasteriza al tamaño de
+    la cuadrícula ampliada, así que la memoria no crece con el zoom y el
+    coste por frame depende de lo que se ve, no del diseño entero.
+    """
+    def __init__(self):
+        self._segments_key: tuple | None = None
+        self._segments: np.ndarray = np.zeros((0, 4))
+        self._bounds: np.ndarray = np.zeros((0, 4)) # (x mín, y mín, x máx, y máx) de cada segmento
+
+    def segments(self, grid_width: int, grid_height: int, cell_size: float, layout: CellLayout) -> np.ndarray:
+        key = (grid_width, grid_height, cell_size, layout)
+        if key != self._segments_key:
+            self._segments = np.asarray(layout.line_segments(grid_width, grid_height, cell_size), dtype=float).reshape(-1, 4)
+            self._bounds = np.concatenate([np.minimum(self._segments[:, :2], self._segments[:, 2:]),
+                                           np.maximum(self._segments[:, :2], self._segments[:, 2:])], axis=1)
+            self._segments_key = key
+        return self._segments
+
+    def paint(self, painter: QPainter, grid_width: int, grid_height: int, cell_size: float, layout: CellLayout,
+              scene_clip: QRectF) -> int:
+        """Dibuja, en coordenadas de escena (pan + zoom ya aplicados), los segmentos que cruzan 'scene_clip'. Devuelve cuántos."""
+        segments = self.segments(grid_width, grid_height, cell_size, layout); bounds = self._bounds
+        visible = ((bounds[:, 2] >= scene_clip.left()) & (bounds[:, 0] <= scene_clip.right()) &
+                   (bounds[:, 3] >= scene_clip.top()) & (bounds[:, 1] <= scene_clip.bottom()))
+        lines = [QLineF(*segment) for segment in segments[visible].tolist()]
+        painter.setPen(grid_pen()); painter.drawLines(lines)
+        return len(lines)
+
+
+def render_grid_image(indices: np.ndarray, palette: list, cell_size: float, layout: CellLayout, job=None) -> QImage:
+    """Renderiza el diseño completo (cuentas + líneas) en un QImage a escala 1."""
+    grid_height, grid_width = indices.shape
+    scene_width, scene_height = layout.scene_size(grid_width, grid_height, cell_size)
+    width = int(scene_width) + 1
+    height = int(scene_height) + 1
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    if image.isNull():
+        raise MemoryError("Failed to allocate image for rendering (possibly too large).")
+    image.fill(QColor(CANVAS_BACKGROUND))
+    painter = QPainter(image)
+    try:
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        paint_beads(painter, indices, palette, cell_size, layout, job)
+        if cell_size > 4:
+            paint_grid_lines(painter, grid_width, grid_height, cell_size, layout)
+    finally:
+        painter.end()
+    return image
+
+
+class RenderGridImageJob(Job):
+    """Renderiza el diseño a un QImage en segundo plano (exportación PNG / vista previa)."""
+    def __init__(self, indices: np.ndarray, palette: list, cell_size: float, layout: CellLayout,
+                 save_path: str | None = None, key: str | None = None):
+        super().__init__(key)
+        self._indices = indices.copy()
+        self._palette = palette
+        self._cell_size = cell_size
+        self._layout = layout
+        self._save_path = save_path
+
+    def run_job(self) -> QImage:
+        image = render_grid_image(self._indices, self._palette, self._cell_size, self._layout, job=self)
+        if self._save_path and not image.save(self._save_path, "PNG"):
+            raise IOError(f"Failed to save PNG file to '{self._save_path}'")
+        return image
+
+
+class BeadImageCache:
+    """
+    Imagen de una cuenta por píxel (nivel de detalle para zoom lejano).
+
+    El QImage comparte memoria con un array numpy, así que las filas
+    modificadas (según BeadGrid.row_revision) se reescriben en su sitio con
+    una tabla de colores ARGB. Un color nuevo solo amplía la tabla: las filas
+    ya escritas no pueden usarlo, así que no se reescriben. Si la disposición
+    desplaza filas (o columnas), cada cuenta ocupa dos píxeles a lo largo de
+    ellas y el desplazamiento de media cuenta es un píxel.
+    """
+    def __init__(self):
+        self.image: QImage | None = None
+        self._pixels: np.ndarray | None = None
+        self._lut = np.array([QColor(CANVAS_BACKGROUND).rgba()], dtype=np.uint32) # Índice 0: fondo
+        self._seen_revision: np.ndarray | None = None
+        self._key: tuple | None = None
+        self._shift_pixels: np.ndarray | None = None   # Desplazamiento en píxeles de cada fila/columna
+
+    def _extend_lut(self, palette: list):
+        """Añade a la tabla ARGB solo los índices nuevos (la tabla de entradas solo crece)."""
+        start = len(self._lut)
+        added = np.array([item[0].rgba() for item in palette[start:]], dtype=np.uint32)
+        self._lut = np.concatenate([self._lut, added])
+
+    def _write_rows(self, indices: np.ndarray, rows: np.ndarray, layout: CellLayout):
+        colors = self._lut[indices[rows]]
+        if layout.axis is None:
+            self._pixels[rows] = colors
+        elif layout.axis == "rows":
+            px = 2 * np.arange(indices.shape[1])[None, :] + self._shift_pixels[rows][:, None]
+            self._pixels[rows[:, None], px] = colors; self._pixels[rows[:, None], px + 1] = colors
+        else:
+            py = 2 * rows[:, None] + self._shift_pixels[None, :]; xs = np.arange(indices.shape[1])[None, :]
+            self._pixels[py, xs] = colors; self._pixels[py + 1, xs] = colors
+
+    def update(self, grid, palette: list, layout: CellLayout) -> QImage:
+        """Devuelve la imagen al día, reescribiendo solo las filas cambiadas desde la última llamada."""
+        height, width = grid.indices.shape
+        key = (width, height, layout)
+        if len(palette) < len(self._lut): # Otra tabla de entradas: se reconstruye y se reescribe todo
+            self._lut = self._lut[:1]; self._key = None
+        if len(palette) > len(self._lut): self._extend_lut(palette)
+        if key != self._key:
+            image_width = width * 2 + 1 if layout.axis == "rows" else width
+            image_height = height * 2 + 1 if layout.axis == "columns" else height
+            self.image = QImage(image_width, image_height, QImage.Format.Format_ARGB32)
+            buffer = self.image.bits(); buffer.setsize(self.image.sizeInBytes())
+            stride = self.image.bytesPerLine() // 4
+            self._pixels = np.frombuffer(buffer, dtype=np.uint32).reshape(image_height, stride)[:, :image_width]
+            self._pixels[:] = self._lut[0] # Huecos del desplazamiento: nunca se reescriben
+            lines = height if layout.axis == "rows" else width
+            self._shift_pixels = (layout.shift(np.arange(lines)) * 2).astype(np.intp)
+            self._seen_revision = np.full(height, -1, dtype=np.int64)
+            self._key = key
+        dirty = np.flatnonzero(grid.row_revision != self._seen_revision)
+        if dirty.size:
+            self._write_rows(grid.indices, dirty, layout)
+            self._seen_revision[dirty] = grid.row_revision[dirty]
+        return self.image
+
+
+def paint_beads_lod(painter: QPainter, cache: BeadImageCache, grid, palette: list, cell_size: float, layout: CellLayout):
+    """Dibuja todas las cuentas con un único drawImage escalado (vecino más cercano)."""
+    image = cache.update(grid, palette, layout)
+    target = QRectF(0.0, 0.0, *layout.scene_size(grid.width, grid.height, cell_size))
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+    painter.drawImage(target, image)
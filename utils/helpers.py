@@ -1,9 +1,10 @@
 # utils/helpers.py
 
 # --- Imports needed for this module ---
+from functools import lru_cache
+
 from PyQt6.QtGui import QPixmap, QIcon, QColor, QPainter
 from PyQt6.QtCore import QSize, Qt
-from PyQt6.QtSvg import QSvgRenderer # Needed for advanced color rendering
 
 # --- SVG Icon Paths ---
 # Good practice: Constants are in UPPER_SNAKE_CASE
@@ -64,6 +65,37 @@ ICON_SELECT_TOOL = """
 </svg>
 """
 
+ICON_LINE_TOOL = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
+  <path fill="none" stroke="currentColor" stroke-width="1.5" stroke-linecap="round" d="M2 14 L14 2"/>
+</svg>
+"""
+
+ICON_RECTANGLE_TOOL = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
+  <path fill="none" stroke="currentColor" stroke-width="1.5" d="M2 3.5h12v9H2z"/>
+</svg>
+"""
+
+ICON_ELLIPSE_TOOL = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
+  <ellipse fill="none" stroke="currentColor" stroke-width="1.5" cx="8" cy="8" rx="6.5" ry="5"/>
+</svg>
+"""
+
+ICON_POLYGON_TOOL = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
+  <path fill="none" stroke="currentColor" stroke-width="1.5" stroke-linejoin="round" d="M8 1.5 L14.5 6.5 L12 14.5 H4 L1.5 6.5 Z"/>
+</svg>
+"""
+
+ICON_WAND_TOOL = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
+  <path fill="none" stroke="currentColor" stroke-width="1.5" stroke-linecap="round" d="M2 14 L10 6"/>
+  <path fill="currentColor" d="M12 0.5 L12.8 2.7 L15 3.5 L12.8 4.3 L12 6.5 L11.2 4.3 L9 3.5 L11.2 2.7 Z"/>
+</svg>
+"""
+
 ICON_COPY = """
 <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-clipboard" viewBox="0 0 16 16">
   <path d="M4 1.5H3a2 2 0 0 0-2 2V14a2 2 0 0 0 2 2h10a2 2 0 0 0 2-2V3.5a2 2 0 0 0-2-2h-1v1h1a1 1 0 0 1 1 1V14a1 1 0 0 1-1 1H3a1 1 0 0 1-1-1V3.5a1 1 0 0 1 1-1h1v-1z"/>
@@ -85,8 +117,29 @@ ICON_PASTE = """
 </svg>
 """
 
+ICON_BEAD_CHART = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" viewBox="0 0 16 16">
+  <path d="M1 2.5a1 1 0 1 1 2 0 1 1 0 0 1-2 0zm0 5.5a1 1 0 1 1 2 0 1 1 0 0 1-2 0zm0 5.5a1 1 0 1 1 2 0 1 1 0 0 1-2 0z"/>
+  <path fill-rule="evenodd" d="M5 2.5a.5.5 0 0 1 .5-.5h9a.5.5 0 0 1 0 1h-9a.5.5 0 0 1-.5-.5zm0 5.5a.5.5 0 0 1 .5-.5h9a.5.5 0 0 1 0 1h-9A.5.5 0 0 1 5 8zm0 5.5a.5.5 0 0 1 .5-.5h9a.5.5 0 0 1 0 1h-9a.5.5 0 0 1-.5-.5z"/>
+</svg>
+"""
+
+ICON_PRINT_CHART = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-printer" viewBox="0 0 16 16">
+  <path d="M2.5 8a.5.5 0 1 0 0-1 .5.5 0 0 0 0 1z"/>
+  <path d="M5 1a2 2 0 0 0-2 2v2H2a2 2 0 0 0-2 2v3a2 2 0 0 0 2 2h1v1a2 2 0 0 0 2 2h6a2 2 0 0 0 2-2v-1h1a2 2 0 0 0 2-2V7a2 2 0 0 0-2-2h-1V3a2 2 0 0 0-2-2H5zM4 3a1 1 0 0 1 1-1h6a1 1 0 0 1 1 1v2H4V3zm1 5a2 2 0 0 0-2 2v1H2a1 1 0 0 1-1-1V7a1 1 0 0 1 1-1h12a1 1 0 0 1 1 1v3a1 1 0 0 1-1 1h-1v-1a2 2 0 0 0-2-2H5zm7 2v3a1 1 0 0 1-1 1H5a1 1 0 0 1-1-1v-3a1 1 0 0 1 1-1h6a1 1 0 0 1 1 1z"/>
+</svg>
+"""
+
+ICON_EXPORT_SVG = """
+<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-bezier2" viewBox="0 0 16 16">
+  <path fill-rule="evenodd" d="M1 2.5A1.5 1.5 0 0 1 2.5 1h1A1.5 1.5 0 0 1 5 2.5h4.134a1 1 0 1 1 0 1h-2.01c.18.18.34.381.484.605.638.992.892 2.354.892 3.895 0 1.993.257 3.092.713 3.7.356.476.895.721 1.787.784A1.5 1.5 0 0 1 12.5 11h1a1.5 1.5 0 0 1 1.5 1.5v1a1.5 1.5 0 0 1-1.5 1.5h-1a1.5 1.5 0 0 1-1.5-1.5H6.866a1 1 0 1 1 0-1h1.711a2.839 2.839 0 0 1-.165-.2C7.743 11.407 7.5 10.007 7.5 8c0-1.46-.246-2.597-.733-3.355-.39-.605-.952-1-1.767-1.112A1.5 1.5 0 0 1 3.5 5h-1A1.5 1.5 0 0 1 1 3.5v-1zM2.5 2a.5.5 0 0 0-.5.5v1a.5.5 0 0 0 .5.5h1a.5.5 0 0 0 .5-.5v-1a.5.5 0 0 0-.5-.5h-1zm10 10a.5.5 0 0 0-.5.5v1a.5.5 0 0 0 .5.5h1a.5.5 0 0 0 .5-.5v-1a.5.5 0 0 0-.5-.5h-1z"/>
+</svg>
+"""
+
 # --- Helper Function ---
 
+@lru_cache(maxsize=None) # Cada icono (SVG + color) se renderiza una sola vez
 def svg_to_qicon(svg_string: str, color: str = "#f8f9fa") -> QIcon:
     """
     Converts an SVG string to a QIcon, applying a color.
@@ -103,6 +156,8 @@ def svg_to_qicon(svg_string: str, color: str = "#f8f9fa") -> QIcon:
     Returns:
         A QIcon generated from the modified SVG.
     """
+    from PyQt6.QtSvg import QSvgRenderer # Import diferido: QtSvg solo se carga al crear el primer icono
+
     # Reemplazar 'currentColor' con el color deseado
     # Esta es la forma más robusta de colorear SVGs que usan 'currentColor'
     colored_svg_string = svg_string.replace('currentColor', color)
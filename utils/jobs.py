@@ -0,0 +1,207 @@
+# utils/jobs.py
+# Subsistema de trabajos en segundo plano sobre QThreadPool.
+
+import threading
+import time
+import traceback
+from abc import ABCMeta, abstractmethod
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se solicitó su cancelación."""
+
+
+class JobSignals(QObject):
+    """
+    Señales de un trabajo. Se emiten desde el hilo de trabajo; JobRunner las
+    recibe en el hilo de la GUI (conexión en cola) antes de llamar a los callbacks.
+    """
+    progress = pyqtSignal(object, int)   # (job, porcentaje 0-100)
+    finished = pyqtSignal(object, object) # (job, resultado)
+    failed = pyqtSignal(object, str)     # (job, mensaje de error)
+    cancelled = pyqtSignal(object)       # (job)
+
+
+class _JobMeta(type(QRunnable), ABCMeta):
+    """QRunnable es un tipo de sip: ABCMeta se combina con su metaclase para poder declarar run_job() abstracto."""
+
+
+class Job(QRunnable, metaclass=_JobMeta):
+    """
+    Trabajo tipado: las subclases implementan run_job() y devuelven el resultado.
+
+    Cancelación cooperativa: run_job() debe llamar periódicamente a
+    check_cancelled() (o report_progress(), que también lo comprueba).
+    Los trabajos con la misma 'key' se coalescen: enviar uno nuevo cancela el anterior.
+    """
+    key: str | None = None
+    cancel_on_exit: bool = True # False para trabajos que deben terminar (p. ej. guardar)
+
+    def __init__(self, key: str | None = None):
+        super().__init__()
+        self.setAutoDelete(False) # JobRunner conserva la referencia hasta que termina
+        if key is not None:
+            self.key = key
+        self.signals = JobSignals()
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event() # Se marca al salir de run(), termine como termine
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, percent: int):
+        self.check_cancelled()
+        self.signals.progress.emit(self, int(percent))
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Espera (desde cualquier hilo) a que el trabajo salga de run(); msecs < 0 espera sin límite."""
+        return self._done_event.wait(None if msecs < 0 else msecs / 1000.0)
+
+    @abstractmethod
+    def run_job(self) -> Any:
+        """Hace el trabajo (en el hilo del pool) y devuelve el resultado."""
+        pass
+
+    def run(self):
+        try:
+            self.check_cancelled()
+            result = self.run_job()
+            self.check_cancelled()
+        except JobCancelled:
+            self.signals.cancelled.emit(self)
+        except OSError as e: # Errores esperables de E/S: solo el mensaje
+            self.signals.failed.emit(self, str(e))
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(self, f"{type(e).__name__}: {e}")
+        else:
+            self.signals.finished.emit(self, result)
+        finally:
+            self._done_event.set()
+
+
+class FunctionJob(Job):
+    """Envuelve una función fn(job) -> resultado como trabajo."""
+    def __init__(self, fn: Callable[["Job"], Any], key: str | None = None):
+        super().__init__(key)
+        self._fn = fn
+
+    def run_job(self) -> Any:
+        return self._fn(self)
+
+
+class JobRunner(QObject):
+    """
+    Lanza trabajos en un QThreadPool y entrega progreso/resultado/error en el
+    hilo de la GUI. Un resultado solo se entrega si su trabajo sigue siendo el
+    vigente para su clave (los trabajos superados se descartan).
+    """
+    job_started = pyqtSignal(object)
+    job_done = pyqtSignal(object)
+
+    def __init__(self, parent: QObject | None = None, pool: QThreadPool | None = None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._running: set[Job] = set()
+        self._current: dict[str, Job] = {}
+        self._callbacks: dict[Job, tuple] = {}
+
+    def submit(self, job: Job, on_finished: Callable[[Any], None] | None = None,
+               on_progress: Callable[[int], None] | None = None,
+               on_failed: Callable[[str], None] | None = None) -> Job:
+        if job.key is not None:
+            previous = self._current.get(job.key)
+            if previous is not None:
+                previous.cancel()
+            self._current[job.key] = job
+        self._callbacks[job] = (on_finished, on_progress, on_failed)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.cancelled.connect(self._on_cancelled)
+        self._running.add(job)
+        self.job_started.emit(job)
+        self._pool.start(job)
+        return job
+
+    def cancel(self, key: str):
+        job = self._current.get(key)
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        for job in list(self._running):
+            job.cancel()
+
+    def shutdown(self, msecs: int = 5000) -> bool:
+        """
+        Cancela lo cancelable y espera a que terminen los trabajos en curso de
+        este lanzador (no los de otros que compartan el pool, p. ej. el global).
+        """
+        for job in list(self._running):
+            if job.cancel_on_exit:
+                job.cancel()
+                if self._pool.tryTake(job): # Aún en cola (p. ej. detrás de trabajos ajenos): no llega a ejecutarse
+                    job._done_event.set(); self._release(job)
+        return self.wait_for_done(msecs)
+
+    def is_busy(self, key: str | None = None) -> bool:
+        if key is None:
+            return bool(self._running)
+        return key in self._current
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Espera a los trabajos propios en curso (msecs < 0: sin límite). Devuelve True si terminaron todos."""
+        deadline = None if msecs < 0 else time.monotonic() + msecs / 1000.0
+        for job in list(self._running):
+            remaining = -1 if deadline is None else max(0, int((deadline - time.monotonic()) * 1000))
+            if not job.wait(remaining): return False
+        return True
+
+    def _is_current(self, job: Job) -> bool:
+        return not job.is_cancelled and (job.key is None or self._current.get(job.key) is job)
+
+    def _release(self, job: Job):
+        self._running.discard(job)
+        self._callbacks.pop(job, None)
+        if job.key is not None and self._current.get(job.key) is job:
+            del self._current[job.key]
+        self.job_done.emit(job)
+
+    @pyqtSlot(object, int)
+    def _on_progress(self, job: Job, percent: int):
+        callbacks = self._callbacks.get(job)
+        if callbacks and callbacks[1] and self._is_current(job):
+            callbacks[1](percent)
+
+    @pyqtSlot(object, object)
+    def _on_finished(self, job: Job, result: Any):
+        callbacks = self._callbacks.get(job)
+        deliver = callbacks and callbacks[0] and self._is_current(job)
+        self._release(job)
+        if deliver:
+            callbacks[0](result)
+
+    @pyqtSlot(object, str)
+    def _on_failed(self, job: Job, message: str):
+        callbacks = self._callbacks.get(job)
+        deliver = callbacks and self._is_current(job)
+        self._release(job)
+        if deliver:
+            if callbacks[2]: callbacks[2](message)
+            else: print(f"Error: background job failed: {message}")
+
+    @pyqtSlot(object)
+    def _on_cancelled(self, job: Job):
+        self._release(job)
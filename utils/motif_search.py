@@ -0,0 +1,58 @@
+# utils/motif_search.py
+# Búsqueda de un motivo (bloque de índices) en la cuadrícula con un hash
+# rodante 2D: cada índice se sustituye por un código aleatorio de 64 bits y
+# cada celda (x, y) pesa Bx^x·By^y, así que la suma de prefijos 2D da el hash
+# de cualquier ventana con cuatro lecturas. Todo en uint64 con desbordamiento
+# modular (2^64); las coincidencias de hash se verifican celda a celda, así
+# que una colisión nunca produce un falso positivo.
+
+import numpy as np
+
+_BASE_X = np.uint64(0x9E3779B97F4A7C15) # Bases impares: invertibles módulo 2^64
+_BASE_Y = np.uint64(0xC2B2AE3D27D4EB4F)
+_CODE_SEED = 0x6D6F746966
+
+
+def transform_block(block: np.ndarray, transform: int) -> np.ndarray:
+    """Transformación 0..7 del grupo del cuadrado: 0-3 giros de 90° horarios, 4-7 el espejo horizontal y sus giros."""
+    return np.rot90(block[:, ::-1] if transform >= 4 else block, -(transform % 4))
+
+
+def motif_variants(motif: np.ndarray, transforms: bool = False) -> list[tuple[int, np.ndarray]]:
+    """(transformación, bloque) del motivo y, con 'transforms', de sus giros y espejos (sin repetir los que coinciden por simetría)."""
+    variants = [(0, motif)]
+    for transform in range(1, 8) if transforms else ():
+        candidate = transform_block(motif, transform)
+        if not any(candidate.shape == known.shape and np.array_equal(candidate, known) for _t, known in variants): variants.append((transform, candidate))
+    return [(transform, np.ascontiguousarray(variant)) for transform, variant in variants]
+
+
+def _powers(base: np.uint64, count: int) -> np.ndarray:
+    powers = np.full(count, base, dtype=np.uint64); powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint64)
+
+
+def find_motif(indices: np.ndarray, variants: list[tuple[int, np.ndarray]]) -> np.ndarray:
+    """
+    Todas las apariciones de las variantes de motif_variants() en 'indices'.
+    Devuelve un array (N x 3) de (x, y, transformación), con (x, y) la
+    esquina superior izquierda; las apariciones pueden solaparse.
+    """
+    height, width = indices.shape
+    codes = np.random.default_rng(_CODE_SEED).integers(0, np.iinfo(np.uint64).max, size=int(max(indices.max(), max(v.max() for _t, v in variants))) + 1,
+                                                       dtype=np.uint64, endpoint=True)
+    power_x, power_y = _powers(_BASE_X, width), _powers(_BASE_Y, height)
+    prefix = np.zeros((height + 1, width + 1), dtype=np.uint64) # Se calcula una vez para todas las variantes
+    prefix[1:, 1:] = (codes[indices] * power_x[None, :] * power_y[:, None]).cumsum(axis=0, dtype=np.uint64).cumsum(axis=1, dtype=np.uint64)
+    found = []
+    for transform, variant in variants:
+        h, w = variant.shape
+        if h > height or w > width: continue
+        window = prefix[h:, w:] - prefix[:-h, w:] - prefix[h:, :-w] + prefix[:-h, :-w] # Hash de la ventana con esquina (x, y), escalado por Bx^x·By^y
+        target = (codes[variant] * power_x[None, :w] * power_y[:h, None]).sum(dtype=np.uint64)
+        ys, xs = np.nonzero(window == target * power_y[:height - h + 1, None] * power_x[None, :width - w + 1])
+        if ys.size:
+            windows = np.lib.stride_tricks.sliding_window_view(indices, (h, w))[ys, xs]
+            exact = (windows == variant).all(axis=(1, 2))
+            found.append(np.stack([xs[exact], ys[exact], np.full(int(exact.sum()), transform)], axis=1))
+    return np.concatenate(found) if found else np.empty((0, 3), dtype=np.intp)
@@ -0,0 +1,194 @@
+# utils/pdf_chart.py
+# Carta de patrón paginada en PDF (QPdfWriter) con símbolos, numeración y leyenda.
+
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt6.QtGui import QPdfWriter, QPainter, QImage, QColor, QPen, QFont, QPageSize, QPageLayout
+from PyQt6.QtCore import Qt, QRectF, QLineF, QMarginsF
+
+from models import BeadGrid
+from utils.bead_chart import build_label_table
+from utils.geometry import CellLayout, get_layout
+
+CHART_DPI = 150           # Unidades de página (y resolución de las páginas raster)
+CELL_INCHES = 0.2         # ~5 mm por cuenta en la carta impresa
+CHART_SYMBOLS = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789abdefghkmnpqrtuwy#@%&+=?<>"
+
+
+class ChartPageLayout:
+    """
+    Geometría de paginación: cuántas filas/columnas caben por página y el
+    rango (filas, columnas) de la cuadrícula que cubre cada página.
+    """
+    def __init__(self, page_width: int, page_height: int, grid_width: int, grid_height: int, cell_layout: CellLayout):
+        self.cell = CHART_DPI * CELL_INCHES
+        self.cell_layout = cell_layout
+        self.label_width = self.cell * 2.0    # Numeración de filas (izquierda)
+        self.header_height = self.cell * 2.5  # Título + numeración de columnas
+        offset_room = self.cell * cell_layout.max_shift # Desplazamiento de media cuenta (filas o columnas)
+        self.cols_per_page = max(1, int((page_width - self.label_width - (offset_room if cell_layout.axis == "rows" else 0.0)) // self.cell))
+        self.rows_per_page = max(1, int((page_height - self.header_height - (offset_room if cell_layout.axis == "columns" else 0.0)) // self.cell))
+        self.page_width, self.page_height = page_width, page_height
+        self.pages = [
+            (r0, min(r0 + self.rows_per_page, grid_height), c0, min(c0 + self.cols_per_page, grid_width))
+            for r0 in range(0, grid_height, self.rows_per_page)
+            for c0 in range(0, grid_width, self.cols_per_page)
+        ]
+
+
+def _symbol_table(grid: BeadGrid, labels: list[dict]) -> tuple[list[str], list[tuple[str, dict, int]]]:
+    """
+    Asigna un símbolo por etiqueta (código o nombre) usada en el diseño.
+    Devuelve (símbolo por índice de entrada, filas de leyenda).
+    """
+    counts = grid.usage.counts
+    symbols = [""] * len(grid.entries)
+    by_label: dict[str, list] = {}
+    # Símbolos únicos: primero un carácter, después pares cuando se agotan
+    glyphs = itertools.chain(CHART_SYMBOLS, ("".join(pair) for pair in itertools.product(CHART_SYMBOLS, repeat=2)))
+    for index in np.argsort(-counts[1:], kind="stable") + 1:
+        if counts[index] == 0: break
+        meta = labels[index]
+        item = by_label.get(meta["label"])
+        if item is None:
+            item = by_label[meta["label"]] = [next(glyphs), meta, 0]
+        item[2] += int(counts[index])
+        symbols[index] = item[0]
+    return symbols, [tuple(item) for item in by_label.values()]
+
+
+def _ink_for(color: QColor) -> QColor:
+    """Negro o blanco según la luminancia del fondo."""
+    luminance = 0.299 * color.red() + 0.587 * color.green() + 0.114 * color.blue()
+    return QColor("#000000") if luminance > 128 else QColor("#ffffff")
+
+
+def _paint_chart_page(painter: QPainter, layout: ChartPageLayout, page_number: int, page_count: int,
+                      block: np.ndarray, r0: int, c0: int, colors: list[QColor | None], symbols: list[str]):
+    """Dibuja una página de la carta a partir de un bloque de índices de la cuadrícula."""
+    cell = layout.cell
+    rows, cols = block.shape
+    painter.fillRect(QRectF(0, 0, layout.page_width, layout.page_height), QColor("#ffffff"))
+
+    title_font = QFont("Arial"); title_font.setPixelSize(int(cell * 0.7))
+    small_font = QFont("Arial"); small_font.setPixelSize(int(cell * 0.45))
+    symbol_font = QFont("Arial"); symbol_font.setPixelSize(int(cell * 0.6)); symbol_font.setBold(True)
+    pair_font = QFont("Arial"); pair_font.setPixelSize(int(cell * 0.42)); pair_font.setBold(True) # Símbolos de dos caracteres
+
+    painter.setPen(QColor("#000000")); painter.setFont(title_font)
+    painter.drawText(QRectF(0, 0, layout.page_width, cell), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                     f"Page {page_number}/{page_count}  —  rows {r0 + 1}-{r0 + rows}, columns {c0 + 1}-{c0 + cols}")
+
+    origin_x = layout.label_width; origin_y = layout.header_height
+    # Numeración de columnas y filas (global, no relativa a la página)
+    painter.setFont(small_font)
+    step = 1 if cell >= 25 else 5
+    for c in range(cols):
+        if (c0 + c + 1) % step == 0 or c == 0:
+            painter.drawText(QRectF(origin_x + c * cell, origin_y - cell, cell, cell), Qt.AlignmentFlag.AlignCenter, str(c0 + c + 1))
+    for r in range(rows):
+        painter.drawText(QRectF(0, origin_y + r * cell, layout.label_width - cell * 0.2, cell),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, str(r0 + r + 1))
+
+    grid_pen = QPen(QColor("#808080")); grid_pen.setWidthF(1.0)
+    painter.setFont(symbol_font)
+    # Desplazamientos y bordes de la disposición, con la paridad global del bloque
+    dx, dy = layout.cell_layout.offsets(cols, rows, c0, r0)
+    for r, row in enumerate(block.tolist()):
+        for c, index in enumerate(row):
+            color = colors[index]
+            if color is not None:
+                cell_rect = QRectF(origin_x + (c + dx[r, c]) * cell, origin_y + (r + dy[r, c]) * cell, cell, cell)
+                painter.fillRect(cell_rect, color)
+                painter.setPen(_ink_for(color)); symbol = symbols[index]
+                painter.setFont(pair_font if len(symbol) > 1 else symbol_font)
+                painter.drawText(cell_rect, Qt.AlignmentFlag.AlignCenter, symbol)
+    segments = layout.cell_layout.line_segments(cols, rows, cell, c0, r0) + [origin_x, origin_y, origin_x, origin_y]
+    painter.setPen(grid_pen); painter.drawLines([QLineF(*segment) for segment in segments.tolist()])
+
+
+def _paint_legend_page(painter: QPainter, layout: ChartPageLayout, items: list, title: str):
+    """Dibuja una página de leyenda: símbolo, muestra, código, nombre, acabado y conteo."""
+    cell = layout.cell; line_height = cell * 1.4
+    painter.fillRect(QRectF(0, 0, layout.page_width, layout.page_height), QColor("#ffffff"))
+    font = QFont("Arial"); font.setPixelSize(int(cell * 0.55)); painter.setFont(font)
+    painter.setPen(QColor("#000000"))
+    painter.drawText(QRectF(0, 0, layout.page_width, cell), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+    for i, (symbol, meta, count) in enumerate(items):
+        y = cell * 1.5 + i * line_height
+        swatch = QRectF(0, y, cell, cell); color = QColor(meta["hex"])
+        painter.fillRect(swatch, color); painter.setPen(_ink_for(color))
+        painter.drawText(swatch, Qt.AlignmentFlag.AlignCenter, symbol)
+        painter.setPen(QColor("#000000")); painter.drawRect(swatch)
+        text = f"{meta['code'] or '—'}   {meta['name']}   ({meta['finish']})   × {count}"
+        painter.drawText(QRectF(cell * 1.5, y, layout.page_width - cell * 1.5, cell), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+
+
+def _render_page_image(layout: ChartPageLayout, page_args: tuple) -> QImage:
+    """Renderiza una página en un QImage (se ejecuta en hilos de trabajo)."""
+    image = QImage(int(layout.page_width), int(layout.page_height), QImage.Format.Format_RGB32)
+    painter = QPainter(image)
+    _paint_chart_page(painter, layout, *page_args)
+    painter.end()
+    return image
+
+
+def export_pdf_chart(file_path: str, grid: BeadGrid, palette_metadata: list[dict], grid_type: str,
+                     raster: bool = False, workers: int | None = None, job=None):
+    """
+    Escribe la carta de patrón en PDF, página a página desde la cuadrícula.
+
+    En modo vectorial cada página se dibuja directamente en el QPdfWriter; en
+    modo raster las páginas se renderizan en paralelo a QImage, en ventanas del
+    tamaño del pool para que la memoria no crezca con el tamaño del diseño.
+    'job' (opcional) recibe el progreso por página y puede cancelar la exportación.
+    """
+    writer = QPdfWriter(file_path)
+    writer.setResolution(CHART_DPI)
+    writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+    writer.setPageMargins(QMarginsF(10, 10, 10, 10), QPageLayout.Unit.Millimeter)
+    writer.setTitle("Beadwork pattern chart")
+    page_rect = writer.pageLayout().paintRectPixels(CHART_DPI)
+
+    layout = ChartPageLayout(page_rect.width(), page_rect.height(), grid.width, grid.height, get_layout(grid_type))
+    labels = build_label_table(grid, palette_metadata)
+    symbols, legend = _symbol_table(grid, labels)
+    colors = [None] + [QColor(entry.color.rgb()) for entry in grid.entries[1:]] # Copias: se leen desde otros hilos
+    legend_per_page = max(1, int((layout.page_height - layout.cell * 1.5) // (layout.cell * 1.4)))
+    legend_pages = [legend[i:i + legend_per_page] for i in range(0, len(legend), legend_per_page)] or [[]]
+    page_count = len(layout.pages) + len(legend_pages)
+
+    def page_args(number, page):
+        r0, r1, c0, c1 = page
+        return (number, page_count, grid.indices[r0:r1, c0:c1].copy(), r0, c0, colors, symbols)
+
+    painter = QPainter(writer)
+    try:
+        started = 0
+        def next_page():
+            nonlocal started
+            if job is not None: job.report_progress(started * 100 // page_count)
+            if started: writer.newPage()
+            started += 1
+
+        numbered_pages = ((i + 1, page) for i, page in enumerate(layout.pages))
+        if raster:
+            workers = workers or min(4, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while True:
+                    window = list(itertools.islice(numbered_pages, workers))
+                    if not window: break
+                    for image in pool.map(lambda item: _render_page_image(layout, page_args(*item)), window):
+                        next_page(); painter.drawImage(QRectF(0, 0, layout.page_width, layout.page_height), image)
+        else:
+            for number, page in numbered_pages:
+                next_page(); _paint_chart_page(painter, layout, *page_args(number, page))
+
+        for i, items in enumerate(legend_pages):
+            next_page()
+            _paint_legend_page(painter, layout, items, f"Legend ({i + 1}/{len(legend_pages)})  —  {grid.width}x{grid.height} beads")
+    finally:
+        painter.end()
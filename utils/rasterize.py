@@ -0,0 +1,103 @@
+# utils/rasterize.py
+# Rasterizado de formas (línea, rectángulo, elipse, polígono) a celdas de la
+# cuadrícula según su disposición: se trabaja con los centros reales de las
+# celdas en la escena, así que en Brick/Peyote/Herringbone las formas siguen
+# el desplazamiento de filas/columnas. Todo se evalúa en bloque con numpy
+# sobre las celdas de la caja envolvente; el resultado son índices planos
+# (y * ancho + x) únicos.
+
+import numpy as np
+
+from utils.geometry import CellLayout
+
+SHAPE_TOOLS = ("line", "rectangle", "ellipse", "polygon")
+
+
+def cell_centers(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float, cells: np.ndarray) -> np.ndarray:
+    """Centros en escena (N x 2) de una lista de celdas (N x 2, columnas x, y)."""
+    origin_x, origin_y = layout.origins(grid_width, grid_height, cell_size)
+    cells = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+    xs = np.clip(cells[:, 0], 0, grid_width - 1); ys = np.clip(cells[:, 1], 0, grid_height - 1)
+    return np.stack([origin_x[ys, xs], origin_y[ys, xs]], axis=1) + cell_size / 2.0
+
+
+def _box_cells(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float,
+               low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Celdas cuyo centro puede caer en la caja [low, high] de la escena: (índices planos, centros N x 2)."""
+    x0 = max(int(np.floor(low[0] / cell_size)) - 1, 0); x1 = min(int(np.ceil(high[0] / cell_size)) + 1, grid_width)
+    y0 = max(int(np.floor(low[1] / cell_size)) - 1, 0); y1 = min(int(np.ceil(high[1] / cell_size)) + 1, grid_height)
+    if x0 >= x1 or y0 >= y1: return np.zeros(0, dtype=np.intp), np.zeros((0, 2))
+    origin_x, origin_y = layout.origins(grid_width, grid_height, cell_size)
+    ys, xs = np.mgrid[y0:y1, x0:x1]
+    centers = np.stack([origin_x[y0:y1, x0:x1].ravel(), origin_y[y0:y1, x0:x1].ravel()], axis=1) + cell_size / 2.0
+    return (ys * grid_width + xs).ravel(), centers
+
+
+def _outline(layout: CellLayout, grid_width: int, grid_height: int, filled: np.ndarray) -> np.ndarray:
+    """
+    Contorno de una región rellena: las celdas con algún vecino (según la
+    disposición) fuera de la región. El borde de la cuadrícula no cuenta como
+    fuera, así que una forma recortada no dibuja una línea en el borde.
+    """
+    if filled.size == 0: return filled
+    inside = np.zeros(grid_width * grid_height, dtype=bool); inside[filled] = True
+    neighbors = layout.neighbors(grid_width, grid_height)[filled]
+    outside = (neighbors >= 0) & ~inside[np.maximum(neighbors, 0)]
+    return filled[outside.any(axis=1)]
+
+
+def rasterize_polyline(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float, points: np.ndarray) -> np.ndarray:
+    """
+    Celdas de una polilínea (N x 2, en escena). Cada tramo se muestrea una vez
+    por celda a lo largo de su eje mayor (DDA), así que la línea sale de una
+    cuenta de grosor.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) > 1:
+        deltas = np.diff(points, axis=0)
+        counts = np.maximum(1, np.ceil(np.abs(deltas).max(axis=1) / cell_size).astype(np.intp))
+        segment = np.repeat(np.arange(len(deltas)), counts)
+        t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / counts[segment]
+        points = np.vstack([points[segment] + deltas[segment] * t[:, None], points[-1:]])
+    xs, ys, inside = layout.cells_at(points[:, 0], points[:, 1], grid_width, grid_height, cell_size)
+    return np.unique(ys[inside] * grid_width + xs[inside])
+
+
+def rasterize_rectangle(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float,
+                        corner_a: np.ndarray, corner_b: np.ndarray, filled: bool) -> np.ndarray:
+    """Rectángulo entre dos centros de celda (en escena): celdas cuyo centro queda dentro, o su contorno."""
+    low = np.minimum(corner_a, corner_b) - 1e-6; high = np.maximum(corner_a, corner_b) + 1e-6
+    cells, centers = _box_cells(layout, grid_width, grid_height, cell_size, low, high)
+    region = cells[((centers >= low) & (centers <= high)).all(axis=1)]
+    return region if filled else _outline(layout, grid_width, grid_height, region)
+
+
+def rasterize_ellipse(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float,
+                      corner_a: np.ndarray, corner_b: np.ndarray, filled: bool) -> np.ndarray:
+    """Elipse inscrita en la caja de las dos celdas esquina (incluidas): celdas con el centro dentro, o su contorno."""
+    low = np.minimum(corner_a, corner_b) - cell_size / 2.0; high = np.maximum(corner_a, corner_b) + cell_size / 2.0
+    center = (low + high) / 2.0; radii = (high - low) / 2.0
+    cells, centers = _box_cells(layout, grid_width, grid_height, cell_size, low, high)
+    region = cells[(((centers - center) / radii) ** 2).sum(axis=1) <= 1.0]
+    return region if filled else _outline(layout, grid_width, grid_height, region)
+
+
+def rasterize_polygon(layout: CellLayout, grid_width: int, grid_height: int, cell_size: float,
+                      vertices: np.ndarray, filled: bool) -> np.ndarray:
+    """
+    Polígono cerrado (vértices N x 2, en escena). El relleno es par-impar por
+    líneas de barrido: para todos los centros de la caja a la vez se cuentan
+    los lados que cruzan su horizontal a la derecha. Los lados siempre se
+    incluyen (con DDA), así que el contorno de un relleno coincide con el trazo.
+    """
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+    edges = rasterize_polyline(layout, grid_width, grid_height, cell_size, np.vstack([vertices, vertices[:1]]))
+    if not filled or len(vertices) < 3: return edges
+    cells, centers = _box_cells(layout, grid_width, grid_height, cell_size, vertices.min(axis=0), vertices.max(axis=0))
+    start = vertices; end = np.roll(vertices, -1, axis=0)
+    px, py = centers[:, 0:1], centers[:, 1:2]
+    straddles = (start[None, :, 1] > py) != (end[None, :, 1] > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = start[:, 0] + (py - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+    inside = (straddles & (crossing_x > px)).sum(axis=1) % 2 == 1
+    return np.union1d(edges, cells[inside])
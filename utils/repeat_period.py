@@ -0,0 +1,58 @@
+# utils/repeat_period.py
+# Periodo de repetición de un diseño: cada columna (o fila) se reduce a un
+# hash de 64 bits con un producto vectorizado, y el menor periodo de la
+# secuencia de hashes sale de la función de prefijos de KMP (n - borde más
+# largo). Cada candidato se confirma comparando las celdas, así que una
+# colisión de hash nunca da un periodo falso.
+
+import numpy as np
+
+_BASE = np.uint64(0x9E3779B97F4A7C15)
+_CODE_SEED = 0x706572696F64
+
+
+def _line_hashes(lines: np.ndarray) -> np.ndarray:
+    """Hash de cada fila de 'lines' (n x m): códigos aleatorios por índice ponderados por potencias de la base."""
+    codes = np.random.default_rng(_CODE_SEED).integers(0, np.iinfo(np.uint64).max, size=int(lines.max()) + 1 if lines.size else 1,
+                                                        dtype=np.uint64, endpoint=True)
+    powers = np.full(lines.shape[1], _BASE, dtype=np.uint64); powers[:1] = 1
+    return (codes[lines] * np.cumprod(powers, dtype=np.uint64)[None, :]).sum(axis=1, dtype=np.uint64)
+
+
+def _prefix_function(sequence: list) -> list[int]:
+    """KMP: border[i] es el mayor borde propio de sequence[:i + 1]."""
+    border = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = border[i - 1]
+        while k and sequence[i] != sequence[k]: k = border[k - 1]
+        border[i] = k + 1 if sequence[i] == sequence[k] else 0
+    return border
+
+
+def minimal_period(indices: np.ndarray, axis: int = 1) -> int:
+    """
+    Menor p tal que las líneas a lo largo de 'axis' se repiten cada p
+    (axis=1: columnas, axis=0: filas); la última repetición puede quedar
+    incompleta. Sin repetición devuelve el tamaño completo.
+    """
+    lines = np.moveaxis(indices, axis, 0).reshape(indices.shape[axis], -1)
+    count = len(lines)
+    if count < 2: return count
+    border = _prefix_function(_line_hashes(lines).tolist())
+    length = border[-1]
+    while length: # Bordes de mayor a menor: periodos de menor a mayor
+        period = count - length
+        if np.array_equal(lines[period:], lines[:-period]): return period
+        length = border[length - 1]
+    return count
+
+
+def repeat_periods(indices: np.ndarray) -> tuple[int, int]:
+    """(periodo en columnas, periodo en filas) de una matriz de índices."""
+    return minimal_period(indices, axis=1), minimal_period(indices, axis=0)
+
+
+def expand_period(block: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Repite un periodo (alto x ancho del periodo) hasta cubrir (height, width)."""
+    period_height, period_width = block.shape
+    return np.tile(block, (-(-height // period_height), -(-width // period_width)))[:height, :width]
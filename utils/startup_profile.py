@@ -0,0 +1,114 @@
+# utils/startup_profile.py
+# Perfilado del arranque (--profile-startup): tiempos de importación por módulo
+# y de construcción por widget/sección, con informe al mostrarse el primer frame.
+
+import importlib.abc
+import sys
+import time
+
+REPORT_TOP = 25   # Módulos mostrados en el informe
+
+_profiler: "StartupProfiler | None" = None
+
+
+def startup_mark(name: str):
+    """
+    Marca el final de una sección de construcción (tiempo desde la marca
+    anterior). Sin perfilado activo solo cuesta una comprobación.
+    """
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """
+    Envuelve el loader real y mide create_module + exec_module (incluye los
+    imports anidados). Las extensiones compiladas (PyQt6, numpy) cargan en
+    create_module, así que ese tiempo también se atribuye al módulo.
+    """
+    def __init__(self, profiler: "StartupProfiler", loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def create_module(self, spec):
+        self._profiler._enter(spec.name)
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._profiler._exit(spec.name)
+
+    def exec_module(self, module):
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    """Delega en el resto de sys.meta_path y envuelve el loader encontrado."""
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"): continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(self._profiler, spec.loader)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: dict[str, list[float]] = {}   # módulo -> [acumulado, propio]
+        self.marks: list[tuple[str, float]] = []
+        self._stack: list[list] = []                 # [módulo, inicio, tiempo de hijos]
+        self._last_mark = self.started
+        self._finder = _TimedFinder(self)
+
+    def install(self):
+        global _profiler
+        _profiler = self
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        global _profiler
+        if self._finder in sys.meta_path: sys.meta_path.remove(self._finder)
+        if _profiler is self: _profiler = None
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        name, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        timing = self.imports.setdefault(name, [0.0, 0.0]) # create_module y exec_module se suman
+        timing[0] += elapsed; timing[1] += elapsed - children
+        if self._stack: self._stack[-1][2] += elapsed
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    def report_lines(self) -> list[str]:
+        total = time.perf_counter() - self.started
+        lines = [f"[startup] first frame after {total * 1000:.0f} ms"]
+        imports = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        lines.append(f"[startup] imports: {len(imports)} modules, slowest by self time (cumulative in parentheses):")
+        for name, (cumulative, own) in imports[:REPORT_TOP]:
+            lines.append(f"  {own * 1000:>8.1f} ms  ({cumulative * 1000:>8.1f} ms)  {name}")
+        lines.append("[startup] construction:")
+        for name, elapsed in self.marks:
+            lines.append(f"  {elapsed * 1000:>8.1f} ms  {name}")
+        return lines
+
+    def write_report(self, file=None):
+        print("\n".join(self.report_lines()), file=file or sys.stderr)
@@ -0,0 +1,68 @@
+# utils/stroke.py
+# Motor de trazos del lápiz: agrupa las muestras de ratón/tableta que llegan
+# dentro de un frame, interpola el camino entre ellas (DDA) y entrega al
+# lienzo un único cambio por frame.
+
+import numpy as np
+from PyQt6.QtCore import QObject, QPointF, QTimer
+
+FRAME_MS = 16          # Las muestras se acumulan como mucho durante un frame (~60 Hz)
+STEP_FRACTION = 0.5    # Paso de interpolación, en celdas: ninguna celda del camino queda sin muestrear
+
+
+def interpolate_path(points: np.ndarray, step: float) -> np.ndarray:
+    """
+    DDA sobre una polilínea (N x 2, en escena): devuelve los puntos de cada
+    tramo espaciados como mucho 'step', más el último punto.
+    """
+    if len(points) < 2:
+        return points
+    deltas = np.diff(points, axis=0)
+    counts = np.maximum(1, np.ceil(np.hypot(deltas[:, 0], deltas[:, 1]) / step).astype(np.intp))
+    segment = np.repeat(np.arange(len(deltas)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / counts[segment]
+    return np.vstack([points[segment] + deltas[segment] * t[:, None], points[-1:]])
+
+
+class StrokeEngine(QObject):
+    """
+    Trazo en curso del lápiz. begin() pinta en el acto; add() solo acumula la
+    muestra y arma un temporizador de un frame; al vencer (o en end()) el
+    camino desde la última muestra aplicada se interpola y se pinta de una vez
+    con canvas._paint_scene_points(). El primer cambio del trazo crea el
+    comando; los siguientes se fusionan con él.
+    """
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self._canvas = canvas
+        self._pending: list[tuple[float, float]] = []
+        self._last: tuple[float, float] | None = None   # Última muestra ya aplicada
+        self._merge = False
+        self.active = False
+        self._timer = QTimer(self); self._timer.setSingleShot(True); self._timer.setInterval(FRAME_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def begin(self, scene_pos: QPointF):
+        self.active = True; self._merge = False; self._last = None
+        self._pending = [(scene_pos.x(), scene_pos.y())]
+        self.flush()
+
+    def add(self, scene_pos: QPointF):
+        if not self.active: return
+        self._pending.append((scene_pos.x(), scene_pos.y()))
+        if not self._timer.isActive(): self._timer.start()
+
+    def end(self):
+        if not self.active: return
+        self.flush()
+        self.active = False; self._last = None
+
+    def flush(self):
+        """Aplica las muestras acumuladas como un solo cambio."""
+        self._timer.stop()
+        if not self._pending: return
+        points = ([self._last] if self._last is not None else []) + self._pending
+        self._last = self._pending[-1]; self._pending = []
+        path = interpolate_path(np.array(points, dtype=float), self._canvas.cell_size * STEP_FRACTION)
+        if self._canvas._paint_scene_points(path[:, 0], path[:, 1], merge=self._merge):
+            self._merge = True
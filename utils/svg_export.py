@@ -0,0 +1,109 @@
+# utils/svg_export.py
+# Exportación SVG vectorial escrita en streaming desde la cuadrícula empaquetada.
+
+import numpy as np
+
+from models import BeadGrid, RowRunCache
+from utils.geometry import get_layout
+
+OUTLINE_STYLE = 'fill="none" stroke="#b0b0b0" stroke-width="1" vector-effect="non-scaling-stroke"'
+
+
+def _fmt(value: float) -> str:
+    """Número compacto para atributos SVG (sin ceros superfluos)."""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def export_svg(file_path: str, grid: BeadGrid, run_cache: RowRunCache, grid_type: str, cell_size: int, outlines: bool = True, job=None):
+    """
+    Escribe el diseño como SVG fila a fila, sin construir el documento en memoria.
+
+    - Los tramos horizontales de cuentas idénticas (RowRunCache) se emiten como
+      un único <rect>.
+    - Los acabados brillantes comparten un <radialGradient> por color en <defs>,
+      envuelto en un <pattern> del tamaño de una cuenta para que el brillo se
+      repita por cuenta dentro de un tramo fusionado.
+    - Si la disposición desplaza filas (Brick) o columnas (Peyote, Herringbone),
+      cada línea desplazada va en un grupo trasladado (los patrones se alinean
+      solos porque heredan la transformación); con columnas desplazadas los
+      tramos se agrupan por columna.
+
+    'job' (opcional) recibe el progreso y puede cancelar la exportación.
+    """
+    cell = float(cell_size)
+    layout = get_layout(grid_type)
+    width, height = layout.scene_size(grid.width, grid.height, cell)
+    entries = grid.entries
+    used = [index for index, count in enumerate(grid.usage.counts) if index and count]
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{_fmt(width)}" height="{_fmt(height)}" '
+                f'viewBox="0 0 {_fmt(width)} {_fmt(height)}" shape-rendering="crispEdges">\n')
+
+        # --- Definiciones compartidas (una por color brillante usado) ---
+        fills: dict[int, str] = {}
+        shiny = [index for index in used if entries[index].is_shiny()]
+        if shiny:
+            f.write("<defs>\n")
+            for index in shiny:
+                color = entries[index].color
+                f.write(f'<radialGradient id="g{index}" cx="0.3" cy="0.3" fx="0.1" fy="0.1" r="1">'
+                        f'<stop offset="0" stop-color="{color.lighter(150).name()}"/>'
+                        f'<stop offset="0.7" stop-color="{color.name()}"/>'
+                        f'<stop offset="1" stop-color="{color.darker(110).name()}"/></radialGradient>\n')
+                f.write(f'<pattern id="p{index}" patternUnits="userSpaceOnUse" width="{_fmt(cell)}" height="{_fmt(cell)}">'
+                        f'<rect width="{_fmt(cell)}" height="{_fmt(cell)}" fill="url(#g{index})"/></pattern>\n')
+                fills[index] = f"url(#p{index})"
+            f.write("</defs>\n")
+        for index in used:
+            fills.setdefault(index, entries[index].color.name())
+
+        if layout.axis == "columns":
+            _write_columns(f, grid, layout, cell, fills, outlines, job)
+        else:
+            _write_rows(f, grid, run_cache, layout, cell, fills, outlines, job)
+        if outlines and layout.axis is None:
+            # Cuadrícula regular: todas las líneas en un solo <path>
+            verticals = "".join(f"M{_fmt(x * cell)} 0v{_fmt(height)}" for x in range(grid.width + 1))
+            horizontals = "".join(f"M0 {_fmt(y * cell)}h{_fmt(width)}" for y in range(grid.height + 1))
+            f.write(f'<path d="{verticals}{horizontals}" {OUTLINE_STYLE}/>\n')
+        f.write("</svg>\n")
+
+
+def _write_rows(f, grid: BeadGrid, run_cache: RowRunCache, layout, cell: float, fills: dict, outlines: bool, job=None):
+    """Filas: un <rect> por tramo (y con filas desplazadas, un <path> de contorno por fila)."""
+    shifts = layout.shift(np.arange(grid.height)).tolist()
+    for y in range(grid.height):
+        if job is not None and y % 64 == 0: job.report_progress(y * 100 // grid.height)
+        starts, lengths, values = run_cache.runs(y)
+        top = _fmt(y * cell)
+        f.write(f'<g transform="translate({_fmt(shifts[y] * cell)} 0)">\n' if shifts[y] else "<g>\n")
+        for start, length, index in zip(starts.tolist(), lengths.tolist(), values.tolist()):
+            if index:
+                f.write(f'<rect x="{_fmt(start * cell)}" y="{top}" width="{_fmt(length * cell)}" height="{_fmt(cell)}" fill="{fills[index]}"/>\n')
+        if outlines and layout.axis is not None:
+            row_width = _fmt(grid.width * cell)
+            verticals = "".join(f"M{_fmt(x * cell)} {top}v{_fmt(cell)}" for x in range(grid.width + 1))
+            f.write(f'<path d="M0 {top}h{row_width}M0 {_fmt((y + 1) * cell)}h{row_width}{verticals}" {OUTLINE_STYLE}/>\n')
+        f.write("</g>\n")
+
+
+def _write_columns(f, grid: BeadGrid, layout, cell: float, fills: dict, outlines: bool, job=None):
+    """Columnas desplazadas: un <rect> por tramo vertical y un <path> de contorno por columna."""
+    shifts = layout.shift(np.arange(grid.width)).tolist()
+    column_height = _fmt(grid.height * cell)
+    for x in range(grid.width):
+        if job is not None and x % 64 == 0: job.report_progress(x * 100 // grid.width)
+        column = grid.indices[:, x]
+        starts = np.concatenate(([0], np.flatnonzero(column[1:] != column[:-1]) + 1)) if column.size else np.zeros(0, dtype=np.intp)
+        lengths = np.diff(np.append(starts, column.size))
+        left = _fmt(x * cell)
+        f.write(f'<g transform="translate(0 {_fmt(shifts[x] * cell)})">\n' if shifts[x] else "<g>\n")
+        for start, length, index in zip(starts.tolist(), lengths.tolist(), column[starts].tolist()):
+            if index:
+                f.write(f'<rect x="{left}" y="{_fmt(start * cell)}" width="{_fmt(cell)}" height="{_fmt(length * cell)}" fill="{fills[index]}"/>\n')
+        if outlines:
+            horizontals = "".join(f"M{left} {_fmt(y * cell)}h{_fmt(cell)}" for y in range(grid.height + 1))
+            f.write(f'<path d="M{left} 0v{column_height}M{_fmt((x + 1) * cell)} 0v{column_height}{horizontals}" {OUTLINE_STYLE}/>\n')
+        f.write("</g>\n")
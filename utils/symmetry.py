@@ -0,0 +1,131 @@
+# utils/symmetry.py
+# Simetría de dibujo: espejos, rotación de orden N, repetición cada K columnas
+# y continuidad en la costura (diseños tubulares). Las imágenes de un lote de
+# celdas se calculan solo para esas celdas (espejos y giros en bloque con
+# numpy), así que la memoria crece con las celdas editadas, no con el número
+# de imágenes por la cuadrícula entera; la repetición usa una tabla por columna.
+
+import numpy as np
+
+from utils.geometry import CellLayout
+
+ROTATION_ORDERS = (1, 2, 3, 4, 6, 8)   # 1 = sin rotación
+
+
+class Symmetry:
+    """
+    Configuración de simetría del lienzo.
+
+    - mirror_horizontal: refleja las columnas (x -> ancho - 1 - x).
+    - mirror_vertical: refleja las filas (y -> alto - 1 - y).
+    - rotation: orden N de la rotación alrededor del centro de la escena. Se
+      rota el centro de cada celda (según la disposición) y se toma la celda
+      resultante: exacto para 2 y 4 en cuadrícula regular, aproximado al
+      vecino más cercano para el resto.
+    - repeat_columns: K > 0 repite el motivo cada K columnas en todo el ancho.
+    - wrap: las imágenes que salen por un lado horizontal entran por el otro
+      (costura de un tubo); el relleno también cruza la costura.
+    """
+    def __init__(self, mirror_horizontal: bool = False, mirror_vertical: bool = False, rotation: int = 1,
+                 repeat_columns: int = 0, wrap: bool = False):
+        self.mirror_horizontal = mirror_horizontal
+        self.mirror_vertical = mirror_vertical
+        self.rotation = rotation
+        self.repeat_columns = repeat_columns
+        self.wrap = wrap
+        self._columns_key: tuple | None = None
+        self._column_table: np.ndarray | None = None    # (traslaciones, ancho): columna o -1
+
+    def settings(self) -> tuple:
+        return (self.mirror_horizontal, self.mirror_vertical, self.rotation, self.repeat_columns, self.wrap)
+
+    def is_identity(self) -> bool:
+        return not (self.mirror_horizontal or self.mirror_vertical or self.rotation > 1 or self.repeat_columns > 0)
+
+    # --- Serialización (JSON del diseño) ---
+    def to_dict(self) -> dict:
+        return {"rotation": self.rotation, "repeat_columns": self.repeat_columns, "wrap": self.wrap}
+
+    def load_dict(self, data: dict):
+        """Carga rotación/repetición/costura (los espejos se guardan aparte, como siempre)."""
+        rotation = int(data.get("rotation", 1))
+        self.rotation = rotation if rotation in ROTATION_ORDERS else 1
+        self.repeat_columns = max(0, int(data.get("repeat_columns", 0)))
+        self.wrap = bool(data.get("wrap", False))
+
+    # --- Tablas ---
+    def _point_images(self, cells: np.ndarray, grid_width: int, grid_height: int, layout: CellLayout, cell_size: float) -> np.ndarray:
+        """
+        Imágenes (imágenes x celdas, índice plano o -1) de un lote de celdas: la
+        primera fila es la identidad, luego los espejos compuestos y después
+        cada rotación de todos ellos.
+        """
+        xs, ys = cells % grid_width, cells // grid_width
+        images = [(xs, ys)]
+        if self.mirror_horizontal: images += [(grid_width - 1 - x, y) for x, y in images]
+        if self.mirror_vertical: images += [(x, grid_height - 1 - y) for x, y in images]
+        if self.rotation > 1:
+            origin_x, origin_y = layout.origins(grid_width, grid_height, cell_size)
+            scene_width, scene_height = layout.scene_size(grid_width, grid_height, cell_size)
+            cx, cy = scene_width / 2.0, scene_height / 2.0
+            centers = [(origin_x[y, x] + cell_size / 2.0 - cx, origin_y[y, x] + cell_size / 2.0 - cy) for x, y in images]
+            rotated = []
+            for step in range(1, self.rotation):
+                angle = 2.0 * np.pi * step / self.rotation; cos, sin = np.cos(angle), np.sin(angle)
+                for px, py in centers:
+                    rx = cx + px * cos - py * sin; ry = cy + px * sin + py * cos
+                    if self.wrap: rx = np.mod(rx, scene_width)
+                    nx, ny, inside = layout.cells_at(rx, ry, grid_width, grid_height, cell_size)
+                    rotated.append((np.where(inside, nx, -1), np.where(inside, ny, -1)))
+            images += rotated
+        table = np.empty((len(images), cells.size), dtype=np.intp)
+        for row, (x, y) in enumerate(images):
+            valid = (x >= 0) & (x < grid_width) & (y >= 0) & (y < grid_height)
+            table[row] = np.where(valid, y * grid_width + x, -1)
+        return table
+
+    def _build_column_table(self, grid_width: int) -> np.ndarray | None:
+        """Traslaciones de la repetición: columna destino de cada columna (fila 0: identidad)."""
+        k = self.repeat_columns
+        if k <= 0 or k >= grid_width: return None
+        if self.wrap: # Alrededor del tubo: K, 2K, ... dando la vuelta una sola vez
+            steps = [k * m for m in range(-(-grid_width // k))]
+            return np.mod(np.arange(grid_width)[None, :] + np.array(steps)[:, None], grid_width)
+        steps = [0] + [sign * k * m for m in range(1, grid_width // k + 1) for sign in (1, -1)]
+        columns = np.arange(grid_width)[None, :] + np.array(steps)[:, None]
+        return np.where((columns >= 0) & (columns < grid_width), columns, -1)
+
+    def _columns(self, grid_width: int) -> np.ndarray | None:
+        """Tabla de la repetición (traslaciones x ancho): solo depende del ancho y de K."""
+        key = (grid_width, self.repeat_columns, self.wrap)
+        if key != self._columns_key:
+            self._column_table = self._build_column_table(grid_width)
+            self._columns_key = key
+        return self._column_table
+
+    # --- Expansión ---
+    def expand(self, cells: np.ndarray, grid_width: int, grid_height: int, layout: CellLayout,
+               cell_size: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Expande un lote de celdas (índices planos) a todas sus imágenes.
+        Devuelve (celdas únicas, posición en 'cells' de la celda origen de cada
+        una); si dos orígenes caen en la misma celda gana el primero (las
+        celdas originales antes que sus imágenes).
+        """
+        cells = np.asarray(cells, dtype=np.intp)
+        if self.is_identity():
+            unique, first = np.unique(cells, return_index=True)
+            return unique, first
+        column_table = self._columns(grid_width)
+        targets = self._point_images(cells, grid_width, grid_height, layout, cell_size)
+        source = np.broadcast_to(np.arange(cells.size), targets.shape)
+        if column_table is not None:
+            valid = targets >= 0
+            rows, columns = targets // grid_width, targets % grid_width
+            moved = column_table[:, columns]
+            targets = np.where(valid & (moved >= 0), rows * grid_width + moved, -1)
+            source = np.broadcast_to(source, targets.shape)
+        targets, source = targets.ravel(), source.ravel()
+        keep = targets >= 0
+        unique, first = np.unique(targets[keep], return_index=True)
+        return unique.astype(np.intp), source[keep][first]
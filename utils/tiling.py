@@ -0,0 +1,33 @@
+# utils/tiling.py
+# Mosaico (sello de repetición): reparte un bloque de índices por un área con
+# desplazamiento de origen, separación, escalonado brick / half-drop y espejo
+# alterno por tesela. Se resuelve con un único gather sobre coordenadas
+# difundidas (broadcast), sin bucles por tesela ni por celda.
+
+import numpy as np
+
+TILE_STEPS = ("None", "Brick", "Half-drop")   # Brick: filas de teselas alternas desplazadas media tesela; Half-drop: columnas
+
+
+def tile_pattern(block: np.ndarray, width: int, height: int, offset_x: int = 0, offset_y: int = 0, gap_x: int = 0, gap_y: int = 0,
+                 step: str = "None", mirror_columns: bool = False, mirror_rows: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mosaico de 'block' sobre un área de (alto, ancho). Devuelve (valores,
+    máscara): la máscara es False en la separación entre teselas (esas celdas
+    no se escriben). (offset_x, offset_y) es la esquina de la primera tesela;
+    con mirror_columns/mirror_rows las teselas de columna/fila impar se
+    voltean horizontal/verticalmente.
+    """
+    tile_height, tile_width = block.shape
+    period_x, period_y = tile_width + max(gap_x, 0), tile_height + max(gap_y, 0)
+    xs = np.arange(width)[None, :] - offset_x; ys = np.arange(height)[:, None] - offset_y
+    if step == "Brick": xs = xs - (ys // period_y) % 2 * (period_x // 2)
+    tile_column = xs // period_x
+    if step == "Half-drop": ys = ys - tile_column % 2 * (period_y // 2)
+    tile_row = ys // period_y
+    u, v = np.broadcast_arrays(xs % period_x, ys % period_y)
+    mask = (u < tile_width) & (v < tile_height)
+    if mirror_columns: u = np.where(tile_column % 2 != 0, tile_width - 1 - u, u)
+    if mirror_rows: v = np.where(tile_row % 2 != 0, tile_height - 1 - v, v)
+    values = block[np.clip(v, 0, tile_height - 1), np.clip(u, 0, tile_width - 1)]
+    return values, mask
@@ -0,0 +1,173 @@
+# utils/watchdog.py
+# Watchdog opcional de bloqueos del bucle de eventos: detecta cuándo el hilo de
+# la GUI deja de procesar eventos, captura su pila de Python y, al salir,
+# resume los bloqueos repetidos agrupados por acción y punto de la pila.
+
+import contextlib
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt6.QtCore import QObject, QTimer
+
+DEFAULT_THRESHOLD_MS = 100
+STACK_LIMIT = 25            # Frames guardados por captura
+SUMMARY_TOP = 10            # Grupos mostrados en el resumen
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_active_watchdog: "StallWatchdog | None" = None
+
+
+@contextlib.contextmanager
+def watch_action(name: str):
+    """
+    Etiqueta explícitamente la acción en curso en el hilo de la GUI. Sin
+    watchdog activo solo cuesta una comprobación. Si no hay etiqueta, la acción
+    se deduce de la pila (el primer slot de la app llamado desde Qt).
+    """
+    watchdog = _active_watchdog
+    if watchdog is None:
+        yield; return
+    watchdog._actions.append(name)
+    try:
+        yield
+    finally:
+        watchdog._actions.pop()
+
+
+def _capture_stack(frame, limit: int = STACK_LIMIT) -> traceback.StackSummary:
+    """
+    Como traceback.extract_stack(), pero tolera frames de otro hilo en plena
+    ejecución, cuyo f_lineno puede ser None: se recupera de f_lasti.
+    """
+    entries = []
+    while frame is not None and len(entries) < limit:
+        code = frame.f_code
+        lineno = frame.f_lineno
+        if lineno is None and frame.f_lasti >= 0:
+            # Instrucciones sin posición propia (p. ej. cachés): la anterior que la tenga
+            positions = list(code.co_positions())[:frame.f_lasti // 2 + 1]
+            lineno = next((position[0] for position in reversed(positions) if position[0] is not None), None)
+        entries.append(traceback.FrameSummary(code.co_filename, lineno or code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    entries.reverse()
+    return traceback.StackSummary.from_list(entries)
+
+
+def _is_app_frame(filename: str) -> bool:
+    return os.path.abspath(filename).startswith(_APP_ROOT) and os.sep + "venv" + os.sep not in filename
+
+
+class StallWatchdog(QObject):
+    """
+    Un QTimer en el hilo de la GUI marca un latido; un hilo daemon comprueba
+    el latido y, si pasa más de 'threshold_ms' sin él, captura la pila del
+    hilo principal con sys._current_frames().
+    """
+    def __init__(self, threshold_ms: int = DEFAULT_THRESHOLD_MS, log_file=None, parent: QObject | None = None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.log_file = log_file or sys.stderr
+        self._interval = max(0.01, self.threshold / 4)
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._actions: list[str] = []
+        self._lock = threading.Lock()
+        self._stall: dict | None = None     # Bloqueo en curso (lo cierra el siguiente latido)
+        self._groups: dict[tuple, dict] = {}
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(int(self._interval * 1000))
+        self._heartbeat.timeout.connect(self._beat)
+
+    # --- Ciclo de vida ---
+    def start(self):
+        global _active_watchdog
+        _active_watchdog = self
+        self._last_beat = time.monotonic()
+        self._heartbeat.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._monitor, name="StallWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el watchdog y escribe el resumen."""
+        global _active_watchdog
+        if self._thread is None: return
+        self._heartbeat.stop()
+        self._stop_event.set(); self._thread.join(timeout=1.0); self._thread = None
+        self._beat() # Cierra un bloqueo pendiente
+        if _active_watchdog is self: _active_watchdog = None
+        self.write_summary()
+
+    # --- Hilo de la GUI ---
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            stall = self._stall; self._stall = None
+            self._last_beat = now
+        if stall is not None:
+            self._finish_stall(stall, now)
+
+    # --- Hilo del watchdog ---
+    def _monitor(self):
+        while not self._stop_event.wait(self._interval):
+            now = time.monotonic()
+            with self._lock:
+                # Se descuenta un intervalo: el latido solo llega cada '_interval'
+                if self._stall is not None or now - self._last_beat - self._interval < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._main_thread_id)
+                if frame is None: continue
+                self._stall = {
+                    "started": time.time() - (now - self._last_beat),
+                    "beat": self._last_beat,
+                    "action": self._actions[-1] if self._actions else None,
+                    "stack": _capture_stack(frame),
+                }
+                del frame
+
+    def _finish_stall(self, stall: dict, now: float):
+        """Registra un bloqueo terminado (en el hilo de la GUI) y lo agrupa."""
+        duration_ms = (now - stall["beat"] - self._interval) * 1000.0
+        stack = stall["stack"]
+        app_frames = [entry for entry in stack if _is_app_frame(entry.filename)]
+        action = stall["action"] or self._action_from_stack(app_frames)
+        hot = app_frames[-1] if app_frames else (stack[-1] if stack else None)
+        location = f"{os.path.relpath(hot.filename, _APP_ROOT)}:{hot.lineno} in {hot.name}" if hot else "<unknown>"
+        function = f"{os.path.relpath(hot.filename, _APP_ROOT)} in {hot.name}" if hot else "<unknown>"
+
+        stamp = time.strftime("%H:%M:%S", time.localtime(stall["started"]))
+        print(f"[watchdog {stamp}] GUI thread stalled {duration_ms:.0f} ms during '{action}' at {location}", file=self.log_file)
+        print("".join(traceback.format_list(stack)).rstrip(), file=self.log_file)
+
+        # Se agrupa por acción y función (no por línea): un mismo bucle se muestrea en líneas distintas
+        group = self._groups.setdefault((action, function), {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "location": location})
+        group["count"] += 1; group["total_ms"] += duration_ms
+        if duration_ms > group["max_ms"]: group["max_ms"] = duration_ms; group["location"] = location
+
+    @staticmethod
+    def _action_from_stack(app_frames: list) -> str:
+        """El primer frame de la app tras main.py es el slot que Qt invocó."""
+        for entry in app_frames:
+            if entry.name != "<module>":
+                return entry.name
+        return "<event loop>"
+
+    # --- Informe ---
+    def summary_lines(self) -> list[str]:
+        if not self._groups:
+            return [f"[watchdog] No GUI stalls over {self.threshold * 1000:.0f} ms."]
+        groups = sorted(self._groups.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        total = sum(group["count"] for _, group in groups)
+        lines = [f"[watchdog] {total} GUI stalls over {self.threshold * 1000:.0f} ms in {len(groups)} code paths:"]
+        for (action, _function), group in groups[:SUMMARY_TOP]:
+            lines.append(f"  {group['count']:>4}x  total {group['total_ms']:>8.0f} ms  max {group['max_ms']:>6.0f} ms  {action}  @ {group['location']}")
+        return lines
+
+    def write_summary(self):
+        print("\n".join(self.summary_lines()), file=self.log_file)
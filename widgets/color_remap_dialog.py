@@ -0,0 +1,83 @@
+# widgets/color_remap_dialog.py
+
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QFormLayout, QLabel, QComboBox, QSpinBox, QCheckBox, QDialogButtonBox
+from PyQt6.QtGui import QPixmap, QIcon
+
+from models import BeadColorEntry
+
+
+class ColorRemapDialog(QDialog):
+    """
+    Picks the two colors for a global replace ("replace A with B everywhere")
+    or swap. Sources are the colors used in the design; targets also include
+    the palette, and a replace can target "Empty" to erase. colors() returns
+    (source entry, target entry or None).
+    """
+    SWATCH_SIZE = 14
+
+    def __init__(self, used: list[tuple[BeadColorEntry, int]], palette: list[BeadColorEntry], swap: bool = False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Swap Colors" if swap else "Replace Color")
+        self._sources = [entry for entry, _count in used]
+        known = {entry.color.name() for entry in self._sources}
+        self._targets = self._sources + [entry for entry in palette if entry.color.name() not in known]
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Swap two colors across all unlocked layers." if swap else "Replace a color across all unlocked layers."))
+        form = QFormLayout()
+        self.source = QComboBox(); self.target = QComboBox()
+        for entry, count in used: self.source.addItem(self._swatch(entry), f"{self._label(entry)}  ({count} beads)")
+        if not swap: self.target.addItem("Empty (erase)")
+        for entry in self._targets: self.target.addItem(self._swatch(entry), self._label(entry))
+        self._target_offset = 0 if swap else 1
+        if self.target.count() > self._target_offset + 1: self.target.setCurrentIndex(self._target_offset + 1)
+        form.addRow("Swap:" if swap else "Replace:", self.source); form.addRow("With:", self.target)
+        layout.addLayout(form)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(self.accept); button_box.rejected.connect(self.reject)
+        button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(bool(self._sources))
+        layout.addWidget(button_box)
+
+    def _swatch(self, entry: BeadColorEntry) -> QIcon:
+        pixmap = QPixmap(self.SWATCH_SIZE, self.SWATCH_SIZE); pixmap.fill(entry.color)
+        return QIcon(pixmap)
+
+    @staticmethod
+    def _label(entry: BeadColorEntry) -> str:
+        return f"{entry.code} {entry.name}" if entry.code else entry.name
+
+    def colors(self) -> tuple[BeadColorEntry, BeadColorEntry | None]:
+        target = self.target.currentIndex() - self._target_offset
+        return self._sources[self.source.currentIndex()], self._targets[target] if target >= 0 else None
+
+# --- Fin de la clase ColorRemapDialog ---
+
+
+class ReduceColorsDialog(QDialog):
+    """
+    Options for reducing the design to N colors: the target count and whether
+    each cluster snaps to the nearest catalog bead instead of the closest
+    color already in the design. options() returns (count, snap_to_catalog).
+    """
+    def __init__(self, used_count: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Reduce Colors")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"The design uses {used_count} colors. Similar colors are merged, weighted by bead count."))
+        form = QFormLayout()
+        self.count = QSpinBox(); self.count.setRange(1, max(used_count, 1)); self.count.setValue(max(1, min(12, used_count - 1)))
+        form.addRow("Target colors:", self.count)
+        layout.addLayout(form)
+        self.snap = QCheckBox("Snap to the nearest catalog bead (Miyuki Delica)")
+        layout.addWidget(self.snap)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(self.accept); button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def options(self) -> tuple[int, bool]:
+        return self.count.value(), self.snap.isChecked()
+
+# --- Fin de la clase ReduceColorsDialog ---
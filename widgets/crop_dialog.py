@@ -7,6 +7,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QImage, QPixmap, QMouseEvent, QResizeEvent # Added QResizeEvent
 from PyQt6.QtCore import Qt, QRect, QPoint, QSize, QEvent # Added QEvent
 
+from utils.jobs import FunctionJob, JobRunner
+
 # --- CropDialog class definition goes below ---
 class CropDialog(QDialog):
     """
@@ -24,6 +26,7 @@ class CropDialog(QDialog):
         self.original_image: QImage = original_image
         self.original_pixmap: QPixmap = QPixmap.fromImage(self.original_image)
         self.scaled_pixmap: QPixmap | None = None # Will hold the currently displayed pixmap
+        self.jobs = JobRunner(self) # Smooth rescaling runs off the GUI thread
 
         self.origin_point: QPoint = QPoint() # Start point for rubber band drag
         self.selection_rect: QRect = QRect() # Current selection rectangle in widget coords
@@ -70,14 +73,28 @@ class CropDialog(QDialog):
 
         if not self.image_label.size().isValid(): return # Avoid scaling if size is invalid
 
-        # Scale original_pixmap to fit the current image_label size
+        # Show a fast (nearest-neighbour) scale right away...
+        target_size = self.image_label.size()
         self.scaled_pixmap = self.original_pixmap.scaled(
-            self.image_label.size(),
+            target_size,
             Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
+            Qt.TransformationMode.FastTransformation
         )
         self.image_label.setPixmap(self.scaled_pixmap)
 
+        # ...and replace it with a smooth one computed in the background.
+        # Resizes coalesce on the same key, so only the last size is delivered.
+        image = self.original_image
+        job = FunctionJob(lambda job: image.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio,
+                                                   Qt.TransformationMode.SmoothTransformation), key="crop-scale")
+        self.jobs.submit(job, on_finished=lambda scaled: self._set_smooth_pixmap(target_size, scaled))
+
+    def _set_smooth_pixmap(self, target_size: QSize, scaled: QImage):
+        """Installs a background-scaled image if the label has not been resized since."""
+        if target_size != self.image_label.size() or scaled.isNull(): return
+        self.scaled_pixmap = QPixmap.fromImage(scaled)
+        self.image_label.setPixmap(self.scaled_pixmap)
+
     def mousePressEvent(self, event: QMouseEvent):
         """Starts the rubber band selection when the left mouse button is pressed."""
         if event.button() == Qt.MouseButton.LeftButton:
@@ -183,4 +200,9 @@ class CropDialog(QDialog):
         # 6. Perform the crop on the *original* image and return the result
         return self.original_image.copy(final_crop_rect)
 
+    def done(self, result: int):
+        """Drops any pending rescale before the dialog closes."""
+        self.jobs.shutdown()
+        super().done(result)
+
 # --- Fin de la clase CropDialog ---
\ No newline at end of file
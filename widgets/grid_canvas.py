@@ -2,19 +2,37 @@
 
 from PyQt6.QtWidgets import QWidget, QSizePolicy, QRubberBand 
 from PyQt6.QtGui import (
-    QColor, QPainter, QPen, QBrush, QMouseEvent, QWheelEvent, QTransform,
-    QRadialGradient
+    QColor, QPainter, QPen, QMouseEvent, QWheelEvent, QTabletEvent, QKeyEvent, QTransform, QPixmap, QPolygonF
 ) 
 from PyQt6.QtCore import (
-    Qt, QPointF, QPoint, QRectF, pyqtSignal, QRect, QSize 
+    Qt, QPointF, QPoint, QRectF, QLineF, pyqtSignal, QRect, QSize, QTimer, QEvent 
 )
 
+import time
+
+import numpy as np
+
 # --- Import Command classes ---
-from commands import Command, PaintCommand, SelectionCommand
+from commands import Command, PaintCommand, SelectionCommand, FloatCommand, DiffCommand, RemapCommand, ResizeCommand, LayerCommand
+from utils.grid_render import (
+    paint_beads, paint_beads_lod, paint_block, grid_pen, snapshot_palette, BeadImageCache, GridLineLayer, CANVAS_BACKGROUND
+)
+from utils.diagnostics import CanvasDiagnostics
+from utils.geometry import CellLayout, get_layout, connected_region
+from utils.stroke import StrokeEngine
+from utils.symmetry import Symmetry
+from utils.floating import FloatingSelection
+from utils.tiling import tile_pattern
+from utils.motif_search import motif_variants, find_motif, transform_block
+from utils.repeat_period import repeat_periods
+from utils.color_math import hex_to_rgb, rgb_to_lab, entry_lab_table, ciede2000, merge_near_duplicates, weighted_kmeans
+from utils.rasterize import (
+    SHAPE_TOOLS, cell_centers, rasterize_polyline, rasterize_rectangle, rasterize_ellipse, rasterize_polygon
+)
 
 # --- Importar BeadColorEntry desde models.py ---
 try:
-    from models import BeadColorEntry
+    from models import BeadColorEntry, BeadGrid, GridLayer, RowRunCache, pack_hex_grid, unpack_hex_grid
 except ImportError:
     print("FATAL: Cannot import BeadColorEntry in GridCanvas.")
     class BeadColorEntry:
@@ -29,8 +47,14 @@ ERASER_ENTRY = BeadColorEntry(QColor(0, 0, 0, 0), finish="Eraser", name="Eraser"
 class GridCanvas(QWidget):
     undo_redo_changed = pyqtSignal(bool, bool) 
     selection_changed = pyqtSignal(bool, bool) 
+    usage_changed = pyqtSignal() # Los conteos de cuentas por color cambiaron
+    layers_changed = pyqtSignal() # La pila de capas, la activa o sus banderas cambiaron
+    grid_size_changed = pyqtSignal(int, int) # Un redimensionado (o su deshacer) cambió el tamaño
 
     MIN_ZOOM = 0.1; MAX_ZOOM = 5.0; ZOOM_STEP = 1.2
+    LOD_CELL_PIXELS = 4 # Por debajo de este tamaño (px de dispositivo) las cuentas se dibujan como una imagen
+    GESTURE_IDLE_MS = 150 # Sin rueda/arrastre durante este tiempo, el gesto termina y se re-renderiza nítido
+    SHAPE_PREVIEW_CELLS = 20000 # Con más celdas visibles la vista previa de una forma muestra solo la guía
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -38,13 +62,17 @@ class GridCanvas(QWidget):
         self.grid_height: int = 10
         self.cell_size: int = 12
         self.grid_type: str = "Square"
+        self.cell_layout: CellLayout = get_layout(self.grid_type) # Orígenes, mapeo y vecinos de cada tipo de puntada
         
-        self.grid_data: list[list[BeadColorEntry | None]] = self._create_grid(self.grid_width, self.grid_height)
+        self.grid_data: BeadGrid = BeadGrid(self.grid_width, self.grid_height)
+        self.row_runs: RowRunCache = RowRunCache(self.grid_data) # RLE por fila (word chart / exportaciones)
+        self._render_palette: list = []
+        self._lod_image = BeadImageCache() # Una cuenta por píxel para el zoom lejano
+        self._grid_lines = GridLineLayer()   # Segmentos de las líneas, cacheados por geometría (se dibujan los visibles)
         
         self.current_tool: str = "pencil" 
         self.current_entry: BeadColorEntry = ERASER_ENTRY 
-        self.mirror_mode_horizontal: bool = False
-        self.mirror_mode_vertical: bool = False
+        self.symmetry = Symmetry() # Espejos, rotación, repetición y costura (lápiz, relleno, pegado)
         
         self.zoom_factor: float = 1.0
         self.pan_offset: QPointF = QPointF(0.0, 0.0) 
@@ -52,22 +80,53 @@ class GridCanvas(QWidget):
         
         self.undo_stack: list[Command] = []
         self.redo_stack: list[Command] = []
-        self._is_dragging_paint = False 
+        self._stroke = StrokeEngine(self) # Trazo del lápiz: muestras agrupadas por frame e interpoladas
         
         self.selection_rect: QRect | None = None 
+        self.selection_mask: np.ndarray | None = None # Selección de la varita: celdas (índices planos); selection_rect es su caja
         self.selection_origin: QPoint | None = None 
         self.rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self)
         
-        self.clipboard_data: list[list[BeadColorEntry | None]] | None = None 
+        self.clipboard_data: np.ndarray | None = None # Bloque de índices (la tabla de entradas solo crece: siguen siendo válidos)
+        
+        # Tolerancia del relleno y la varita mágica: ΔE00 respecto a la semilla, sobre una tabla Lab por entrada
+        self.fill_tolerance: float = 0.0
+        self.fill_contiguous: bool = True # False: todas las celdas parecidas de la cuadrícula
+        self._entry_lab: np.ndarray | None = None
+        
+        # Búsqueda de motivo: apariciones (x, y, transformación) del motivo buscado, que se resaltan hasta limpiarlas
+        self.motif_matches: np.ndarray | None = None
+        self._motif: np.ndarray | None = None
+        self._repeat_cache: tuple[int, tuple[int, int]] | None = None # (revisión, periodos) del compuesto
+        
+        # Selección flotante (mover/voltear/girar/escalar): la cuadrícula no cambia hasta commit_floating()
+        self.floating: FloatingSelection | None = None
+        self._float_grab: tuple[int, int] | None = None # Celda agarrada, relativa a la esquina del bloque
+        self._overlay_base: tuple | None = None # (pixmap, rect visible, clave, líneas): la escena sin capas superpuestas
+        
+        # Herramientas de forma: vértices (celdas; el último sigue al ratón) y vista previa (índices planos)
+        self.shape_filled: bool = False
+        self._shape_points: list[tuple[int, int]] = []
+        self._shape_preview: np.ndarray | None = None
+        
+        self.diagnostics: CanvasDiagnostics | None = None # Solo se mide con el diagnóstico activado
+        
+        # Modo gesto (zoom/pan continuo): se transforma una instantánea del último render
+        # y la geometría se actualiza al terminar. (pixmap, rect fuente, pan, zoom, clave de escena)
+        self._gesture_snapshot: tuple | None = None
+        self._gesture_idle_timer = QTimer(self); self._gesture_idle_timer.setSingleShot(True); self._gesture_idle_timer.setInterval(self.GESTURE_IDLE_MS)
+        self._gesture_idle_timer.timeout.connect(self._end_gesture)
         
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
+        self.setFocusPolicy(Qt.FocusPolicy.ClickFocus) # Enter/Escape/flechas para la selección flotante
         self._update_canvas_size_hint()
 
     # --- Setters para Propiedades del Canvas ---
     
     def set_grid_type(self, grid_type: str):
-        if self.grid_type != grid_type:
-            self.grid_type = grid_type
+        layout = get_layout(grid_type) # Normaliza nombres antiguos ("Peyote/Brick" -> "Brick")
+        if self.grid_type != layout.name:
+            self.grid_type = layout.name; self.cell_layout = layout
             self._update_canvas_size_hint()
             self.update()
 
@@ -78,15 +137,56 @@ class GridCanvas(QWidget):
             self.update()
 
     def set_grid_size(self, w: int, h: int):
+        """Cuadrícula vacía con un tamaño nuevo y sin historial (inicio, carga); para conservar el diseño, resize_grid()."""
         if self.grid_width != w or self.grid_height != h:
             self.grid_width = w
             self.grid_height = h
-            self.grid_data = self._create_grid(w, h) 
+            self._discard_floating(); self._cancel_shape(); self.clear_motif_matches()
+            self.grid_data.reset(w, h) 
             self._clear_history()
+            self.usage_changed.emit()
             self.clear_selection()
             self._update_canvas_size_hint()
             self.update()
 
+    def resize_grid(self, w: int, h: int, anchor: tuple[int, int] = (0, 0)) -> bool:
+        """
+        Redimensiona conservando el diseño (todas las capas), como un comando
+        que se puede deshacer. 'anchor' indica por eje dónde se queda el
+        contenido (0 = izquierda/arriba, 1 = centro, 2 = derecha/abajo): al
+        crecer se añaden celdas vacías por el otro lado y al encoger se recorta.
+        """
+        if (w, h) == (self.grid_width, self.grid_height): return False
+        if self.floating is not None: self.commit_floating()
+        offset_x = (w - self.grid_width) * anchor[0] // 2; offset_y = (h - self.grid_height) * anchor[1] // 2
+        self._execute_command(ResizeCommand(self, w, h, offset_x, offset_y), merge=False)
+        return True
+
+    def _sync_grid_size(self):
+        """Tras cambiar el tamaño de grid_data: lo que dependía de las coordenadas anteriores se descarta."""
+        self._cancel_shape(); self.clear_motif_matches(); self.clear_selection()
+        self.grid_width, self.grid_height = self.grid_data.width, self.grid_data.height
+        self._update_canvas_size_hint()
+        self.grid_size_changed.emit(self.grid_width, self.grid_height); self.layers_changed.emit()
+        self.update()
+
+    def set_diagnostics_enabled(self, enabled: bool):
+        """Activa/desactiva la superposición de diagnóstico (desactivada no tiene coste)."""
+        if enabled and self.diagnostics is None: self.diagnostics = CanvasDiagnostics()
+        elif not enabled: self.diagnostics = None
+        self.update()
+
+    # Los espejos siguen expuestos como atributos (MainWindow y el formato guardado los usan)
+    @property
+    def mirror_mode_horizontal(self) -> bool: return self.symmetry.mirror_horizontal
+    @mirror_mode_horizontal.setter
+    def mirror_mode_horizontal(self, enabled: bool): self.symmetry.mirror_horizontal = enabled
+
+    @property
+    def mirror_mode_vertical(self) -> bool: return self.symmetry.mirror_vertical
+    @mirror_mode_vertical.setter
+    def mirror_mode_vertical(self, enabled: bool): self.symmetry.mirror_vertical = enabled
+
     # --- Setters de Entrada de Color ---
     def set_current_color(self, color: QColor): 
         pass
@@ -96,22 +196,20 @@ class GridCanvas(QWidget):
         self.set_current_color(entry.color) 
 
     def set_current_tool(self, tool: str):
-        if self.current_tool == "select" and tool != "select":
+        if self.current_tool in ("select", "wand") and tool not in ("select", "wand"):
             self.clear_selection() 
+        self._cancel_shape()
         self.current_tool = tool
-        if tool == "select": self.setCursor(Qt.CursorShape.CrossCursor)
+        if tool in ("select", "wand") or tool in SHAPE_TOOLS: self.setCursor(Qt.CursorShape.CrossCursor)
         elif tool == "pencil": self.setCursor(Qt.CursorShape.ArrowCursor) 
         elif tool == "fill": self.setCursor(Qt.CursorShape.PointingHandCursor) 
         else: self.setCursor(Qt.CursorShape.ArrowCursor) 
     
     # --- Métodos de Lógica Interna ---
-    def _create_grid(self, w: int, h: int) -> list[list[BeadColorEntry | None]]: 
-        return [[None for _ in range(w)] for _ in range(h)]
-    
     def _update_canvas_size_hint(self):
-        base_width_multiplier = self.grid_width + 0.5 if self.grid_type == "Peyote/Brick" else self.grid_width
-        zoomed_width = int(base_width_multiplier * self.cell_size * self.zoom_factor) + 1 
-        zoomed_height = int(self.grid_height * self.cell_size * self.zoom_factor) + 1
+        scene_width, scene_height = self.cell_layout.scene_size(self.grid_width, self.grid_height, self.cell_size)
+        zoomed_width = int(scene_width * self.zoom_factor) + 1 
+        zoomed_height = int(scene_height * self.zoom_factor) + 1
         self.setMinimumSize(zoomed_width, zoomed_height); self.updateGeometry() 
 
     # --- HISTORIAL DE COMANDOS (Undo/Redo) ---
@@ -124,181 +222,435 @@ class GridCanvas(QWidget):
     # --- CORRECCIÓN CRÍTICA v9.4 ---
     def _execute_command(self, command: Command, merge: bool):
         """Ejecuta un comando, lo añade a la pila de deshacer y limpia la pila de rehacer."""
+        diagnostics = self.diagnostics
+        start = time.perf_counter() if diagnostics else 0.0
         
         if merge and self.undo_stack and self.undo_stack[-1].merge_with(command):
-            # BUG FIX:
-            # El comando se fusionó con el anterior (self.undo_stack[-1]).
-            # Ahora, debemos RE-EJECUTAR el comando *fusionado* (el que está en el stack)
-            # para aplicar los cambios *nuevos* al lienzo.
-            self.undo_stack[-1].execute() # <-- Esta línea aplica el cambio fusionado
+            # El comando se fusionó con el anterior (self.undo_stack[-1]): basta con
+            # aplicar los cambios *nuevos* (re-ejecutar el fusionado sería O(trazo) por frame).
+            command.execute()
+            if diagnostics: diagnostics.record_command("merge", self.undo_stack[-1], time.perf_counter() - start)
             
             self.undo_redo_changed.emit(True, False)
+            self.usage_changed.emit()
             # self.update() es llamado por .execute()
             return
         
         # Flujo normal (sin fusionar)
         command.execute()
+        if diagnostics: diagnostics.record_command("execute", command, time.perf_counter() - start)
         self.undo_stack.append(command)
         
         self.redo_stack.clear()
         self.undo_redo_changed.emit(bool(self.undo_stack), bool(self.redo_stack))
+        self.usage_changed.emit()
         
         
     def undo(self):
-        """Deshace la última acción."""
+        """Deshace la última acción (con una selección flotante, la descarta)."""
+        if self.floating is not None:
+            self.cancel_floating(); return
         if not self.undo_stack:
             return
         
         command = self.undo_stack.pop()
+        diagnostics = self.diagnostics
+        start = time.perf_counter() if diagnostics else 0.0
         command.undo()
+        if diagnostics: diagnostics.record_command("undo", command, time.perf_counter() - start)
         self.redo_stack.append(command)
         self.undo_redo_changed.emit(bool(self.undo_stack), bool(self.redo_stack))
+        self.usage_changed.emit()
 
     def redo(self):
         """Rehace la acción deshecha."""
+        if self.floating is not None: self.cancel_floating()
         if not self.redo_stack:
             return
         
         command = self.redo_stack.pop()
+        diagnostics = self.diagnostics
+        start = time.perf_counter() if diagnostics else 0.0
         command.execute()
+        if diagnostics: diagnostics.record_command("redo", command, time.perf_counter() - start)
         self.undo_stack.append(command)
         self.undo_redo_changed.emit(bool(self.undo_stack), bool(self.redo_stack))
+        self.usage_changed.emit()
 
     # --- Pintura (Implementación del brillo) ---
-    def paintEvent(self, event): 
-        painter = QPainter(self); painter.setRenderHint(QPainter.RenderHint.Antialiasing, False) 
-        painter.fillRect(self.rect(), QColor("#e0e0e0")) 
+    def _get_render_palette(self) -> list:
+        """(color, brillante) por índice; la tabla de entradas solo crece, así que se amplía."""
+        if len(self._render_palette) != len(self.grid_data.entries):
+            self._render_palette = snapshot_palette(self.grid_data.entries)
+        return self._render_palette
+
+    def _use_lod(self) -> bool:
+        """Nivel de detalle: con cuentas de pocos píxeles no se dibujan celdas, brillos ni líneas."""
+        return self.cell_size * self.zoom_factor * self.devicePixelRatioF() < self.LOD_CELL_PIXELS
+
+    def _selection_polygon(self, rect: QRect) -> QPolygonF:
+        """Contorno de un bloque de celdas (escalonado si la disposición desplaza filas/columnas)."""
+        outline = self.cell_layout.block_outline(rect.x(), rect.y(), rect.width(), rect.height(), self.cell_size)
+        return QPolygonF([QPointF(x, y) for x, y in outline.tolist()])
+
+    def _paint_scene(self, painter: QPainter, overlay: bool = True) -> int:
+        """
+        Dibuja cuentas, líneas y selección con el zoom/pan actuales. Devuelve las
+        primitivas de línea. Con overlay=False se omiten las capas superpuestas
+        (bloque flotante, vista previa de formas) y la selección: es la base que
+        _paint_overlay_frame guarda en caché.
+        """
         painter.save(); painter.translate(self.pan_offset); painter.scale(self.zoom_factor, self.zoom_factor) 
         
-        for y in range(self.grid_height):
-            x_offset = self.cell_size / 2 if self.grid_type == "Peyote/Brick" and y % 2 != 0 else 0
-            for x in range(self.grid_width):
-                entry = self.grid_data[y][x]
-                
-                if entry: 
-                    cell_rect = QRectF(x * self.cell_size + x_offset, y * self.cell_size, self.cell_size, self.cell_size)
-                    color = entry.color
-                    
-                    if entry.is_shiny():
-                        grad = QRadialGradient(cell_rect.topLeft(), cell_rect.width())
-                        grad.setCenter(cell_rect.topLeft() + QPointF(cell_rect.width() * 0.3, cell_rect.height() * 0.3))
-                        grad.setFocalPoint(cell_rect.topLeft() + QPointF(cell_rect.width() * 0.1, cell_rect.height() * 0.1))
-                        grad.setColorAt(0.0, color.lighter(150)) 
-                        grad.setColorAt(0.7, color)
-                        grad.setColorAt(1.0, color.darker(110)) 
-                        brush = QBrush(grad)
-                        
-                        painter.setBrush(brush)
-                        painter.setPen(Qt.PenStyle.NoPen) 
-                        painter.drawRect(cell_rect)
-                        
-                    else:
-                        painter.fillRect(cell_rect, QBrush(color))
-                        
-        if self.cell_size * self.zoom_factor > 4: 
-            pen = QPen(QColor("#b0b0b0"), 1); pen.setCosmetic(True); painter.setPen(pen)
-            max_x_paint_unscaled = (self.grid_width + (0.5 if self.grid_type == "Peyote/Brick" and self.grid_height % 2 != 0 and self.grid_height > 1 else 0.0)) * self.cell_size
-            max_y_paint_unscaled = float(self.grid_height * self.cell_size)
-            if self.grid_type == "Square":
-                for x_line in range(self.grid_width + 1): px = float(x_line * self.cell_size); painter.drawLine(QPointF(px, 0.0), QPointF(px, max_y_paint_unscaled))
-                for y_line in range(self.grid_height + 1): py = float(y_line * self.cell_size); painter.drawLine(QPointF(0.0, py), QPointF(max_x_paint_unscaled, py))
-            else: 
-                 painter.setBrush(Qt.BrushStyle.NoBrush) 
-                 for y_line in range(self.grid_height):
-                    x_offset_line = self.cell_size / 2.0 if y_line % 2 != 0 else 0.0
-                    for x_line in range(self.grid_width): cell_x_line = x_line * self.cell_size + x_offset_line; cell_y_line = y_line * self.cell_size; painter.drawRect(QRectF(cell_x_line, cell_y_line, self.cell_size, self.cell_size))
+        layout = self.cell_layout
+        lod = self._use_lod()
+        if lod:
+            paint_beads_lod(painter, self._lod_image, self.grid_data, self._get_render_palette(), self.cell_size, layout)
+        else:
+            paint_beads(painter, self.grid_data.indices, self._get_render_palette(), self.cell_size, layout)
+        if self.floating is not None: # En el origen del bloque levantado se ve lo que queda en las demás capas
+            source = self.floating.source
+            painter.setPen(Qt.PenStyle.NoPen); painter.setBrush(QColor(CANVAS_BACKGROUND)); painter.drawPolygon(self._selection_polygon(source))
+            underneath = self.grid_data.read_composite_block(source.x(), source.y(), source.width(), source.height(), skip=self.grid_data.active_layer)
+            paint_block(painter, underneath, source.x(), source.y(), self._get_render_palette(), self.cell_size, layout, self.grid_width, self.grid_height)
+        lines_drawn = 0
+        if not lod and self.cell_size * self.zoom_factor > 4: 
+            lines_drawn = self._grid_lines.paint(painter, self.grid_width, self.grid_height, self.cell_size, layout,
+                                                 self._visible_scene_rect(self.visibleRegion().boundingRect()))
         
-        if self.selection_rect:
+        if overlay and self._has_overlay():
+            self._paint_overlays(painter, self.visibleRegion().boundingRect())
+        elif overlay and self.selection_rect:
+            if self.selection_mask is not None:
+                self._fill_cells(painter, self.selection_mask, QColor(0, 123, 255, 90), self._visible_scene_rect(self.visibleRegion().boundingRect()))
             selection_pen = QPen(QColor("#007bff"), 2); selection_pen.setCosmetic(True); selection_pen.setStyle(Qt.PenStyle.DashLine); painter.setPen(selection_pen); painter.setBrush(Qt.BrushStyle.NoBrush) 
-            rect_f = QRectF(self.selection_rect.x() * self.cell_size, self.selection_rect.y() * self.cell_size, self.selection_rect.width() * self.cell_size, self.selection_rect.height() * self.cell_size)
-            painter.drawRect(rect_f)
+            painter.drawPolygon(self._selection_polygon(self.selection_rect))
+        if overlay and self.motif_matches is not None:
+            self._paint_motif_matches(painter, self._visible_scene_rect(self.visibleRegion().boundingRect()))
         
         painter.restore() 
+        return lines_drawn
+
+    # --- Selección flotante (dibujo) ---
+    def _paint_floating(self, painter: QPainter):
+        """Capa flotante en coordenadas de escena: fondo (se pega opaca), cuentas, líneas y contorno."""
+        floating = self.floating; layout = self.cell_layout
+        height, width = floating.block.shape
+        outline = self._selection_polygon(floating.rect())
+        painter.setPen(Qt.PenStyle.NoPen); painter.setBrush(QColor(CANVAS_BACKGROUND)); painter.drawPolygon(outline)
+        paint_block(painter, floating.block, floating.x, floating.y, self._get_render_palette(), self.cell_size, layout, self.grid_width, self.grid_height)
+        if not self._use_lod() and self.cell_size * self.zoom_factor > 4:
+            origin = np.array([floating.x, floating.y, floating.x, floating.y]) * self.cell_size
+            segments = layout.line_segments(width, height, self.cell_size, floating.x, floating.y) + origin
+            painter.setPen(grid_pen()); painter.drawLines([QLineF(*segment) for segment in segments.tolist()])
+        float_pen = QPen(QColor("#007bff"), 2); float_pen.setCosmetic(True); float_pen.setStyle(Qt.PenStyle.DashDotLine); painter.setPen(float_pen); painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPolygon(outline)
+
+    def _paint_shape_preview(self, painter: QPainter, scene_clip: QRectF):
+        """
+        Vista previa de la forma en coordenadas de escena: sus celdas visibles
+        (color actual, translúcido) y la guía geométrica.
+        """
+        color = QColor(CANVAS_BACKGROUND) if self.current_entry.finish == "Eraser" else QColor(self.current_entry.color)
+        color.setAlpha(200)
+        self._fill_cells(painter, self._shape_preview, color, scene_clip)
+        centers = cell_centers(self.cell_layout, self.grid_width, self.grid_height, self.cell_size, np.array(self._shape_points))
+        guide_pen = QPen(QColor("#007bff"), 1, Qt.PenStyle.DashLine); guide_pen.setCosmetic(True); painter.setPen(guide_pen); painter.setBrush(Qt.BrushStyle.NoBrush)
+        points = [QPointF(x, y) for x, y in centers.tolist()]
+        if self.current_tool == "rectangle": painter.drawRect(QRectF(points[0], points[-1]).normalized())
+        elif self.current_tool == "ellipse":
+            half = self.cell_size / 2.0
+            painter.drawEllipse(QRectF(points[0], points[-1]).normalized().adjusted(-half, -half, half, half))
+        elif self.current_tool == "polygon": painter.drawPolygon(QPolygonF(points))
+        else: painter.drawLine(points[0], points[-1])
+
+    def _fill_cells(self, painter: QPainter, cells: np.ndarray, color: QColor, scene_clip: QRectF) -> bool:
+        """
+        Resalta un lote de celdas (índices planos) en coordenadas de escena,
+        solo las visibles; con más de SHAPE_PREVIEW_CELLS visibles no dibuja
+        nada (devuelve False) y queda solo el contorno o la guía.
+        """
+        origin_x, origin_y = self.cell_layout.origins(self.grid_width, self.grid_height, self.cell_size)
+        lefts, tops = origin_x.ravel()[cells], origin_y.ravel()[cells]
+        visible = ((lefts + self.cell_size >= scene_clip.left()) & (lefts <= scene_clip.right()) &
+                   (tops + self.cell_size >= scene_clip.top()) & (tops <= scene_clip.bottom()))
+        if np.count_nonzero(visible) > self.SHAPE_PREVIEW_CELLS: return False
+        for left, top in zip(lefts[visible].tolist(), tops[visible].tolist()):
+            painter.fillRect(QRectF(left, top, self.cell_size, self.cell_size), color)
+        return True
+
+    def _paint_motif_matches(self, painter: QPainter, scene_clip: QRectF):
+        """Contorno de cada aparición del motivo buscado que cae en la zona visible."""
+        matches = self.motif_matches; height, width = self._motif.shape
+        spans = np.where((matches[:, 2] % 2 == 1)[:, None], [height, width], [width, height]) # Los giros de 90° intercambian ancho y alto
+        size = self.cell_size
+        visible = (((matches[:, 0] + spans[:, 0] + 1) * size >= scene_clip.left()) & ((matches[:, 0] - 1) * size <= scene_clip.right()) &
+                   ((matches[:, 1] + spans[:, 1] + 1) * size >= scene_clip.top()) & ((matches[:, 1] - 1) * size <= scene_clip.bottom()))
+        match_pen = QPen(QColor("#fd7e14"), 2); match_pen.setCosmetic(True); painter.setPen(match_pen); painter.setBrush(Qt.BrushStyle.NoBrush)
+        for (x, y, _transform), (span_x, span_y) in zip(matches[visible].tolist(), spans[visible].tolist()):
+            painter.drawPolygon(self._selection_polygon(QRect(x, y, span_x, span_y)))
+
+    def _visible_scene_rect(self, visible: QRect) -> QRectF:
+        return QRectF(self._get_scene_pos(visible.topLeft()), self._get_scene_pos(visible.bottomRight() + QPoint(1, 1)))
+
+    def _has_overlay(self) -> bool:
+        return self.floating is not None or self._shape_preview is not None
+
+    def _paint_overlays(self, painter: QPainter, visible: QRect):
+        """Capas superpuestas (coordenadas de escena): bloque flotante y vista previa de formas."""
+        if self.floating is not None: self._paint_floating(painter)
+        if self._shape_preview is not None:
+            self._paint_shape_preview(painter, self._visible_scene_rect(visible))
+
+    def _paint_overlay_frame(self, painter: QPainter) -> int:
+        """
+        Frame con capas superpuestas (selección flotante, vista previa de una
+        forma): la escena sin ellas sale de una instantánea en caché (se rehace
+        solo si cambia el diseño, el origen flotante o la vista), así que mover
+        el bloque o arrastrar una forma solo vuelve a dibujar la capa.
+        """
+        visible = self.visibleRegion().boundingRect(); ratio = self.devicePixelRatioF()
+        source = self.floating.source if self.floating is not None else None
+        key = (self.grid_data.revision, self.cell_size, self.grid_type, self.grid_width, self.grid_height, source,
+               self.zoom_factor, self.pan_offset.x(), self.pan_offset.y(), visible, ratio)
+        if self._overlay_base is None or self._overlay_base[2] != key:
+            pixmap = QPixmap(int(visible.width() * ratio), int(visible.height() * ratio)); pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(QColor(CANVAS_BACKGROUND))
+            base_painter = QPainter(pixmap); base_painter.translate(-QPointF(visible.topLeft())); lines_drawn = self._paint_scene(base_painter, overlay=False); base_painter.end()
+            self._overlay_base = (pixmap, visible, key, lines_drawn)
+        pixmap, visible, _key, lines_drawn = self._overlay_base
+        painter.drawPixmap(visible.topLeft(), pixmap)
+        painter.save(); painter.translate(self.pan_offset); painter.scale(self.zoom_factor, self.zoom_factor)
+        self._paint_overlays(painter, visible)
+        painter.restore()
+        return lines_drawn
+
+    def _scene_rect_to_widget(self, rect: QRectF) -> QRect:
+        """Rectángulo de escena -> zona del widget (con margen para lápices cosméticos), para repintados parciales."""
+        return QRectF(rect.topLeft() * self.zoom_factor + self.pan_offset, rect.size() * self.zoom_factor).toAlignedRect().adjusted(-3, -3, 3, 3)
+
+    def _floating_widget_rect(self) -> QRect:
+        """Zona del widget que ocupa la capa flotante (para repintar solo eso al moverla)."""
+        return self._scene_rect_to_widget(self._selection_polygon(self.floating.rect()).boundingRect())
+
+    def _shape_widget_rect(self) -> QRect:
+        """Zona del widget que ocupa la vista previa de la forma (celdas y guía)."""
+        if self._shape_preview is None: return QRect()
+        points = cell_centers(self.cell_layout, self.grid_width, self.grid_height, self.cell_size, np.array(self._shape_points))
+        low, high = points.min(axis=0), points.max(axis=0)
+        if self._shape_preview.size:
+            origin_x, origin_y = self.cell_layout.origins(self.grid_width, self.grid_height, self.cell_size)
+            xs, ys = self._shape_preview % self.grid_width, self._shape_preview // self.grid_width
+            low = np.minimum(low, [origin_x[ys, xs].min(), origin_y[ys, xs].min()]); high = np.maximum(high, [origin_x[ys, xs].max(), origin_y[ys, xs].max()])
+        margin = self.cell_size # La guía de la elipse sobresale media celda de los centros; las celdas, una
+        return self._scene_rect_to_widget(QRectF(QPointF(*(low - margin)), QPointF(*(high + margin))))
+
+    # --- Modo gesto (zoom/pan) ---
+    def _scene_key(self) -> tuple:
+        """Todo lo que invalida la instantánea del gesto (aparte de zoom/pan)."""
+        floating = (self.floating.source, self.floating.revision) if self.floating is not None else None
+        mask = None if self.selection_mask is None else id(self.selection_mask)
+        matches = None if self.motif_matches is None else id(self.motif_matches)
+        return (self.grid_data.revision, self.cell_size, self.grid_type, self.grid_width, self.grid_height, self.selection_rect, mask, matches, floating,
+                tuple(self._shape_points))
+
+    def _begin_gesture(self):
+        """Captura la zona visible antes del primer cambio de zoom/pan y (re)arranca el temporizador de inactividad."""
+        self._gesture_idle_timer.start()
+        if self._gesture_snapshot is not None: return
+        visible = self.visibleRegion().boundingRect()
+        if visible.isEmpty(): return
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(visible.width() * ratio), int(visible.height() * ratio)); pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QColor(CANVAS_BACKGROUND))
+        painter = QPainter(pixmap); painter.translate(-QPointF(visible.topLeft())); self._paint_scene(painter); painter.end()
+        self._gesture_snapshot = (pixmap, QRectF(visible), QPointF(self.pan_offset), self.zoom_factor, self._scene_key())
+
+    def _end_gesture(self):
+        """Fin del gesto: aplica la geometría diferida y vuelve al render completo."""
+        self._gesture_idle_timer.stop()
+        if self._gesture_snapshot is None: return
+        self._gesture_snapshot = None
+        self._update_canvas_size_hint(); self.update()
+
+    def _paint_gesture_snapshot(self, painter: QPainter):
+        """Dibuja la instantánea llevando su zoom/pan de captura a los actuales."""
+        pixmap, source, pan, zoom, _key = self._gesture_snapshot
+        scale = self.zoom_factor / zoom
+        target = QRectF((source.topLeft() - pan) * scale + self.pan_offset, source.size() * scale)
+        painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+    def paintEvent(self, event): 
+        diagnostics = self.diagnostics
+        frame_start = time.perf_counter() if diagnostics else 0.0
+        painter = QPainter(self); painter.setRenderHint(QPainter.RenderHint.Antialiasing, False) 
+        painter.fillRect(self.rect(), QColor(CANVAS_BACKGROUND)) 
+        
+        if self._gesture_snapshot is not None and self._gesture_snapshot[4] != self._scene_key():
+            self._gesture_snapshot = None # El diseño cambió durante el gesto: la instantánea ya no vale
+        gesture_frame = self._gesture_snapshot is not None
+        overlay_frame = not gesture_frame and self._has_overlay()
+        lod_frame = not gesture_frame and self._use_lod()
+        if gesture_frame:
+            self._paint_gesture_snapshot(painter); lines_drawn = 0
+        elif overlay_frame:
+            lines_drawn = self._paint_overlay_frame(painter)
+        else:
+            lines_drawn = self._paint_scene(painter)
+        
         if (self.mirror_mode_horizontal and self.grid_width > 1) or (self.mirror_mode_vertical and self.grid_height > 1):
             mirror_pen = QPen(Qt.GlobalColor.red, 1, Qt.PenStyle.DashLine); mirror_pen.setCosmetic(True); painter.setPen(mirror_pen)
-            center_x_unscaled = (self.grid_width / 2.0 + (0.25 if self.grid_type == "Peyote/Brick" else 0.0)) * self.cell_size
-            center_y_unscaled = (self.grid_height / 2.0) * self.cell_size
+            max_x_unscaled, max_y_unscaled = self.cell_layout.scene_size(self.grid_width, self.grid_height, self.cell_size)
             transform = QTransform().translate(self.pan_offset.x(), self.pan_offset.y()).scale(self.zoom_factor, self.zoom_factor)
-            center_screen = transform.map(QPointF(center_x_unscaled, center_y_unscaled))
+            center_screen = transform.map(QPointF(max_x_unscaled / 2.0, max_y_unscaled / 2.0))
             top_left_screen = transform.map(QPointF(0.0, 0.0))
-            width_multiplier = self.grid_width + 0.5 if self.grid_type == "Peyote/Brick" else self.grid_width
-            max_x_unscaled = width_multiplier * self.cell_size; max_y_unscaled = self.grid_height * self.cell_size
             bottom_right_screen = transform.map(QPointF(max_x_unscaled, max_y_unscaled))
             if self.mirror_mode_horizontal and self.grid_width > 1: painter.drawLine(QPointF(center_screen.x(), top_left_screen.y()), QPointF(center_screen.x(), bottom_right_screen.y()))
             if self.mirror_mode_vertical and self.grid_height > 1: painter.drawLine(QPointF(top_left_screen.x(), center_screen.y()), QPointF(bottom_right_screen.x(), center_screen.y())) 
+        self._paint_symmetry_guides(painter)
+
+        if diagnostics:
+            kind = "gesture" if gesture_frame else "overlay" if overlay_frame else "lod" if lod_frame else "frame"
+            diagnostics.record_frame(time.perf_counter() - frame_start, self.grid_data.indices, self._render_palette, lines_drawn, event.rect(), kind)
+            diagnostics.paint_overlay(painter, self.visibleRegion().boundingRect().topLeft())
+
 
+    def _paint_symmetry_guides(self, painter: QPainter):
+        """Centro de rotación y límites de la repetición (en coordenadas del widget)."""
+        symmetry = self.symmetry
+        if symmetry.rotation <= 1 and not (0 < symmetry.repeat_columns < self.grid_width): return
+        scene_width, scene_height = self.cell_layout.scene_size(self.grid_width, self.grid_height, self.cell_size)
+        transform = QTransform().translate(self.pan_offset.x(), self.pan_offset.y()).scale(self.zoom_factor, self.zoom_factor)
+        guide_pen = QPen(QColor("#ff8c00"), 1, Qt.PenStyle.DashLine); guide_pen.setCosmetic(True); painter.setPen(guide_pen); painter.setBrush(Qt.BrushStyle.NoBrush)
+        if symmetry.rotation > 1:
+            center = transform.map(QPointF(scene_width / 2.0, scene_height / 2.0))
+            painter.drawEllipse(center, 6.0, 6.0)
+        if 0 < symmetry.repeat_columns < self.grid_width:
+            for column in range(symmetry.repeat_columns, self.grid_width, symmetry.repeat_columns):
+                painter.drawLine(transform.map(QPointF(column * self.cell_size, 0.0)), transform.map(QPointF(column * self.cell_size, scene_height)))
 
     # --- Paint/Fill Logic ---
-    def _paint_cell(self, event_pos: QPoint):
-        coords = self._get_cell_coords_from_pos(event_pos);
-        if coords is None: return 
+    def _paint_cells(self, xs: np.ndarray, ys: np.ndarray, values: np.ndarray, merge: bool) -> bool:
+        """
+        Escribe un lote de celdas (índices de la tabla de entradas) y sus
+        imágenes simétricas como un único PaintCommand. Devuelve True si cambió algo.
+        """
+        cells, source = self.symmetry.expand(ys * self.grid_width + xs, self.grid_width, self.grid_height, self.cell_layout, self.cell_size)
+        xs, ys, values = cells % self.grid_width, cells // self.grid_width, values[source]
+        grid = self.grid_data
+        old_indices = grid.active_layer.indices[ys, xs]; changed = old_indices != values
+        if not changed.any(): return False
         
-        x, y = coords
+        entries = grid.entries
+        changes: dict[tuple[int, int], tuple[BeadColorEntry | None, BeadColorEntry | None]] = {
+            (x, y): (entries[old], entries[new]) for x, y, old, new in
+            zip(xs[changed].tolist(), ys[changed].tolist(), old_indices[changed].tolist(), values[changed].tolist())
+        }
+        self._execute_command(PaintCommand(self, changes), merge=merge)
+        return True
+
+    def _paint_scene_points(self, scene_xs: np.ndarray, scene_ys: np.ndarray, merge: bool) -> bool:
+        """Pinta con la entrada actual las celdas bajo un lote de puntos de escena (trazos del lápiz)."""
         new_entry = None if self.current_entry.finish == "Eraser" else self.current_entry 
-        
         if new_entry is not None and not isinstance(new_entry, BeadColorEntry):
              print("Error: current_entry no es una BeadColorEntry válida.")
-             return
-             
-        changes: dict[tuple[int, int], tuple[BeadColorEntry | None, BeadColorEntry | None]] = {}
-        cells_to_process: set[tuple[int, int]] = {(x, y)} 
-        mirrored_x = self.grid_width - 1 - x; mirrored_y = self.grid_height - 1 - y
+             return False
         
-        if self.mirror_mode_horizontal and mirrored_x != x: cells_to_process.add((mirrored_x, y))
-        if self.mirror_mode_vertical and mirrored_y != y: cells_to_process.add((x, mirrored_y))
-        if self.mirror_mode_horizontal and self.mirror_mode_vertical and mirrored_x != x and mirrored_y != y: cells_to_process.add((mirrored_x, mirrored_y)) 
-        
-        for px, py in cells_to_process:
-             if 0 <= px < self.grid_width and 0 <= py < self.grid_height: 
-                 old_entry = self.grid_data[py][px]
-                 if old_entry != new_entry: 
-                     changes[(px, py)] = (old_entry, new_entry)
-                     
-        if changes: 
-             cmd = PaintCommand(self, changes) 
-             self._execute_command(cmd, merge=self._is_dragging_paint)
+        if self.symmetry.wrap: # Un trazo que sale por un lado entra por el otro
+            scene_xs = np.mod(scene_xs, self.cell_layout.scene_size(self.grid_width, self.grid_height, self.cell_size)[0])
+        xs, ys, inside = self.cell_layout.cells_at(scene_xs, scene_ys, self.grid_width, self.grid_height, self.cell_size)
+        if not inside.any(): return False
+        xs, ys = xs[inside], ys[inside]
+        return self._paint_cells(xs, ys, np.full(xs.size, self.grid_data.index_of(new_entry), dtype=self.grid_data.indices.dtype), merge)
              
+    def _commit_diff(self, cells: np.ndarray, values: np.ndarray) -> bool:
+        """Escribe valores en un lote de celdas (índices planos) como un DiffCommand con solo las que cambian."""
+        old = self.grid_data.active_layer.indices.ravel()[cells]; changed = old != values
+        if not changed.any(): return False
+        self._execute_command(DiffCommand(self, cells[changed], old[changed], values[changed]), merge=False)
+        return True
+
     def _flood_fill(self, event_pos: QPoint):
+        """
+        Relleno con la entrada actual. La región se calcula sobre el compuesto
+        visible (lo que se ve en pantalla) y se escribe en la capa activa, así
+        que una figura de otra capa hace de borde.
+        """
         coords = self._get_cell_coords_from_pos(event_pos);
         if coords is None: return
         
         x, y = coords
         new_entry = None if self.current_entry.finish == "Eraser" else self.current_entry
-        target_entry = self.grid_data[y][x]
-        
-        if target_entry == new_entry: return
+        target_entry = self.grid_data.get(x, y)
         
-        changes: dict[tuple[int, int], tuple[BeadColorEntry | None, BeadColorEntry | None]] = {}
-        queue: list[tuple[int, int]] = [(x, y)]; processed: set[tuple[int, int]] = {(x, y)}
-        changes[(x, y)] = (target_entry, new_entry)
+        if target_entry == new_entry and self.fill_tolerance <= 0 and self.fill_contiguous: return
         
-        while queue:
-            cx, cy = queue.pop(0)
-            for nx, ny in [(cx, cy - 1), (cx, cy + 1), (cx - 1, cy), (cx + 1, cy)]:
-                if (0 <= nx < self.grid_width and 0 <= ny < self.grid_height and (nx, ny) not in processed):
-                    processed.add((nx, ny)); 
-                    neighbor_entry = self.grid_data[ny][nx]
-                    if neighbor_entry == target_entry: 
-                        changes[(nx, ny)] = (target_entry, new_entry)
-                        queue.append((nx, ny))
-                        
-        if changes: 
-            cmd = PaintCommand(self, changes)
-            self._execute_command(cmd, merge=False)
+        # Región conexa según los vecinos de la disposición (en Brick/Peyote, seis por celda), o todas las celdas parecidas
+        region = self._tolerance_region(x, y)
+        values = np.full(region.size, self.grid_data.index_of(new_entry), dtype=self.grid_data.indices.dtype)
+        self._paint_cells(region % self.grid_width, region // self.grid_width, values, merge=False)
+
+
+    def _get_entry_lab(self) -> np.ndarray:
+        """Lab de cada entrada de la tabla; la tabla solo crece, así que basta con su longitud para invalidarla."""
+        if self._entry_lab is None or len(self._entry_lab) != len(self.grid_data.entries):
+            self._entry_lab = entry_lab_table(self.grid_data.entries)
+        return self._entry_lab
+
+    def _similar_entries(self, seed: int) -> np.ndarray:
+        """Tabla booleana por entrada: las que están a ΔE00 <= tolerancia de la semilla (la celda vacía solo se parece a sí misma)."""
+        if seed == 0 or self.fill_tolerance <= 0: return np.arange(len(self.grid_data.entries)) == seed
+        lab = self._get_entry_lab()
+        with np.errstate(invalid="ignore"): return ciede2000(lab, lab[seed]) <= self.fill_tolerance # NaN (vacía) -> False
+
+    def _tolerance_region(self, x: int, y: int) -> np.ndarray:
+        """
+        Celdas (índices planos) parecidas a (x, y): la región conexa o, sin
+        'contiguo', todas las del diseño. Se mide sobre el compuesto visible,
+        no sobre la capa activa (relleno y varita escriben/operan en la activa).
+        """
+        indices = self.grid_data.indices
+        accept = self._similar_entries(int(indices[y, x]))
+        if self.fill_contiguous: return connected_region(self.cell_layout, indices, x, y, wrap=self.symmetry.wrap, accept=accept)
+        return np.flatnonzero(accept[indices.ravel()])
+
+    def _magic_wand(self, event_pos: QPoint, add: bool = False):
+        """Selecciona la región de _tolerance_region() (según el compuesto visible); las operaciones sobre ella actúan en la capa activa."""
+        coords = self._get_cell_coords_from_pos(event_pos)
+        if coords is None: return
+        cells = self._tolerance_region(*coords)
+        if add and self.selection_mask is not None: cells = np.union1d(self.selection_mask, cells)
+        self._set_mask_selection(cells)
+
+    def _set_mask_selection(self, cells: np.ndarray):
+        """Instala una selección por máscara; selection_rect pasa a ser su caja envolvente."""
+        if self.floating is not None: self.commit_floating()
+        xs, ys = cells % self.grid_width, cells // self.grid_width
+        self.selection_mask = cells
+        self.selection_rect = QRect(int(xs.min()), int(ys.min()), int(xs.max() - xs.min()) + 1, int(ys.max() - ys.min()) + 1)
+        self.selection_changed.emit(True, self.clipboard_data is not None); self.update()
+
+    def set_fill_tolerance(self, value: float): self.fill_tolerance = max(0.0, float(value))
+
+    def set_fill_contiguous(self, checked: bool): self.fill_contiguous = bool(checked)
 
 
     # --- Data Management ---
     
     def clear_grid(self):
-        self.grid_data = self._create_grid(self.grid_width, self.grid_height); self._clear_history(); self.clear_selection(); self.update() 
+        self._discard_floating(); self._cancel_shape(); self.clear_motif_matches(); self.grid_data.reset(self.grid_width, self.grid_height); self._clear_history(); self.clear_selection(); self.usage_changed.emit(); self.update() 
     
     def get_grid_data(self) -> list[list[str | None]]:
         """Retorna la cuadrícula como códigos HEX o None para guardar."""
-        hex_grid = [];
-        for row in self.grid_data: 
-             hex_row = [entry.color.name() if entry else None for entry in row]
-             hex_grid.append(hex_row)
-        return hex_grid
+        return unpack_hex_grid(self.grid_data.indices, self.get_hex_table())
+
+    def get_layer_data(self) -> list[tuple[dict, np.ndarray]]:
+        """(metadata, matriz de índices) de cada capa, de abajo a arriba, para guardar."""
+        return [({"name": layer.name, "visible": layer.visible, "locked": layer.locked}, layer.indices) for layer in self.grid_data.layers]
+
+    def get_hex_table(self) -> list[str | None]:
+        """HEX de cada índice de la tabla de entradas (None para la celda vacía)."""
+        return [entry.color.name() if entry else None for entry in self.grid_data.entries]
 
     def load_grid_data(self, hex_grid: list[list[str | None]]) -> bool:
         """
@@ -306,44 +658,172 @@ class GridCanvas(QWidget):
         temporalmente como Opaco hasta que se complete la carga de la paleta.
         """
         try:
-            self.zoom_factor = 1.0; self.pan_offset = QPointF(0.0, 0.0); self._clear_history(); self.clear_selection()
-            new_height = len(hex_grid); new_width = 0 if new_height == 0 else (len(hex_grid[0]) if hex_grid[0] else 0) 
-            new_grid_data = []
-            
-            for y in range(new_height):
-                row_data = hex_grid[y]
-                if not isinstance(row_data, list): new_grid_data.append([None] * new_width); continue 
-                current_row_len = len(row_data); new_row = []
-                for x in range(new_width):
-                    entry = None
-                    if x < current_row_len:
-                         hex_color = row_data[x]
-                         if isinstance(hex_color, str) and hex_color.startswith('#'):
-                              temp_color = QColor(hex_color)
-                              if temp_color.isValid(): 
-                                  entry = BeadColorEntry(temp_color, finish="Opaque (Loaded)", name=temp_color.name().upper())
-                         
-                    new_row.append(entry) 
-                new_grid_data.append(new_row)
-                
-            self.grid_data = new_grid_data; self.grid_width = new_width; self.grid_height = new_height
+            hex_table, local_indices = pack_hex_grid(hex_grid)
+            return self.load_packed_grid(hex_table, local_indices)
+        except Exception as e: print(f"Error loading grid data: {e}"); return False
+
+    def load_packed_grid(self, hex_table: list[str], local_indices: np.ndarray, layers: list | None = None, active_layer: int = 0) -> bool:
+        """
+        Instala una cuadrícula ya decodificada por pack_hex_grid (posiblemente en 
+        un hilo de trabajo): solo interna una entrada por HEX y remapea en bloque.
+        'layers' son las capas guardadas como (metadata, tabla HEX, índices); sin
+        ellas el compuesto se carga como una única capa de fondo.
+        """
+        try:
+            self._discard_floating(); self._cancel_shape(); self.clear_motif_matches(); self.zoom_factor = 1.0; self.pan_offset = QPointF(0.0, 0.0); self._clear_history(); self.clear_selection()
+            loaded: dict[str, int] = {} # Una sola entrada por color HEX cargado (compartida entre capas)
+            def remap(table: list[str], indices: np.ndarray) -> np.ndarray:
+                lookup = np.zeros(len(table) + 1, dtype=np.uint16)
+                for i, hex_color in enumerate(table, start=1):
+                    if hex_color not in loaded:
+                        temp_color = QColor(hex_color)
+                        loaded[hex_color] = self.grid_data.index_of(BeadColorEntry(temp_color, finish="Opaque (Loaded)", name=temp_color.name().upper()))
+                    lookup[i] = loaded[hex_color]
+                return lookup[indices]
+            grid_layers = [GridLayer(str(meta.get("name", f"Layer {n + 1}")), remap(table, indices), bool(meta.get("visible", True)), bool(meta.get("locked", False)))
+                           for n, (meta, table, indices) in enumerate(layers or []) if indices.shape == local_indices.shape]
+            if layers and len(grid_layers) != len(layers): print("Warning: Ignoring saved layers whose size does not match the grid.")
+            if grid_layers: self.grid_data.load_layers(grid_layers, active_layer)
+            else: self.grid_data.load_indices(remap(hex_table, local_indices))
+            self.grid_height, self.grid_width = local_indices.shape
+            self.usage_changed.emit(); self.layers_changed.emit()
             self._update_canvas_size_hint(); self.update(); return True
             
         except Exception as e: print(f"Error loading grid data: {e}"); return False
 
+    # --- Reasignación de colores ---
+    def _editable_layers(self) -> list[GridLayer]:
+        return [layer for layer in self.grid_data.layers if not layer.locked]
+
+    def remap_colors(self, mapping: dict[str, BeadColorEntry | None]) -> bool:
+        """
+        Reasigna colores por HEX (None borra) en todas las capas no bloqueadas
+        como un único RemapCommand: una tabla sobre los índices, sin recorrer
+        regiones. Devuelve True si cambió alguna celda.
+        """
+        self.commit_floating(); self._cancel_shape() # Antes de calcular la tabla: el bloque flotante vuelve a su capa
+        grid = self.grid_data
+        targets = {hex_color: grid.index_of(entry) for hex_color, entry in mapping.items()}
+        table = np.arange(len(grid.entries), dtype=np.uint16) # Todas las entradas con ese HEX (cargadas o de la paleta)
+        for index, entry in enumerate(grid.entries):
+            if entry is not None and entry.color.name() in targets: table[index] = targets[entry.color.name()]
+        layers = [layer for layer in self._editable_layers() if (table[layer.indices] != layer.indices).any()]
+        if not layers: return False
+        self._execute_command(RemapCommand(self, table, layers), merge=False)
+        return True
+
+    def replace_color(self, source_hex: str, target: BeadColorEntry | None) -> bool:
+        return self.remap_colors({source_hex: target})
+
+    def swap_colors(self, first: BeadColorEntry, second: BeadColorEntry) -> bool:
+        return self.remap_colors({first.color.name(): second, second.color.name(): first})
+
+    def _color_histogram(self) -> tuple[list[str], np.ndarray, list[BeadColorEntry]]:
+        """Colores (HEX) de las capas no bloqueadas con sus cuentas y la entrada más usada de cada uno."""
+        grid = self.grid_data
+        counts = np.zeros(len(grid.entries), dtype=np.int64)
+        for layer in self._editable_layers(): counts += np.bincount(layer.indices.ravel(), minlength=len(counts))
+        totals: dict[str, int] = {}; best: dict[str, int] = {}
+        for index in (np.flatnonzero(counts[1:]) + 1).tolist():
+            key = grid.entries[index].color.name(); totals[key] = totals.get(key, 0) + int(counts[index])
+            if key not in best or counts[index] > counts[best[key]]: best[key] = index
+        hex_colors = list(totals)
+        return hex_colors, np.array([totals[h] for h in hex_colors], dtype=np.int64), [grid.entries[best[h]] for h in hex_colors]
+
+    def merge_similar_colors(self, threshold: float) -> int:
+        """Fusiona los colores usados a menos de 'threshold' (ΔE00) en el más usado de cada grupo. Devuelve cuántos se fusionan."""
+        self.commit_floating(); self._cancel_shape() # El histograma debe contar el bloque flotante
+        hex_colors, counts, entries = self._color_histogram()
+        if len(hex_colors) < 2: return 0
+        representative = merge_near_duplicates(rgb_to_lab(hex_to_rgb(hex_colors)), counts, threshold)
+        mapping = {hex_colors[i]: entries[r] for i, r in enumerate(representative.tolist()) if r != i}
+        return len(mapping) if mapping and self.remap_colors(mapping) else 0
+
+    def reduce_colors(self, count: int, catalog: list[BeadColorEntry] | None = None) -> int:
+        """
+        Reduce el diseño a 'count' colores: k-means ponderado por cuentas en
+        Lab sobre el histograma de colores usados; cada grupo pasa al color
+        usado más cercano (ΔE00) a su centro o, con 'catalog', a la cuenta del
+        catálogo más cercana. Un único RemapCommand. Devuelve los colores finales.
+        """
+        self.commit_floating(); self._cancel_shape()
+        hex_colors, counts, entries = self._color_histogram()
+        if not hex_colors: return 0 # Diseño vacío: nada que agrupar (ni con catálogo)
+        if len(hex_colors) <= count and not catalog: return len(hex_colors)
+        lab = rgb_to_lab(hex_to_rgb(hex_colors))
+        centers, labels = weighted_kmeans(lab, counts, count)
+        if catalog:
+            candidates, candidate_lab = catalog, rgb_to_lab(hex_to_rgb([entry.color.name() for entry in catalog]))
+            targets = [candidates[i] for i in np.argmin(ciede2000(centers[:, None, :], candidate_lab[None, :, :]), axis=1).tolist()]
+        else: # Representante: el color del grupo más cercano a su centro
+            distances = np.where(labels[None, :] == np.arange(len(centers))[:, None], ciede2000(centers[:, None, :], lab[None, :, :]), np.inf)
+            targets = [entries[i] for i in np.argmin(distances, axis=1).tolist()]
+        mapping = {hex_color: targets[label] for hex_color, label in zip(hex_colors, labels.tolist())
+                   if catalog or targets[label].color.name() != hex_color}
+        if mapping: self.remap_colors(mapping)
+        return len({targets[label].color.name() for label in labels.tolist()})
+
+    # --- Capas ---
+    def _active_layer_editable(self) -> bool:
+        """Las herramientas no escriben en una capa bloqueada u oculta."""
+        layer = self.grid_data.active_layer
+        if layer.locked or not layer.visible:
+            print(f"Warning: Layer '{layer.name}' is {'locked' if layer.locked else 'hidden'}."); return False
+        return True
+
+    def _begin_layer_change(self):
+        """Lo pendiente pertenece a la capa activa: se asienta la selección flotante y se descarta la forma en curso."""
+        self.commit_floating(); self._cancel_shape()
+
+    def _execute_layer_change(self, action, composite_changed: bool = True):
+        """Aplica un cambio de la pila de capas como un LayerCommand (se puede deshacer)."""
+        self._begin_layer_change()
+        self._execute_command(LayerCommand(self, action, composite_changed), merge=False)
+
+    def set_active_layer(self, position: int):
+        """Elegir la capa activa no es una edición: no entra en el historial (deshacer sí restaura la activa de entonces)."""
+        if 0 <= position < len(self.grid_data.layers) and self.grid_data.layers[position] is not self.grid_data.active_layer:
+            self._begin_layer_change(); self.grid_data.active_layer = self.grid_data.layers[position]; self.layers_changed.emit()
+
+    def add_layer(self, name: str | None = None, duplicate: bool = False):
+        """Capa nueva encima de la activa; con duplicate, copia de la activa (una variación sin duplicar el archivo)."""
+        active = self.grid_data.active_layer
+        if name is None: name = f"{active.name} copy" if duplicate else f"Layer {len(self.grid_data.layers) + 1}"
+        self._execute_layer_change(lambda: self.grid_data.add_layer(name, active.indices if duplicate else None), duplicate and active.visible)
+
+    def remove_layer(self):
+        layer = self.grid_data.active_layer
+        if len(self.grid_data.layers) > 1: self._execute_layer_change(lambda: self.grid_data.remove_layer(layer), layer.visible)
+
+    def move_layer(self, offset: int):
+        layer = self.grid_data.active_layer
+        position = self.grid_data.layer_position(layer)
+        if min(max(position + offset, 0), len(self.grid_data.layers) - 1) != position:
+            self._execute_layer_change(lambda: self.grid_data.move_layer(layer, offset), layer.visible)
+
+    def set_layer_visible(self, position: int, visible: bool):
+        layer = self.grid_data.layers[position]
+        if layer.visible != visible: self._execute_layer_change(lambda: self.grid_data.set_layer_visible(layer, visible))
+
+    def set_layer_locked(self, position: int, locked: bool):
+        layer = self.grid_data.layers[position]
+        if layer.locked != locked: self._execute_layer_change(lambda: setattr(layer, "locked", locked), composite_changed=False)
+
+    def rename_layer(self, position: int, name: str):
+        layer = self.grid_data.layers[position]
+        if name and name != layer.name: self._execute_layer_change(lambda: setattr(layer, "name", name), composite_changed=False)
+
     # --- MÉTODOS DE INTERACCIÓN (Restaurados) ---
-    def _get_scene_pos(self, widget_pos: QPoint) -> QPointF: return (QPointF(widget_pos) - self.pan_offset) / self.zoom_factor
+    def _get_scene_pos(self, widget_pos: QPoint | QPointF) -> QPointF: return (QPointF(widget_pos) - self.pan_offset) / self.zoom_factor
     def _get_cell_coords_from_pos(self, event_pos: QPoint) -> tuple[int, int] | None:
         scene_pos = self._get_scene_pos(event_pos)
-        y = int(scene_pos.y() // self.cell_size)
-        x_offset = self.cell_size / 2.0 if self.grid_type == "Peyote/Brick" and y % 2 != 0 else 0.0
-        x = int((scene_pos.x() - x_offset) // self.cell_size)
-        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
-            if self.grid_type == "Peyote/Brick":
-                 cell_start_x = x * self.cell_size + x_offset
-                 if not (cell_start_x <= scene_pos.x() < cell_start_x + self.cell_size): return None 
-            return x, y
-        return None
+        return self.cell_layout.cell_at(scene_pos.x(), scene_pos.y(), self.grid_width, self.grid_height, self.cell_size)
+
+    def _cell_under(self, widget_pos: QPointF) -> tuple[int, int]:
+        """Celda bajo un punto sin recortar a la cuadrícula (el bloque flotante puede salirse mientras se arrastra)."""
+        scene_pos = self._get_scene_pos(widget_pos)
+        xs, ys, _inside = self.cell_layout.cells_at(np.array([scene_pos.x()]), np.array([scene_pos.y()]), self.grid_width, self.grid_height, self.cell_size)
+        return int(xs[0]), int(ys[0])
 
     def wheelEvent(self, event: QWheelEvent):
         mouse_point = event.position(); scene_point_before_zoom = self._get_scene_pos(mouse_point.toPoint()) 
@@ -351,34 +831,52 @@ class GridCanvas(QWidget):
         new_zoom_factor = self.zoom_factor * zoom_factor_delta
         clamped_zoom_factor = max(self.MIN_ZOOM, min(new_zoom_factor, self.MAX_ZOOM))
         if clamped_zoom_factor != self.zoom_factor:
+            self._begin_gesture() # La geometría se actualiza al terminar el gesto
             self.pan_offset = QPointF(mouse_point) - scene_point_before_zoom * clamped_zoom_factor
             self.zoom_factor = clamped_zoom_factor
-            self._update_canvas_size_hint(); self.update() 
+            self.update() 
     
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
+            if self.current_tool not in ("select", "wand") and not self._active_layer_editable(): return
             if self.current_tool == "pencil":
-                self._is_dragging_paint = True; self._paint_cell(event.pos()) 
+                self._stroke.begin(self._get_scene_pos(event.position())) 
             elif self.current_tool == "fill":
-                 self._is_dragging_paint = False; self._flood_fill(event.pos())
+                 self._flood_fill(event.pos())
+            elif self.current_tool in SHAPE_TOOLS:
+                self._shape_press(event.position())
+            elif self.current_tool == "wand":
+                self._magic_wand(event.pos(), add=bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier))
             elif self.current_tool == "select":
+                cell = self._cell_under(event.position())
+                target = self.floating.rect() if self.floating is not None else self.selection_rect
+                if target is not None and self.selection_mask is None and target.contains(QPoint(*cell)) and self._lift_selection(): # Arrastrar la selección la levanta
+                    self._float_grab = (cell[0] - self.floating.x, cell[1] - self.floating.y); return
                 self.clear_selection(); self.selection_origin = event.pos()
                 self.rubber_band.setGeometry(QRect(self.selection_origin, QSize())) 
                 self.rubber_band.show()
         elif event.button() == Qt.MouseButton.MiddleButton:
-            self.last_pan_pos = event.pos(); self.setCursor(Qt.CursorShape.ClosedHandCursor)
+            self.last_pan_pos = event.pos(); self.setCursor(Qt.CursorShape.ClosedHandCursor); self._begin_gesture()
     
     def mouseMoveEvent(self, event: QMouseEvent):
-        if event.buttons() & Qt.MouseButton.LeftButton:
-            if self.current_tool == "pencil" and self._is_dragging_paint: self._paint_cell(event.pos()) 
+        if self._shape_points and self.current_tool in SHAPE_TOOLS and not event.buttons() & Qt.MouseButton.MiddleButton:
+            self._shape_drag(event.position()) # El polígono también sigue al ratón sin botón (mouseTracking)
+        elif event.buttons() & Qt.MouseButton.LeftButton:
+            if self.current_tool == "pencil" and self._stroke.active: self._stroke.add(self._get_scene_pos(event.position())) 
+            elif self._float_grab is not None and self.floating is not None:
+                x, y = self._cell_under(event.position())
+                self._move_floating(x - self._float_grab[0], y - self._float_grab[1])
             elif self.current_tool == "select" and self.selection_origin is not None:
                 self.rubber_band.setGeometry(QRect(self.selection_origin, event.pos()).normalized())
         elif event.buttons() & Qt.MouseButton.MiddleButton and self.last_pan_pos is not None:
+            self._begin_gesture()
             delta = QPointF(event.pos() - self.last_pan_pos); self.pan_offset += delta; self.last_pan_pos = event.pos(); self.update() 
     
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
-             self._is_dragging_paint = False 
+             self._stroke.end() 
+             self._float_grab = None
+             if self.current_tool in ("line", "rectangle", "ellipse") and self._shape_points: self.commit_shape()
              if self.current_tool == "select" and self.selection_origin is not None:
                 self.rubber_band.hide()
                 widget_rect = self.rubber_band.geometry()
@@ -397,55 +895,313 @@ class GridCanvas(QWidget):
                 self.selection_origin = None
                 self.update() 
         elif event.button() == Qt.MouseButton.MiddleButton and self.last_pan_pos is not None:
-            self.last_pan_pos = None; self.setCursor(Qt.CursorShape.ArrowCursor) 
+            self.last_pan_pos = None; self.setCursor(Qt.CursorShape.ArrowCursor); self._end_gesture() 
+
+    def mouseDoubleClickEvent(self, event: QMouseEvent):
+        if self.current_tool == "polygon" and event.button() == Qt.MouseButton.LeftButton and self._shape_points:
+            self.commit_shape(); return # Doble clic cierra el polígono
+        super().mouseDoubleClickEvent(event)
+
+    def tabletEvent(self, event: QTabletEvent):
+        """El lápiz de tableta alimenta el motor de trazos directamente (a su frecuencia completa)."""
+        if self.current_tool != "pencil":
+            event.ignore(); return # Qt lo convierte en eventos de ratón
+        kind = event.type()
+        if kind == QEvent.Type.TabletPress and event.button() == Qt.MouseButton.LeftButton:
+            if self._active_layer_editable(): self._stroke.begin(self._get_scene_pos(event.position()))
+        elif kind == QEvent.Type.TabletMove and self._stroke.active:
+            self._stroke.add(self._get_scene_pos(event.position()))
+        elif kind == QEvent.Type.TabletRelease:
+            self._stroke.end()
+        event.accept()
+
+    def keyPressEvent(self, event: QKeyEvent):
+        """
+        Enter asienta (polígono en curso o selección flotante), Escape los
+        descarta y las flechas mueven la selección una celda.
+        """
+        steps = {Qt.Key.Key_Left: (-1, 0), Qt.Key.Key_Right: (1, 0), Qt.Key.Key_Up: (0, -1), Qt.Key.Key_Down: (0, 1)}
+        key = event.key()
+        if self._shape_points and key in (Qt.Key.Key_Return, Qt.Key.Key_Enter): self.commit_shape()
+        elif self._shape_points and key == Qt.Key.Key_Escape: self._cancel_shape()
+        elif self.floating is not None and key in (Qt.Key.Key_Return, Qt.Key.Key_Enter): self.commit_floating()
+        elif self.floating is not None and key == Qt.Key.Key_Escape: self.cancel_floating()
+        elif key in steps and (self.floating is not None or self.selection_rect is not None) and self._lift_selection():
+            dx, dy = steps[key]; self._move_floating(self.floating.x + dx, self.floating.y + dy)
+        else: super().keyPressEvent(event)
 
     def clear_selection(self):
+        if self.floating is not None: self.commit_floating()
+        self.selection_mask = None
         if self.selection_rect is not None:
             self.selection_rect = None
             self.selection_changed.emit(False, self.clipboard_data is not None) 
             self.update() 
 
-    def _get_data_from_selection(self) -> list[list[BeadColorEntry | None]] | None:
+    # --- Selección flotante ---
+    def _lift_selection(self) -> bool:
+        """Levanta la selección como bloque flotante (si no lo está ya). Devuelve False sin selección o con la capa bloqueada."""
+        if self.floating is None:
+            if not self.selection_rect or not self._active_layer_editable(): return False
+            if self.selection_mask is not None:
+                print("Warning: Move, flip, rotate and scale work on rectangular selections."); return False
+            rect = self.selection_rect
+            self.floating = FloatingSelection(rect, self.grid_data.read_block(rect.x(), rect.y(), rect.width(), rect.height()))
+            self.undo_redo_changed.emit(True, bool(self.redo_stack)) # Deshacer descarta el bloque flotante
+        return True
+
+    def _move_floating(self, x: int, y: int):
+        old_rect = self._floating_widget_rect()
+        if not self.floating.move_to(x, y): return
+        self.selection_rect = self.floating.rect()
+        self.update(old_rect.united(self._floating_widget_rect()))
+
+    def _transform_floating(self, transform):
+        if not self._lift_selection(): return
+        old_rect = self._floating_widget_rect()
+        transform(self.floating)
+        self.selection_rect = self.floating.rect()
+        self.update(old_rect.united(self._floating_widget_rect()))
+
+    def flip_selection(self, horizontal: bool = True):
+        self._transform_floating(FloatingSelection.flip_horizontal if horizontal else FloatingSelection.flip_vertical)
+
+    def rotate_selection(self, clockwise: bool = True):
+        self._transform_floating(lambda floating: floating.rotate(clockwise))
+
+    def scale_selection(self, percent: int):
+        self._transform_floating(lambda floating: floating.scale(percent))
+
+    def commit_floating(self):
+        """Asienta la selección flotante como un único FloatCommand (si cambió algo)."""
+        floating = self.floating
+        if floating is None: return
+        self._discard_floating()
+        if floating.is_modified():
+            self._execute_command(FloatCommand(self, floating.source, floating.original, floating.rect(), floating.block), merge=False)
+        else:
+            self.undo_redo_changed.emit(bool(self.undo_stack), bool(self.redo_stack))
+        rect = floating.rect().intersected(QRect(0, 0, self.grid_width, self.grid_height))
+        self.selection_rect = rect if not rect.isEmpty() else None
+        self.selection_changed.emit(self.selection_rect is not None, self.clipboard_data is not None)
+        self.update()
+
+    def cancel_floating(self):
+        """Descarta la selección flotante: la cuadrícula no llegó a cambiar."""
+        floating = self.floating
+        if floating is None: return
+        self._discard_floating()
+        self.selection_rect = QRect(floating.source)
+        self.undo_redo_changed.emit(bool(self.undo_stack), bool(self.redo_stack))
+        self.update()
+
+    def _discard_floating(self):
+        self.floating = None; self._float_grab = None; self._overlay_base = None
+
+    # --- Herramientas de forma ---
+    def _shape_cell(self, widget_pos: QPointF) -> tuple[int, int]:
+        x, y = self._cell_under(widget_pos)
+        return min(max(x, 0), self.grid_width - 1), min(max(y, 0), self.grid_height - 1)
+
+    def _shape_press(self, widget_pos: QPointF):
+        """Línea/rectángulo/elipse: empieza el arrastre. Polígono: fija un vértice y abre el siguiente."""
+        cell = self._shape_cell(widget_pos)
+        if self.current_tool == "polygon" and self._shape_points:
+            self._shape_points[-1] = cell; self._shape_points.append(cell)
+        else:
+            self._shape_points = [cell, cell]
+            if self.current_tool == "polygon": self.setMouseTracking(True)
+        self._update_shape_preview()
+
+    def _shape_drag(self, widget_pos: QPointF):
+        cell = self._shape_cell(widget_pos)
+        if cell != self._shape_points[-1]:
+            self._shape_points[-1] = cell; self._update_shape_preview()
+
+    def _rasterize_shape(self) -> np.ndarray:
+        """Celdas (índices planos) de la forma en curso, con sus imágenes simétricas."""
+        layout, width, height, cell_size = self.cell_layout, self.grid_width, self.grid_height, self.cell_size
+        centers = cell_centers(layout, width, height, cell_size, np.array(self._shape_points))
+        tool = self.current_tool
+        if tool == "rectangle": cells = rasterize_rectangle(layout, width, height, cell_size, centers[0], centers[-1], self.shape_filled)
+        elif tool == "ellipse": cells = rasterize_ellipse(layout, width, height, cell_size, centers[0], centers[-1], self.shape_filled)
+        elif tool == "polygon": cells = rasterize_polygon(layout, width, height, cell_size, centers, self.shape_filled)
+        else: cells = rasterize_polyline(layout, width, height, cell_size, centers[[0, -1]])
+        return self.symmetry.expand(cells, width, height, layout, cell_size)[0]
+
+    def _update_shape_preview(self):
+        """Recalcula la vista previa y repinta solo la zona que ocupaba y la que ocupa (la cuadrícula no cambia)."""
+        old_rect = self._shape_widget_rect()
+        self._shape_preview = self._rasterize_shape()
+        self.update(old_rect.united(self._shape_widget_rect()))
+
+    def _cancel_shape(self):
+        if not self._shape_points: return
+        old_rect = self._shape_widget_rect()
+        self._shape_points = []; self._shape_preview = None; self.setMouseTracking(False)
+        self.update(old_rect)
+
+    def set_shape_filled(self, filled: bool):
+        self.shape_filled = filled
+        if self._shape_points: self._update_shape_preview()
+
+    def commit_shape(self):
+        """Pinta la forma en curso con la entrada actual como un único DiffCommand."""
+        if not self._shape_points: return
+        if self.current_tool == "polygon" and len(set(self._shape_points)) < 2:
+            self._cancel_shape(); return # Un polígono necesita al menos dos vértices distintos
+        cells = self._rasterize_shape(); self._cancel_shape()
+        new_entry = None if self.current_entry.finish == "Eraser" else self.current_entry
+        values = np.full(cells.size, self.grid_data.index_of(new_entry), dtype=self.grid_data.indices.dtype)
+        self._commit_diff(cells, values)
+
+    # --- Portapapeles ---
+    def _get_data_from_selection(self) -> np.ndarray | None:
+        if self.floating is not None:
+            return self.floating.block.copy()
         if not self.selection_rect:
             return None
-        data = []
-        for r in range(self.selection_rect.height()):
-            row = []
-            y = self.selection_rect.y() + r
-            if 0 <= y < self.grid_height:
-                for c in range(self.selection_rect.width()):
-                    x = self.selection_rect.x() + c
-                    if 0 <= x < self.grid_width:
-                        row.append(self.grid_data[y][x])
-                    else:
-                        row.append(None) 
-            else:
-                row = [None] * self.selection_rect.width() 
-            data.append(row)
-        return data
+        rect = self.selection_rect
+        block = self.grid_data.read_block(rect.x(), rect.y(), rect.width(), rect.height())
+        if self.selection_mask is not None: # Fuera de la máscara el bloque queda vacío
+            inside = np.zeros(block.shape, dtype=bool)
+            inside[self.selection_mask // self.grid_width - rect.y(), self.selection_mask % self.grid_width - rect.x()] = True
+            block[~inside] = BeadGrid.EMPTY
+        return block
 
     def copy_selection(self):
         if not self.selection_rect: return
         self.clipboard_data = self._get_data_from_selection()
         self.selection_changed.emit(True, True) 
 
+    def _clear_lifted_or_selected(self):
+        """Vacía la selección; si está flotante, el bloque desaparece y su origen queda vacío."""
+        rect = self.selection_rect
+        if self.selection_mask is not None:
+            self._commit_diff(self.selection_mask, np.zeros(self.selection_mask.size, dtype=self.grid_data.indices.dtype)); return
+        if self.floating is not None:
+            rect = self.floating.source; self._discard_floating(); self.selection_rect = QRect(rect)
+        self._execute_command(SelectionCommand(self, rect, paste_data=None), merge=False)
+
     def cut_selection(self):
-        if not self.selection_rect: return
+        if not self.selection_rect or not self._active_layer_editable(): return
         self.copy_selection() 
-        cmd = SelectionCommand(self, self.selection_rect, paste_data=None) 
-        self._execute_command(cmd, merge=False)
+        self._clear_lifted_or_selected()
 
     def paste_selection(self):
-        if not self.clipboard_data or not self.selection_rect: return
-        paste_width = len(self.clipboard_data[0]) if self.clipboard_data else 0
-        paste_height = len(self.clipboard_data)
+        if self.clipboard_data is None or not self.selection_rect or not self._active_layer_editable(): return
+        if self.floating is not None: self.commit_floating()
+        if not self.selection_rect: return
+        paste_height, paste_width = self.clipboard_data.shape
         if paste_width == 0 or paste_height == 0: return
         target_rect = QRect(self.selection_rect.topLeft(), QSize(paste_width, paste_height))
+        if not self.symmetry.is_identity(): 
+            self._paste_symmetric(target_rect); return
         cmd = SelectionCommand(self, target_rect, paste_data=self.clipboard_data)
         self._execute_command(cmd, merge=False)
 
+    def _paste_symmetric(self, target_rect: QRect):
+        """Pegado con simetría activa: el bloque (recortado a la cuadrícula) y sus imágenes, como un PaintCommand."""
+        block = self.clipboard_data
+        ys, xs = np.mgrid[target_rect.y():target_rect.y() + block.shape[0], target_rect.x():target_rect.x() + block.shape[1]]
+        inside = (xs < self.grid_width) & (ys < self.grid_height)
+        self._paint_cells(xs[inside], ys[inside], block[inside], merge=False)
+
+    def tile_clipboard(self, skip_empty: bool = False, **options) -> bool:
+        """
+        Sella el portapapeles en mosaico sobre la selección (o toda la
+        cuadrícula) con las opciones de tile_pattern, como un único DiffCommand.
+        Con skip_empty las celdas vacías del motivo no se escriben.
+        """
+        if self.clipboard_data is None or self.clipboard_data.size == 0 or not self._active_layer_editable(): return False
+        if self.floating is not None: self.commit_floating()
+        area = self.selection_rect or QRect(0, 0, self.grid_width, self.grid_height)
+        values, mask = tile_pattern(self.clipboard_data, area.width(), area.height(), **options)
+        if skip_empty: mask &= values != BeadGrid.EMPTY
+        if self.selection_mask is not None: # Con la varita solo se sella dentro de la máscara
+            inside = np.zeros(mask.shape, dtype=bool)
+            inside[self.selection_mask // self.grid_width - area.y(), self.selection_mask % self.grid_width - area.x()] = True
+            mask &= inside
+        ys, xs = np.nonzero(mask)
+        return self._commit_diff((ys + area.y()) * self.grid_width + xs + area.x(), values[ys, xs])
+
+    def _selection_cells(self) -> np.ndarray | None:
+        """Celdas (índices planos) de la selección: la máscara de la varita o el rectángulo."""
+        if self.selection_mask is not None: return self.selection_mask
+        if not self.selection_rect: return None
+        rect = self.selection_rect
+        ys, xs = np.mgrid[rect.y():rect.y() + rect.height(), rect.x():rect.x() + rect.width()]
+        return (ys * self.grid_width + xs).ravel()
+
+    def fill_selection(self) -> bool:
+        """Rellena la selección con la entrada actual como un único DiffCommand."""
+        if not self.selection_rect or not self._active_layer_editable(): return False
+        if self.floating is not None: self.commit_floating()
+        cells = self._selection_cells()
+        if cells is None: return False
+        new_entry = None if self.current_entry.finish == "Eraser" else self.current_entry
+        return self._commit_diff(cells, np.full(cells.size, self.grid_data.index_of(new_entry), dtype=self.grid_data.indices.dtype))
+
+    # --- Periodo de repetición ---
+    def repeat_periods(self) -> tuple[int, int]:
+        """(columnas, filas) del menor periodo de repetición del diseño visible (el tamaño completo si no se repite)."""
+        revision = self.grid_data.revision
+        if self._repeat_cache is None or self._repeat_cache[0] != revision:
+            self._repeat_cache = (revision, repeat_periods(self.grid_data.indices))
+        return self._repeat_cache[1]
+
+    # --- Búsqueda de motivo ---
+    def find_motif(self, transforms: bool = False) -> int:
+        """
+        Busca el portapapeles en el diseño visible (compuesto) y resalta las
+        apariciones; con 'transforms' también sus giros y espejos. Devuelve
+        cuántas hay.
+        """
+        motif = self.clipboard_data
+        if motif is None or motif.size == 0: return 0
+        if not motif.any(): print("Warning: The copied motif is empty."); return 0
+        if self.floating is not None: self.commit_floating()
+        matches = find_motif(self.grid_data.indices, motif_variants(motif, transforms))
+        self._motif = motif.copy(); self.motif_matches = matches if matches.size else None
+        self.update()
+        return len(matches)
+
+    def clear_motif_matches(self):
+        if self.motif_matches is None: return
+        self.motif_matches = None; self._motif = None; self.update()
+
+    def replace_motif_matches(self) -> int:
+        """
+        Sustituye cada aparición encontrada que aún muestre el motivo por el
+        contenido de la selección (del mismo tamaño que el motivo), girado o
+        reflejado como la aparición, en un único DiffCommand. Las apariciones
+        que ya cambiaron (p. ej. la que se editó para crear el reemplazo) se
+        saltan. Devuelve cuántas se sustituyeron.
+        """
+        if self.motif_matches is None or not self._active_layer_editable(): return 0
+        replacement = self._get_data_from_selection()
+        if replacement is None or replacement.shape != self._motif.shape:
+            height, width = self._motif.shape
+            print(f"Warning: Select a {width}x{height} block to replace the motif with."); return 0
+        if self.floating is not None: self.commit_floating()
+        cells, values = [], []
+        for transform in np.unique(self.motif_matches[:, 2]).tolist():
+            variant, block = transform_block(self._motif, transform), transform_block(replacement, transform)
+            xs, ys = self.motif_matches[self.motif_matches[:, 2] == transform, :2].T
+            h, w = variant.shape
+            current = np.lib.stride_tricks.sliding_window_view(self.grid_data.indices, (h, w))[ys, xs]
+            keep = (current == variant).all(axis=(1, 2))
+            rows, columns = np.mgrid[:h, :w]
+            cells.append(((ys[keep, None, None] + rows) * self.grid_width + xs[keep, None, None] + columns).ravel())
+            values.append(np.broadcast_to(block, (int(keep.sum()), h, w)).ravel())
+        cells, values = np.concatenate(cells), np.concatenate(values).astype(self.grid_data.indices.dtype)
+        replaced = len(cells) // self._motif.size
+        unique, last = np.unique(cells[::-1], return_index=True) # En solapes gana la última aparición
+        self._commit_diff(unique, values[::-1][last])
+        self.clear_motif_matches()
+        return replaced
+
     def delete_selection(self):
-        if not self.selection_rect: return
-        cmd = SelectionCommand(self, self.selection_rect, paste_data=None) 
-        self._execute_command(cmd, merge=False)
-        self.clear_selection()
\ No newline at end of file
+        if not self.selection_rect or not self._active_layer_editable(): return
+        self._clear_lifted_or_selected()
+        self.clear_selection()
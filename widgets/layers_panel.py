@@ -0,0 +1,89 @@
+# widgets/layers_panel.py
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton, QInputDialog, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from models import GridLayer
+
+
+class LayersPanel(QWidget):
+    """
+    Lista de capas del diseño (la de arriba primero) con la casilla de
+    visibilidad, el candado y los botones de la pila. Solo emite peticiones
+    con la posición de la capa en la pila (0 = fondo); el lienzo las aplica y
+    vuelve a alimentar el panel con set_layers().
+    """
+    layer_selected = pyqtSignal(int)
+    visibility_toggled = pyqtSignal(int, bool)
+    lock_toggled = pyqtSignal(int, bool)
+    rename_requested = pyqtSignal(int, str)
+    add_requested = pyqtSignal()
+    duplicate_requested = pyqtSignal()
+    remove_requested = pyqtSignal()
+    move_requested = pyqtSignal(int) # +1 sube, -1 baja
+    LIST_HEIGHT = 110
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0)
+        self.list = QListWidget(); self.list.setFixedHeight(self.LIST_HEIGHT); self.list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.list.setToolTip("Checkbox: show/hide the layer. Double-click to rename.")
+        layout.addWidget(self.list)
+        buttons = QHBoxLayout()
+        self.btn_add = QPushButton("Add"); self.btn_add.setToolTip("Add an empty layer above the active one")
+        self.btn_duplicate = QPushButton("Duplicate"); self.btn_duplicate.setToolTip("Copy the active layer (try a variation without duplicating the file)")
+        self.btn_remove = QPushButton("Remove"); self.btn_remove.setToolTip("Remove the active layer")
+        self.btn_up = QPushButton("Up"); self.btn_up.setToolTip("Move the active layer up")
+        self.btn_down = QPushButton("Down"); self.btn_down.setToolTip("Move the active layer down")
+        self.btn_lock = QPushButton("Lock"); self.btn_lock.setCheckable(True); self.btn_lock.setToolTip("Lock the active layer against editing")
+        for button in (self.btn_add, self.btn_duplicate, self.btn_remove, self.btn_up, self.btn_down, self.btn_lock): buttons.addWidget(button)
+        layout.addLayout(buttons)
+        self._layers: list[GridLayer] = []
+
+        self.list.currentRowChanged.connect(self._on_row_changed)
+        self.list.itemChanged.connect(self._on_item_changed)
+        self.list.itemDoubleClicked.connect(self._on_item_double_clicked)
+        self.btn_add.clicked.connect(self.add_requested)
+        self.btn_duplicate.clicked.connect(self.duplicate_requested)
+        self.btn_remove.clicked.connect(self.remove_requested)
+        self.btn_up.clicked.connect(lambda: self.move_requested.emit(1))
+        self.btn_down.clicked.connect(lambda: self.move_requested.emit(-1))
+        self.btn_lock.clicked.connect(lambda checked: self._emit_for_current(self.lock_toggled, checked))
+
+    def _position(self, row: int) -> int:
+        return len(self._layers) - 1 - row # La lista muestra la pila de arriba abajo
+
+    def _emit_for_current(self, signal, value):
+        row = self.list.currentRow()
+        if row >= 0: signal.emit(self._position(row), value)
+
+    def set_layers(self, layers: list[GridLayer], active: GridLayer):
+        """Reconstruye la lista (pocas capas: no merece la pena actualizar en el sitio)."""
+        self._layers = list(layers)
+        self.list.blockSignals(True); self.list.clear()
+        for layer in reversed(self._layers):
+            item = QListWidgetItem(f"{layer.name}  (locked)" if layer.locked else layer.name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if layer.visible else Qt.CheckState.Unchecked)
+            self.list.addItem(item)
+        active_position = next(i for i, layer in enumerate(self._layers) if layer is active)
+        self.list.setCurrentRow(self._position(active_position))
+        self.list.blockSignals(False)
+        self.btn_remove.setEnabled(len(self._layers) > 1)
+        self.btn_up.setEnabled(active_position < len(self._layers) - 1); self.btn_down.setEnabled(active_position > 0)
+        self.btn_lock.setChecked(active.locked)
+
+    def _on_row_changed(self, row: int):
+        if row >= 0: self.layer_selected.emit(self._position(row))
+
+    def _on_item_changed(self, item: QListWidgetItem):
+        self.visibility_toggled.emit(self._position(self.list.row(item)), item.checkState() == Qt.CheckState.Checked)
+
+    def _on_item_double_clicked(self, item: QListWidgetItem):
+        position = self._position(self.list.row(item))
+        name, ok = QInputDialog.getText(self, "Rename Layer", "Layer name:", text=self._layers[position].name)
+        if ok and name.strip(): self.rename_requested.emit(position, name.strip())
+
+# --- Fin de la clase LayersPanel ---
@@ -0,0 +1,56 @@
+# widgets/materials_panel.py
+
+from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from PyQt6.QtGui import QColor, QPixmap, QIcon
+from PyQt6.QtCore import Qt
+
+from models import BeadColorEntry
+
+
+class MaterialsPanel(QTableWidget):
+    """
+    Tabla de materiales: una fila por color usado en el diseño con su código,
+    acabado y número de cuentas. Se alimenta con los conteos ya calculados
+    (no recorre la cuadrícula).
+    """
+    HEADERS = ["", "Code", "Name", "Finish", "Beads"]
+    SWATCH_SIZE = 14
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(0, len(self.HEADERS), *args, **kwargs)
+        self.setHorizontalHeaderLabels(self.HEADERS)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.setObjectName("MaterialsPanel")
+        self._swatch_cache: dict[str, QIcon] = {}
+
+    def _swatch(self, color: QColor) -> QIcon:
+        key = color.name()
+        icon = self._swatch_cache.get(key)
+        if icon is None:
+            pixmap = QPixmap(self.SWATCH_SIZE, self.SWATCH_SIZE); pixmap.fill(color)
+            icon = self._swatch_cache[key] = QIcon(pixmap)
+        return icon
+
+    def set_materials(self, rows: list[tuple[BeadColorEntry, int]]):
+        """Muestra (entrada, conteo) ordenados de mayor a menor uso."""
+        rows = sorted(rows, key=lambda item: item[1], reverse=True)
+        self.setUpdatesEnabled(False)
+        self.setRowCount(len(rows))
+        for r, (entry, count) in enumerate(rows):
+            swatch = QTableWidgetItem(); swatch.setIcon(self._swatch(entry.color))
+            count_item = QTableWidgetItem(str(count))
+            count_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.setItem(r, 0, swatch)
+            self.setItem(r, 1, QTableWidgetItem(entry.code or "—"))
+            self.setItem(r, 2, QTableWidgetItem(entry.name))
+            self.setItem(r, 3, QTableWidgetItem(entry.finish))
+            self.setItem(r, 4, count_item)
+        self.setUpdatesEnabled(True)
+
+# --- Fin de la clase MaterialsPanel ---
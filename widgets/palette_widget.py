@@ -49,6 +49,7 @@ class PaletteWidget(QLabel):
         self.preset_indices: set[int] = set() 
         self.next_open_slot: int = 0 
         self.hovered_index: int = -1 
+        self.bead_counts: dict[str, int] = {} # HEX -> cuentas usadas en el diseño
         
         w = (self.CELL_SIZE * self.COLS) + (self.SPACING * (self.COLS + 1))
         h = (self.CELL_SIZE * self.ROWS) + (self.SPACING * (self.ROWS + 1))
@@ -116,10 +117,26 @@ class PaletteWidget(QLabel):
     def _set_entry_at_index(self, index: int, entry: BeadColorEntry):
         """Función auxiliar interna para establecer la entrada y redibujar."""
         self.colors[index] = entry
-        self.tooltips[index] = f"Color: {entry.name}\nFinish: {entry.finish}\nCode: {entry.code or 'N/A'}"
+        self.tooltips[index] = self._entry_tooltip(entry)
         self.palette_set.add(entry.color.name())
         self.draw_palette()
 
+    def _entry_tooltip(self, entry: BeadColorEntry) -> str:
+        """Texto del tooltip de una entrada, incluyendo cuántas cuentas usa el diseño."""
+        tooltip = f"Color: {entry.name}\nFinish: {entry.finish}\nCode: {entry.code or 'N/A'}"
+        if entry.finish != "Eraser":
+            tooltip += f"\nBeads used: {self.bead_counts.get(entry.color.name(), 0)}"
+        return tooltip
+
+    def set_bead_counts(self, counts: dict[str, int]):
+        """Actualiza los conteos por color (HEX) mostrados en los tooltips."""
+        self.bead_counts = counts
+        for i, entry in enumerate(self.colors):
+            if entry is not None and i != 0:
+                self.tooltips[i] = self._entry_tooltip(entry)
+        if self.hovered_index > 0 and self.colors[self.hovered_index] is not None:
+            self.setToolTip(self.tooltips[self.hovered_index])
+
     def _find_next_open_slot(self) -> int:
         """Encuentra el primer índice 'None' después de los presets."""
         total_cells = self.ROWS * self.COLS
@@ -257,7 +274,7 @@ class PaletteWidget(QLabel):
         if index != -1:
             entry = self.colors[index]
             if entry is not None:
-                tooltip_to_show = f"Color: {entry.name}\nFinish: {entry.finish}\nCode: {entry.code or 'N/A'}"
+                tooltip_to_show = self._entry_tooltip(entry)
                 cursor_to_show = Qt.CursorShape.PointingHandCursor
             else:
                  tooltip_to_show = "Empty (Double-click to add)"
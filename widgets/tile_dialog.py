@@ -0,0 +1,56 @@
+# widgets/tile_dialog.py
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QHBoxLayout, QLabel, QSpinBox, QComboBox, QCheckBox, QDialogButtonBox
+)
+
+from utils.tiling import TILE_STEPS
+
+
+class TileStampDialog(QDialog):
+    """
+    Options for tiling the clipboard motif across the selection (or the whole
+    grid): origin offset, gap between tiles, brick / half-drop step and
+    mirroring of alternate tiles. options() returns the keyword arguments for
+    GridCanvas.tile_clipboard().
+    """
+    def __init__(self, motif_width: int, motif_height: int, target_label: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Tile Clipboard")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Tile the {motif_width}x{motif_height} clipboard motif across {target_label}."))
+
+        form = QFormLayout()
+        self.offset_x = QSpinBox(); self.offset_x.setRange(-999, 999)
+        self.offset_y = QSpinBox(); self.offset_y.setRange(-999, 999)
+        offset_layout = QHBoxLayout(); offset_layout.addWidget(self.offset_x); offset_layout.addWidget(self.offset_y)
+        form.addRow("Offset (columns, rows):", offset_layout)
+        self.gap_x = QSpinBox(); self.gap_x.setRange(0, 999)
+        self.gap_y = QSpinBox(); self.gap_y.setRange(0, 999)
+        gap_layout = QHBoxLayout(); gap_layout.addWidget(self.gap_x); gap_layout.addWidget(self.gap_y)
+        form.addRow("Gap (columns, rows):", gap_layout)
+        self.step = QComboBox(); self.step.addItems(TILE_STEPS)
+        self.step.setToolTip("Brick: every other row of tiles shifts half a tile.\nHalf-drop: every other column of tiles drops half a tile.")
+        form.addRow("Step:", self.step)
+        layout.addLayout(form)
+
+        self.mirror_columns = QCheckBox("Mirror alternate tiles horizontally")
+        self.mirror_rows = QCheckBox("Mirror alternate tiles vertically")
+        self.skip_empty = QCheckBox("Keep existing beads under empty motif cells")
+        layout.addWidget(self.mirror_columns); layout.addWidget(self.mirror_rows); layout.addWidget(self.skip_empty)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(self.accept); button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def options(self) -> dict:
+        return {
+            "offset_x": self.offset_x.value(), "offset_y": self.offset_y.value(),
+            "gap_x": self.gap_x.value(), "gap_y": self.gap_y.value(),
+            "step": self.step.currentText(),
+            "mirror_columns": self.mirror_columns.isChecked(), "mirror_rows": self.mirror_rows.isChecked(),
+            "skip_empty": self.skip_empty.isChecked(),
+        }
+
+# --- Fin de la clase TileStampDialog ---